@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+from statistics import NormalDist
+
+
+# Prophet'in trend bileşenine benzer parçalı doğrusal model. Yıllık veride mevsimsellik bilgi taşımadığı için
+# sadece trend kısmı alınır ve bütün seriler (sütunlar) tek bir vektörel en küçük kareler çözümüyle eğitilir.
+# Prophet'teki Laplace önsel yerine kapalı formda çözülebilen Gauss önsel (ridge) kullanılır
+N_CHANGEPOINTS = 25
+CHANGEPOINT_RANGE = 0.8
+CHANGEPOINT_PRIOR_SCALE = 0.05
+# Prophet'in varsayılan güven aralığı genişliği (%80)
+INTERVAL_WIDTH = 0.8
+
+
+def make_future_dates(ds, years):
+    """Prophet'in make_future_dataframe(periods=years, freq='YE') çıktısıyla aynı tarihleri üretir.
+
+    Sadece tarih üretmek için model eğitmeye gerek yoktur.
+    """
+    history = pd.Series(pd.to_datetime(ds).unique()).sort_values()
+    last = history.iloc[-1]
+    future = pd.date_range(start=last, periods=years + 1, freq='YE')
+    future = future[future > last][:years]
+    return pd.concat([history, pd.Series(future)], ignore_index=True)
+
+
+def _time_index(ds, start, span):
+    # Tarihler ilk gözlemden itibaren gün sayısına çevrilip geçmiş uzunluğuna bölünür (0..1)
+    days = (pd.Series(pd.to_datetime(ds)).reset_index(drop=True) - start).dt.days
+    return days.to_numpy(dtype=float) / span
+
+
+def changepoint_grid(t, n_changepoints=N_CHANGEPOINTS, changepoint_range=CHANGEPOINT_RANGE):
+    # Prophet ile aynı kural: kırılma noktaları geçmişin ilk %80'lik kısmındaki gözlemlere yerleştirilir
+    hist_size = int(np.floor(len(t) * changepoint_range))
+    n = min(n_changepoints, hist_size - 1)
+    if n <= 0:
+        return np.empty(0)
+    idx = np.linspace(0, hist_size - 1, n + 1).round().astype(int)
+    return np.asarray(t)[idx[1:]]
+
+
+def design_matrix(t, changepoints):
+    """[1, t, (t - c_1)+, ..., (t - c_n)+] sütunlarından oluşan tasarım matrisi."""
+    t = np.asarray(t, dtype=float)
+    hinges = np.clip(t[:, None] - changepoints[None, :], 0, None)
+    return np.column_stack([np.ones_like(t), t, hinges])
+
+
+class BatchTrendModel:
+    """Aynı tarih eksenini paylaşan birden çok seriyi tek seferde eğiten parçalı doğrusal trend.
+
+    fit(ds, Y): Y (zaman x seri) matrisidir, NaN değerler o seri için yok sayılır.
+    Her seri kendi ölçeğine bölünür (Prophet'teki y_scale), böylece tek bir önsel ölçeği bütün serilere uyar.
+    """
+
+    def __init__(self, n_changepoints=N_CHANGEPOINTS, changepoint_range=CHANGEPOINT_RANGE,
+                 changepoint_prior_scale=CHANGEPOINT_PRIOR_SCALE):
+        self.n_changepoints = n_changepoints
+        self.changepoint_range = changepoint_range
+        self.changepoint_prior_scale = changepoint_prior_scale
+
+    def fit(self, ds, Y):
+        ds = pd.Series(pd.to_datetime(ds)).reset_index(drop=True)
+        Y = np.asarray(Y, dtype=float)
+        if Y.ndim == 1:
+            Y = Y[:, None]
+
+        self.start = ds.min()
+        self.span = max((ds.max() - self.start).days, 1)
+        t = _time_index(ds, self.start, self.span)
+        self.changepoints = changepoint_grid(t, self.n_changepoints, self.changepoint_range)
+        X = design_matrix(t, self.changepoints)
+
+        mask = ~np.isnan(Y)
+        self.y_scale = np.nanmax(np.abs(Y), axis=0)
+        self.y_scale[~(self.y_scale > 0)] = 1.0
+        Ys = np.where(mask, Y, 0.0) / self.y_scale
+        W = mask.astype(float)
+
+        # Seri başına normal denklemler: X^T W X ve X^T W y. Bütün seriler (k, p, p) blokları olarak birlikte çözülür
+        XtW = X.T[None, :, :] * W.T[:, None, :]
+        XtWX = XtW @ X
+        XtWy = (XtW @ Ys.T[:, :, None])[..., 0]
+
+        # Gürültü varyansı önce kırılmasız doğrusal uyumdan tahmin edilir, ceza bunun önsele oranıdır
+        base = np.linalg.solve(XtWX[:, :2, :2] + 1e-9 * np.eye(2), XtWy[:, :2, None])[..., 0]
+        resid = (Ys - (X[:, :2] @ base.T)) * W
+        dof = np.maximum(W.sum(axis=0) - 2, 1)
+        sigma2 = np.maximum((resid ** 2).sum(axis=0) / dof, 1e-8)
+
+        n_params = X.shape[1]
+        penalty = np.zeros((Y.shape[1], n_params, n_params))
+        idx = np.arange(2, n_params)
+        penalty[:, idx, idx] = (sigma2 / self.changepoint_prior_scale ** 2)[:, None]
+
+        # Katsayıların sonsal kovaryansı (sigma^2 ile çarpılmadan), güven aralıkları bundan hesaplanır
+        self.precision_inv = np.linalg.inv(XtWX + penalty + 1e-9 * np.eye(n_params))
+        self.coef = (self.precision_inv @ XtWy[..., None])[..., 0]
+
+        fitted = X @ self.coef.T
+        self.sigma = np.sqrt(((Ys - fitted) ** 2 * W).sum(axis=0) / dof) * self.y_scale
+        return self
+
+    def predict(self, ds):
+        """(zaman x seri) tahmin matrisi döner, orijinal ölçekte."""
+        t = _time_index(ds, self.start, self.span)
+        X = design_matrix(t, self.changepoints)
+        return (X @ self.coef.T) * self.y_scale
+
+    def predict_interval(self, ds, interval_width=INTERVAL_WIDTH):
+        """(yhat, yhat_lower, yhat_upper) matrisleri. Aralık analitik tahmin varyansından hesaplanır:
+        gözlem gürültüsü + katsayı belirsizliği (geçmişten uzaklaştıkça genişler)."""
+        t = _time_index(ds, self.start, self.span)
+        X = design_matrix(t, self.changepoints)
+        yhat = (X @ self.coef.T) * self.y_scale
+        leverage = ((X[None, :, :] @ self.precision_inv) * X[None, :, :]).sum(axis=2).T
+        z = NormalDist().inv_cdf(0.5 + interval_width / 2)
+        half = z * self.sigma * np.sqrt(1 + leverage)
+        return yhat, yhat - half, yhat + half
+
+
+def forecast_trend(ds, Y, future_ds, log=False, interval_width=INTERVAL_WIDTH):
+    """Sütunları aynı tarih eksenini paylaşan serileri tek seferde eğitip future_ds için tahmin eder.
+
+    log=True ise model log(y) üzerinde kurulur (sabit yüzde büyüme), sonuçlar geri dönüştürülür.
+    (yhat, yhat_lower, yhat_upper) matrisleri (zaman x seri) döner.
+    """
+    Y = np.asarray(Y, dtype=float)
+    if log:
+        Y = np.log(np.where(Y > 0, Y, np.nan))
+    model = BatchTrendModel().fit(ds, Y)
+    bands = model.predict_interval(future_ds, interval_width)
+    if log:
+        bands = tuple(np.exp(b) for b in bands)
+    return bands
+
+
+def forecast_sector_shares(df_input, sectors, years):
+    """Bir ilin bütün sektör payı serilerini tek geçişte tahmin eder ve %100'e normalize eder.
+
+    Dönen tablo: ds, her sektör için normalize pay ve normalize edilmeden önceki toplamı tutan Total_Sum.
+    """
+    df_hist = df_input[['ds'] + list(sectors)].sort_values('ds')
+    future_dates = make_future_dates(df_hist['ds'], years)
+
+    model = BatchTrendModel().fit(df_hist['ds'], df_hist[list(sectors)].to_numpy(dtype=float))
+
+    # Negatif değerler kaldırılır
+    shares = np.clip(model.predict(future_dates), 0, None)
+
+    forecast_results = pd.DataFrame(shares, columns=list(sectors))
+    forecast_results.insert(0, 'ds', future_dates.to_numpy())
+    forecast_results['Total_Sum'] = shares.sum(axis=1)
+
+    # Sektörler bölünür, toplamda 100e yuvarlanır/100e göre dağıtılır
+    forecast_results[list(sectors)] = shares / forecast_results['Total_Sum'].to_numpy()[:, None] * 100
+
+    return forecast_results
@@ -0,0 +1,347 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+import numpy as np
+import pandas as pd
+import warnings
+import logging
+from matplotlib.backends.backend_pdf import PdfPages
+
+import Training
+import TestAll
+import PerformanceTest
+from ConvertToUsd import convert_currency
+from DataStore import load_dataset
+from PopulationSource import read_population
+from BatchTrend import BatchTrendModel, make_future_dates
+from ForecastBackend import forecast_panel
+from Reconciliation import reconcile_targets, METHODS as RECONCILE_METHODS
+import FitWorker
+import Uncertainty
+
+warnings.filterwarnings('ignore')
+logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+logging.getLogger('prophet').setLevel(logging.WARNING)
+
+
+# Hız ölçümü (doğruluk için PerformanceTest.py). TÜİK biçiminde sentetik nüfus CSV'si ve '|' ayrılmış GSYİH
+# dosyası üretilir, her aşama ayrı ayrı zamanlanır ve sonuçlar JSON olarak yazılır. Aynı tohum (seed) ve ölçek
+# her zaman aynı veriyi üretir, böylece farklı commit'lerin sonuçları karşılaştırılabilir
+BENCH_DIR = '.benchmark'
+OUTPUT_FILE = 'Benchmark_Sonuclari.json'
+SEED = 42
+
+# Ölçekler 'birim x yıl' biçimindedir: 81 il / ~970 ilçe, 20 / 100 yıl
+SCALES = ['81x20', '970x20', '81x100']
+LAST_YEAR = 2024
+# Her aşama bu kadar tekrarlanır, en küçük ve ortanca süre raporlanır
+REPEAT = 3
+# Prophet eğitimi, çizim ve CV birim başına pahalı olduğu için sadece bu kadar birimde ölçülür
+SAMPLE = 3
+CV_BACKENDS = ['numpy', 'prophet']
+# Açılış süresi: giriş noktaları temiz bir Python sürecinde içe aktarılır. first_fit, yeni bir sürecin ilk Prophet
+# tahminine kadar geçen süredir (eğitim sunucusu FitWorker çalışıyorsa iş ona gider)
+STARTUP_MODULES = ['TestAll', 'PerformanceTest', 'Pipeline', 'ForecastStore', 'ScenarioEngine']
+FIRST_FIT_SNIPPET = (
+    "import numpy as np\n"
+    "import pandas as pd\n"
+    "from ForecastBackend import forecast_horizon\n"
+    "y = 100 * 1.02 ** np.arange(20) * (1 + 0.02 * np.random.default_rng(0).standard_normal(20))\n"
+    "df = pd.DataFrame({'ds': pd.date_range('2000-12-31', periods=20, freq='YE'), 'y': y})\n"
+    "forecast_horizon(df, 5, 'prophet')\n"
+)
+
+GDP_BLOCK = len(Training.GDP_VALUE_COLS)
+
+
+def parse_scale(text):
+    units, years = text.lower().split('x')
+    return int(units), int(years)
+
+
+def unit_names(n_units):
+    # İsimler GSYİH tarafında '-<kod>' ekiyle yazılır; Training iki tarafı ProvinceKeys ile İl_Kodu'na çevirir
+    return [f"Birim {i + 1:04d}" for i in range(n_units)]
+
+
+def make_population_csv(path, n_units, n_years, seed=SEED):
+    """TÜİK nüfus CSV'si ile aynı sütunlara sahip sentetik dosya yazar."""
+    rng = np.random.default_rng(seed)
+    years = np.arange(LAST_YEAR - n_years + 1, LAST_YEAR + 1)
+    base = rng.lognormal(mean=np.log(6e6 / np.sqrt(n_units)), sigma=0.8, size=n_units)
+    growth = rng.normal(0.012, 0.008, size=n_units)
+    noise = rng.normal(0, 0.003, size=(n_units, n_years))
+    total = np.round(base[:, None] * np.exp(np.cumsum(growth[:, None] + noise, axis=1))).astype(np.int64)
+
+    male = np.round(total * rng.uniform(0.49, 0.51, size=(n_units, 1))).astype(np.int64)
+    urban = np.round(total * rng.uniform(0.4, 0.95, size=(n_units, 1))).astype(np.int64)
+    age_split = rng.dirichlet([22, 15, 53, 10], size=n_units)
+
+    idx = np.repeat(np.arange(n_units), n_years)
+    flat = total.ravel()
+    df = pd.DataFrame({
+        'İl': np.asarray(unit_names(n_units))[idx],
+        'İl_Kodu': [f"{i + 1:02d}" for i in idx],
+        'Kategori': np.where(base[idx] > np.median(base), 'Büyük Şehir', 'Normal'),
+        'Yıl': np.tile(years, n_units),
+        'Toplam_Nüfus': flat,
+        'Erkek': male.ravel(),
+        'Kadın': flat - male.ravel(),
+        'Şehir': urban.ravel(),
+        'Köy': flat - urban.ravel(),
+    })
+    for j, col in enumerate(['Çocuk_0_14', 'Genç_15_24', 'Yetişkin_25_64', 'Yaşlı_65+']):
+        df[col] = np.round(flat * age_split[idx, j]).astype(np.int64)
+    df['Büyüme_Oranı_%'] = np.round(growth[idx] * 100, 1)
+    df['Nüfus_Yoğunluğu_km2'] = np.round(flat / rng.uniform(500, 15000, size=n_units)[idx], 1)
+    df.to_csv(path, index=False, encoding='utf-8-sig')
+    return path
+
+
+def make_gdp_file(path, n_units, n_years, seed=SEED):
+    """GayriSafiSektor.csv ile aynı yerleşimde sentetik GSYİH dosyası yazar.
+
+    Her yıl bloğu 12 sütundur; il satırında GSYİH (Bin TL), bir alt satırda 11 sektör payı bulunur.
+    """
+    rng = np.random.default_rng(seed + 1)
+    years = np.arange(LAST_YEAR - n_years + 1, LAST_YEAR + 1)
+    width = 2 + n_years * GDP_BLOCK
+
+    gdp = rng.lognormal(np.log(2e7 / np.sqrt(n_units)), 0.9, size=(n_units, 1)) \
+        * np.exp(np.cumsum(rng.normal(0.2, 0.05, size=(n_units, n_years)), axis=1))
+    shares = rng.dirichlet(np.full(len(Training.SECTOR_COLS), 3.0), size=(n_units, n_years)) * 100
+
+    def row(first, label, cells):
+        out = [''] * width
+        out[0], out[1] = first, label
+        for col, value in cells:
+            out[col] = value
+        return '|'.join(out)
+
+    lines = [row('', 'Sütunlar', []), row('Satırlar', '', []), row('', '', []),
+             row('', '', [(2 + k * GDP_BLOCK, str(y)) for k, y in enumerate(years)]),
+             row('', 'Bin TL ve Cari Fiyatlarla', [])]
+    for i, name in enumerate(unit_names(n_units)):
+        lines.append(row(f"{name}-{i + 1}", 'Gayri Safi Yurtiçi Hasıla, Değer',
+                         [(2 + k * GDP_BLOCK, f"{gdp[i, k]:.1f}") for k in range(n_years)]))
+        lines.append(row('', 'Sektörlerin Gayri Safi Yurt Içi Hasıla İçindeki Payı',
+                         [(3 + k * GDP_BLOCK + s, f"{shares[i, k, s]:.2f}")
+                          for k in range(n_years) for s in range(len(Training.SECTOR_COLS))]))
+    lines.append(row('', '', []))
+
+    with open(path, 'w', encoding='utf-8-sig') as f:
+        f.write('\n'.join(lines) + '\n')
+    return path
+
+
+def make_inputs(scale, seed=SEED, bench_dir=BENCH_DIR):
+    """Ölçek için sentetik girdileri üretir (varsa yeniden üretmez); dosya yollarını döner."""
+    n_units, n_years = parse_scale(scale)
+    out_dir = os.path.join(bench_dir, f"{n_units}x{n_years}_s{seed}")
+    os.makedirs(out_dir, exist_ok=True)
+    pop_csv = os.path.join(out_dir, 'nufus.csv')
+    gdp_csv = os.path.join(out_dir, 'gsyih.csv')
+    if not os.path.exists(pop_csv):
+        make_population_csv(pop_csv, n_units, n_years, seed)
+    if not os.path.exists(gdp_csv):
+        make_gdp_file(gdp_csv, n_units, n_years, seed)
+    return {'dir': out_dir, 'population_csv': pop_csv, 'gdp_file': gdp_csv,
+            'training_set': os.path.join(out_dir, 'egitim.parquet')}
+
+
+def measure(fn, repeat=REPEAT):
+    """fn'i 'repeat' kez çalıştırır; (süre özeti, son sonuç) döner."""
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return {'min_s': min(times), 'median_s': float(np.median(times)), 'repeat': repeat}, result
+
+
+def _silent(fn, *args, **kwargs):
+    # Training ve TestAll ilerleme mesajlarını print ile yazar; ölçüm sırasında bastırılır
+    with open(os.devnull, 'w') as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            sys.stdout = stdout
+
+
+def _prophet_fit_predict(df_p, years):
+    """(eğitim süresi, {aralık modu: tahmin süresi}, TestAll modundaki tahmin). Model bir kez eğitilir."""
+    m = Uncertainty.prophet_model(TestAll.UNCERTAINTY)
+    start = time.perf_counter()
+    m.fit(df_p)
+    fit_s = time.perf_counter() - start
+    future = m.make_future_dataframe(periods=years, freq='YE')
+    predict_s, forecasts = {}, {}
+    for mode in Uncertainty.MODES:
+        start = time.perf_counter()
+        forecasts[mode] = Uncertainty.predict(m, future, mode)
+        predict_s[mode] = time.perf_counter() - start
+    return fit_s, predict_s, forecasts[TestAll.UNCERTAINTY]
+
+
+def bench_scale(scale, repeat=REPEAT, sample=SAMPLE, cv_backends=CV_BACKENDS, seed=SEED):
+    """Bir ölçekteki bütün aşamaları ölçer; {aşama: süre özeti} döner."""
+    paths = make_inputs(scale, seed)
+    stages = {}
+
+    # Tipli nüfus okuması; tablonun bellekteki boyutu da kaydedilir
+    stages['etl_read_population'], df_pop = measure(lambda: read_population(paths['population_csv']), repeat)
+    stages['etl_read_population']['frame_mb'] = df_pop.memory_usage(deep=True).sum() / 2 ** 20
+    stages['etl_parse_gdp'], _ = measure(lambda: Training.parse_gdp_sector_file(paths['gdp_file']), repeat)
+    stages['etl_prepare'], _ = measure(lambda: _silent(
+        Training.prepare_data_for_prophet, paths['population_csv'], paths['gdp_file'], paths['training_set'],
+        currencies=()), repeat)
+
+    df = load_dataset(paths['training_set'])
+    stages['currency'], _ = measure(lambda: convert_currency(df.copy(), ('USD', 'EUR'), 2020), repeat)
+
+    units = sorted(df['İl'].unique())
+    frames = {u: g.sort_values('ds').reset_index(drop=True) for u, g in df.groupby('İl')}
+    picked = units[:sample]
+
+    # NumPy motoru: bütün birimler tek tek ve tek toplu çözümle
+    def numpy_each():
+        for u in units:
+            d = frames[u]
+            model = BatchTrendModel().fit(d['ds'], d['y'].to_numpy(dtype=float))
+            model.predict_interval(make_future_dates(d['ds'], TestAll.PREDICTION_YEARS))
+
+    stages['fit_predict_numpy'], _ = measure(numpy_each, repeat)
+    stages['fit_predict_numpy_panel'], panel = measure(
+        lambda: forecast_panel(df, 'y', TestAll.PREDICTION_YEARS), repeat)
+
+    # Birim tahminlerinin bölge/ulusal toplamlara uzlaştırılması (TestAll'un rapor sonundaki adımı)
+    for method in RECONCILE_METHODS:
+        stages[f'reconcile_{method}'], _ = measure(
+            lambda: _silent(reconcile_targets, {'y': panel}, df, method), repeat)
+
+    # Prophet: eğitim ve tahmin ayrı ölçülür (örnek birimlerde, birim başına ortalama)
+    # Tahmin süresi güven aralığı modu başına ayrı raporlanır; predict_prophet_per_unit TestAll'un modudur
+    fit_s, predict_s, forecasts = [], {mode: [] for mode in Uncertainty.MODES}, {}
+    for u in picked:
+        f, p, forecasts[u] = _prophet_fit_predict(frames[u][['ds', 'y']], TestAll.PREDICTION_YEARS)
+        fit_s.append(f)
+        for mode, s in p.items():
+            predict_s[mode].append(s)
+    stages['fit_prophet_per_unit'] = {'min_s': min(fit_s), 'median_s': float(np.median(fit_s)), 'repeat': len(fit_s)}
+    for mode, times in predict_s.items():
+        name = 'predict_prophet_per_unit' if mode == TestAll.UNCERTAINTY else f'predict_prophet_{mode}_per_unit'
+        stages[name] = {'min_s': min(times), 'median_s': float(np.median(times)), 'repeat': len(times)}
+
+    # PDF sayfa çizimi (nüfus + GSYİH/sektör sayfası), birim başına
+    sector_cols = [c for c in df.columns if c.startswith('Pay_')]
+    pdf_path = os.path.join(paths['dir'], 'rapor.pdf')
+
+    def render():
+        with PdfPages(pdf_path) as pdf:
+            for u in picked:
+                TestAll.draw_population_page(pdf, u, frames[u], forecasts[u])
+                TestAll.draw_gdp_page(pdf, u, frames[u], forecasts[u], sector_cols)
+
+    stats, _ = measure(render, repeat)
+    stages['render_per_unit'] = {k: (v / len(picked) if k.endswith('_s') else v) for k, v in stats.items()}
+
+    # Çapraz doğrulama: örnek birimlerin bütün kesimleri, motor başına. Prophet'te kesim sayısı yıl sayısıyla
+    # büyüdüğü için tek birim ve tek tekrar ile ölçülür
+    for backend in cv_backends:
+        cv_units, n_repeat = (picked, repeat) if backend == 'numpy' else (picked[:1], 1)
+        jobs = [job for u in cv_units for job in PerformanceTest.city_cv_jobs(u, frames[u], backend)]
+        stats, _ = measure(lambda: _silent(PerformanceTest.run_cv_jobs, jobs, 1), n_repeat)
+        stats['fits'] = len(jobs)
+        stats['per_fit_s'] = stats['min_s'] / max(len(jobs), 1)
+        stages[f'cv_{backend}'] = stats
+
+    return {'scale': scale, 'units': len(units), 'years': parse_scale(scale)[1], 'rows': len(df),
+            'sample': len(picked), 'stages': stages}
+
+
+def _time_process(code, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], check=True, capture_output=True,
+                       cwd=os.path.dirname(os.path.abspath(__file__)))
+        times.append(time.perf_counter() - start)
+    return {'min_s': min(times), 'median_s': float(np.median(times)), 'repeat': repeat}
+
+
+def bench_startup(modules=STARTUP_MODULES, repeat=REPEAT):
+    """Giriş noktalarının içe aktarma süresi ve yeni bir sürecin ilk Prophet tahmini; ölçek gibi raporlanır."""
+    stages = {'python': _time_process('pass', repeat)}
+    for module in modules:
+        stages[f'import_{module}'] = _time_process(f'import {module}', repeat)
+    stages['first_fit'] = _time_process(FIRST_FIT_SNIPPET, repeat)
+    return {'scale': 'startup', 'fit_worker': FitWorker.ping() is not None, 'stages': stages}
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                timeout=10).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {'commit': commit, 'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+            'platform': platform.platform(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'cpu_count': os.cpu_count()}
+
+
+def compare(old, new):
+    """İki sonuç dosyasının ortak (ölçek, aşama) sürelerini oranlar (yeni / eski)."""
+    old_runs = {r['scale']: r['stages'] for r in old['runs']}
+    rows = []
+    for run in new['runs']:
+        for stage, stats in run['stages'].items():
+            before = old_runs.get(run['scale'], {}).get(stage)
+            if before:
+                rows.append({'Ölçek': run['scale'], 'Aşama': stage, 'Eski_s': before['min_s'],
+                             'Yeni_s': stats['min_s'], 'Oran': stats['min_s'] / before['min_s']})
+    return pd.DataFrame(rows)
+
+
+def run_benchmark(scales=SCALES, repeat=REPEAT, sample=SAMPLE, cv_backends=CV_BACKENDS, output=OUTPUT_FILE,
+                  seed=SEED, startup=True):
+    results = {'environment': environment(), 'seed': seed, 'runs': []}
+    if startup:
+        print("[startup] ölçülüyor...")
+        run = bench_startup(repeat=repeat)
+        results['runs'].append(run)
+        for stage, stats in run['stages'].items():
+            print(f"  {stage:<28} {stats['min_s'] * 1000:>12.2f} ms")
+    for scale in scales:
+        print(f"[{scale}] ölçülüyor...")
+        run = bench_scale(scale, repeat, sample, cv_backends, seed)
+        results['runs'].append(run)
+        for stage, stats in run['stages'].items():
+            print(f"  {stage:<28} {stats['min_s'] * 1000:>12.2f} ms")
+
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"Sonuçlar {output} olarak kaydedildi")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ETL, eğitim, tahmin, çizim ve CV aşamalarının hız ölçümü")
+    parser.add_argument('--scales', nargs='*', default=SCALES, help="'birim x yıl' ölçekleri, ör. 81x20 970x100")
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--sample', type=int, default=SAMPLE, help="Prophet, çizim ve CV için birim sayısı")
+    parser.add_argument('--cv-backends', nargs='*', default=CV_BACKENDS)
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    parser.add_argument('--compare', help="Karşılaştırılacak önceki sonuç dosyası")
+    parser.add_argument('--no-startup', action='store_true', help="Açılış sürelerini ölçme")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.scales, args.repeat, args.sample, args.cv_backends, args.output,
+                            startup=not args.no_startup)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            print(compare(json.load(f), results).to_string(index=False))
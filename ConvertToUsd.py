@@ -1,8 +1,12 @@
 import pandas as pd
+import numpy as np
 
+from DataStore import load_dataset, save_dataset, export_excel, DATASET_SHEET
 
-INPUT_FILE = 'Prophet_Training_Set_Sektorlu.xlsx'
-OUTPUT_FILE = 'Prophet_Training_Set_Sektorlu_USD.xlsx'
+
+INPUT_FILE = 'Prophet_Training_Set_Sektorlu.parquet'
+OUTPUT_FILE = 'Prophet_Training_Set_Sektorlu_USD.parquet'
+EXCEL_FILE = None  # Excel çıktısı da istenirse: 'Prophet_Training_Set_Sektorlu_USD.xlsx'
 
 #Burada yıllara göre yaklaşık bir dolar değeri verdim
 USD_RATES = {
@@ -14,25 +18,85 @@ USD_RATES = {
     2024: 31.50
 }
 
-def convert_to_usd():
+#Euro için de aynı şekilde yıllık yaklaşık ortalama kur
+EUR_RATES = {
+    2004: 1.78, 2005: 1.68, 2006: 1.81, 2007: 1.79,
+    2008: 1.91, 2009: 2.16, 2010: 1.99, 2011: 2.34,
+    2012: 2.31, 2013: 2.53, 2014: 2.91, 2015: 3.02,
+    2016: 3.34, 2017: 4.12, 2018: 5.68, 2019: 6.35,
+    2020: 8.05, 2021: 10.51, 2022: 17.41, 2023: 25.76,
+    2024: 35.57
+}
+
+CURRENCY_RATES = {'USD': USD_RATES, 'EUR': EUR_RATES}
+
+# Reel (sabit fiyatlı) değerler için yaklaşık yıllık ortalama TÜFE endeksi (2003=100)
+DEFLATOR = {
+    2004: 108.6, 2005: 117.5, 2006: 129.0, 2007: 140.0,
+    2008: 154.4, 2009: 164.4, 2010: 178.0, 2011: 189.6,
+    2012: 206.8, 2013: 222.3, 2014: 242.0, 2015: 260.9,
+    2016: 280.6, 2017: 312.1, 2018: 363.6, 2019: 419.8,
+    2020: 470.1, 2021: 562.2, 2022: 968.7, 2023: 1490.9,
+    2024: 2363.1
+}
+
+# Para birimi çevrilecek sütunlar. GSYİH dosyası 'Bin TL' cinsindendir
+GDP_UNIT = 1000
+MONETARY_COLS = ['GSYIH', 'GSYIH_Kisi_Basi']
+
+def add_per_capita(df):
+    """Kişi başı GSYİH (TL). Nüfusu olmayan satırlar NaN kalır."""
+    population = df['y'].where(df['y'] > 0)
+    df['GSYIH_Kisi_Basi'] = df['GSYIH'] * GDP_UNIT / population
+    return df
+
+
+def convert_currency(df, currencies=('USD',), real_base_year=None, rate_tables=CURRENCY_RATES,
+                     deflator=DEFLATOR):
+    """Parasal sütunları yıl sütunu üzerinden tek vektörel eşleme ile çevirir.
+
+    Her para birimi için '<sütun>_<BİRİM>' (GSYIH_USD, GSYIH_Kisi_Basi_EUR ...) eklenir.
+    real_base_year verilirse '<sütun>_Reel' sütunları o yılın fiyatlarıyla eklenir.
+    Kuru veya endeksi olmayan yıllar NaN olur.
+    """
+    # Tablo değiştirilmeden önce kontrol edilir; hatalı çağrı yarım eklenmiş sütun bırakmaz
+    unknown = [c for c in currencies if c not in rate_tables]
+    if unknown:
+        raise ValueError(f"Kur tablosu olmayan para birimi: {unknown} (mevcut birimler: {sorted(rate_tables)})")
+    if real_base_year is not None and real_base_year not in deflator:
+        raise ValueError(f"Reel taban yılı {real_base_year} için deflatör endeksi yok "
+                         f"(mevcut yıllar: {sorted(deflator)})")
+    if 'GSYIH_Kisi_Basi' not in df.columns and {'GSYIH', 'y'} <= set(df.columns):
+        add_per_capita(df)
+    cols = [c for c in MONETARY_COLS if c in df.columns]
+    values = df[cols].to_numpy(dtype=float)
+
+    for currency in currencies:
+        rates = df['Yıl'].map(pd.Series(rate_tables[currency], dtype=float)).to_numpy(dtype=float)
+        rates = np.where(rates > 0, rates, np.nan)
+        df[[f"{c}_{currency}" for c in cols]] = values / rates[:, None]
+
+    if real_base_year is not None:
+        index = df['Yıl'].map(pd.Series(deflator, dtype=float)).to_numpy(dtype=float)
+        df[[f"{c}_Reel" for c in cols]] = values * (deflator[real_base_year] / index)[:, None]
+
+    return df
+
+
+def convert_to_usd(input_file=INPUT_FILE, output_file=OUTPUT_FILE, excel_file=EXCEL_FILE,
+                   currencies=('USD',), real_base_year=None):
+    # Training artık bu dönüşümü kendi çıktı adımında yapıyor; bu fonksiyon eski veri setlerini çevirmek için kalır
     try:
-        df = pd.read_excel(INPUT_FILE, sheet_name='Iller_Verisi')
+        df = load_dataset(input_file)
     except Exception as e:
         print(f"Error: {e}")
         return
 
-    def get_usd_gdp(row):
-        year = row['Yıl']
-        gdp_tl = row['GSYIH']
-
-        if year in USD_RATES and USD_RATES[year] > 0:
-            return gdp_tl / USD_RATES[year]
-        return None
-
-    df['GSYIH_USD'] = df.apply(get_usd_gdp, axis=1)
+    convert_currency(df, currencies, real_base_year)
 
-    with pd.ExcelWriter(OUTPUT_FILE, engine='openpyxl') as writer:
-        df.to_excel(writer, sheet_name='Iller_Verisi', index=False)
+    save_dataset(df, output_file)
+    if excel_file:
+        export_excel({DATASET_SHEET: df}, excel_file)
 
 if __name__ == "__main__":
-    convert_to_usd()
\ No newline at end of file
+    convert_to_usd()
@@ -0,0 +1,190 @@
+import os
+import json
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+# Ara veri seti artık xlsx yerine Parquet (kolon bazlı, tipli) olarak saklanır.
+# openpyxl ile bütün çalışma kitabını parse etmek her scriptin ve dashboard'un açılışını yavaşlatıyordu
+DATASET_SHEET = 'Iller_Verisi'
+TOTAL_SHEET = 'Turkiye_Toplam'
+DATASET_SUFFIX = '.parquet'
+
+# İl bazlı veri setleri il sırasına göre yazılır ve her il kendi row group'unda tutulur. İl -> row group
+# eşlemesi dosyanın şema metadatasına gömülür; load_province tek bir ilin satırlarını dosyanın geri kalanını
+# okumadan (memory-map üzerinden) getirir
+PROVINCE_COL = 'İl'
+INDEX_KEY = b'il_index'
+
+# Dosya altbilgisi (footer) ve il indeksi yol + değişiklik zamanına göre önbelleklenir. Dosya tanıtıcısı açık
+# tutulmaz: Windows'ta açık bir memory-map, Training'in dosyanın üzerine yazmasını engeller
+_footers = {}
+
+
+def dataset_path(path, sheet_name=DATASET_SHEET):
+    """Verilen dosya adının Parquet karşılığını döner.
+
+    'Prophet_Training_Set_Sektorlu.xlsx' -> 'Prophet_Training_Set_Sektorlu.parquet'.
+    İller dışındaki sayfalar ayrı dosyaya yazılır: '..._Turkiye_Toplam.parquet'
+    """
+    base, _ = os.path.splitext(path)
+    if sheet_name != DATASET_SHEET:
+        base = f"{base}_{sheet_name}"
+    return base + DATASET_SUFFIX
+
+
+def _typed(df):
+    # ds her zaman datetime64 olarak saklanır, metin sütunları string tipine çevrilir
+    df = df.copy()
+    if 'ds' in df.columns:
+        df['ds'] = pd.to_datetime(df['ds'])
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].astype('string')
+    return df
+
+
+def save_dataset(df, path, sheet_name=DATASET_SHEET):
+    """Tabloyu Parquet olarak yazar ve yazılan dosyanın yolunu döner.
+
+    Tabloda İl sütunu varsa satırlar il ve tarihe göre sıralanır, her il ayrı bir row group olarak yazılır.
+    """
+    out_path = dataset_path(path, sheet_name)
+    df = _typed(df)
+    if PROVINCE_COL not in df.columns:
+        df.to_parquet(out_path, index=False)
+        return out_path
+
+    sort_cols = [PROVINCE_COL] + (['ds'] if 'ds' in df.columns else [])
+    df = df.sort_values(sort_cols).reset_index(drop=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    groups = df.groupby(PROVINCE_COL, sort=False).indices
+    index = {str(province): i for i, province in enumerate(groups)}
+    metadata = dict(table.schema.metadata or {})
+    metadata[INDEX_KEY] = json.dumps(index, ensure_ascii=False).encode('utf-8')
+    table = table.replace_schema_metadata(metadata)
+
+    with pq.ParquetWriter(out_path, table.schema) as writer:
+        for rows in groups.values():
+            writer.write_table(table.slice(rows[0], len(rows)))
+    return out_path
+
+
+def export_excel(sheets, path):
+    """İsteğe bağlı Excel çıktısı. sheets: {sayfa_adı: DataFrame}"""
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        for sheet_name, df in sheets.items():
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+
+def load_dataset(path, sheet_name=DATASET_SHEET, columns=None):
+    """Ara veri setini okur.
+
+    Parquet dosyası varsa o okunur. Henüz Parquet üretilmemişse eski xlsx dosyasına geri düşülür,
+    böylece eski çıktılarla çalışan kurulumlar bozulmaz.
+    """
+    parquet_path = dataset_path(path, sheet_name)
+    if os.path.exists(parquet_path):
+        return pd.read_parquet(parquet_path, columns=columns)
+
+    excel_path = os.path.splitext(path)[0] + '.xlsx'
+    if os.path.exists(excel_path):
+        print(f"UYARI: '{parquet_path}' bulunamadı, '{excel_path}' okunuyor.")
+        df = pd.read_excel(excel_path, sheet_name=sheet_name, usecols=columns)
+        return _typed(df)
+
+    raise FileNotFoundError(f"'{parquet_path}' bulunamadı")
+
+
+def _footer(parquet_path):
+    """(Parquet altbilgisi, il indeksi). Dosya il indeksi olmadan yazılmışsa indeks None olur."""
+    stat = os.stat(parquet_path)
+    key = (os.path.abspath(parquet_path), stat.st_mtime_ns, stat.st_size)
+    if key not in _footers:
+        metadata = pq.read_metadata(parquet_path, memory_map=True)
+        raw = (metadata.schema.to_arrow_schema().metadata or {}).get(INDEX_KEY)
+        if not raw:
+            print(f"UYARI: '{parquet_path}' il indeksi olmadan yazılmış, dosyanın tamamı okunuyor. "
+                  f"Training.py yeniden çalıştırılırsa indeks oluşur.")
+        _footers[key] = (metadata, json.loads(raw) if raw else None)
+    return _footers[key]
+
+
+def _province_groups(path, sheet_name):
+    """(parquet_yolu, altbilgi, il indeksi); indeks kullanılamıyorsa None."""
+    parquet_path = dataset_path(path, sheet_name)
+    if not os.path.exists(parquet_path):
+        return None
+    metadata, index = _footer(parquet_path)
+    if index is None:
+        return None
+    return parquet_path, metadata, index
+
+
+def _read_groups(parquet_path, metadata, groups, columns=None):
+    with pq.ParquetFile(parquet_path, memory_map=True, metadata=metadata) as pf:
+        if columns is not None:
+            columns = list(dict.fromkeys([PROVINCE_COL] + list(columns)))
+        return pf.read_row_groups(groups, columns=columns, use_pandas_metadata=True).to_pandas()
+
+
+def _load_with_province(path, sheet_name, columns):
+    # İndekssiz (xlsx) yol: il sütunu süzme/gruplama için her zaman okunur, istenmediyse sonra atılır
+    if columns is None:
+        return load_dataset(path, sheet_name), False
+    columns = list(columns)
+    read = list(dict.fromkeys([PROVINCE_COL] + columns))
+    return load_dataset(path, sheet_name, columns=read), PROVINCE_COL not in columns
+
+
+def list_provinces(path, sheet_name=DATASET_SHEET):
+    """Veri setindeki iller (alfabetik). İndeks varsa sadece dosya altbilgisi okunur."""
+    indexed = _province_groups(path, sheet_name)
+    if indexed is None:
+        return sorted(load_dataset(path, sheet_name, columns=[PROVINCE_COL])[PROVINCE_COL].unique())
+    return sorted(indexed[2])
+
+
+def load_province(path, province, sheet_name=DATASET_SHEET, columns=None):
+    """Tek bir ilin satırlarını tarihe göre sıralı döner; diğer illerin satırları okunmaz.
+
+    İl veri setinde yoksa boş tablo döner.
+    """
+    indexed = _province_groups(path, sheet_name)
+    if indexed is None:
+        df, drop = _load_with_province(path, sheet_name, columns)
+        df = df[df[PROVINCE_COL] == province]
+        if drop:
+            df = df.drop(columns=PROVINCE_COL)
+    else:
+        parquet_path, metadata, index = indexed
+        groups = [index[province]] if province in index else []
+        df = _read_groups(parquet_path, metadata, groups, columns)
+    return df.sort_values('ds').reset_index(drop=True) if 'ds' in df.columns else df.reset_index(drop=True)
+
+
+def iter_provinces(path, sheet_name=DATASET_SHEET, columns=None):
+    """(il, il_tablosu) çiftlerini alfabetik sırayla üretir; her adımda sadece o ilin row group'u okunur."""
+    indexed = _province_groups(path, sheet_name)
+    if indexed is None:
+        df, drop = _load_with_province(path, sheet_name, columns)
+        for province, df_city in df.groupby(PROVINCE_COL, sort=True):
+            if drop:
+                df_city = df_city.drop(columns=PROVINCE_COL)
+            yield province, df_city.sort_values('ds').reset_index(drop=True)
+        return
+
+    parquet_path, metadata, index = indexed
+    for province in sorted(index):
+        df_city = _read_groups(parquet_path, metadata, [index[province]], columns)
+        yield province, df_city.sort_values('ds').reset_index(drop=True)
+
+
+def dataset_columns(path, sheet_name=DATASET_SHEET):
+    """Veri setinin sütun adları (Parquet'te veri okunmadan, şemadan)."""
+    parquet_path = dataset_path(path, sheet_name)
+    if os.path.exists(parquet_path):
+        return _footer(parquet_path)[0].schema.to_arrow_schema().names
+    return list(load_dataset(path, sheet_name).columns)
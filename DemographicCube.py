@@ -0,0 +1,157 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+
+from PopulationSource import read_population, COUNT_COLS
+from BatchTrend import forecast_trend, make_future_dates, INTERVAL_WIDTH
+from ForecastCache import MAX_HORIZON_YEARS
+from ForecastStore import file_hash
+import Trace
+
+
+# Nüfus dosyasındaki bütün demografik sütunların (toplam, cinsiyet, şehir/köy, yaş grupları) bütün iller için
+# toplu tahmini. ~730 seri (81 il x 9 sütun) tek bir BatchTrend en küçük kareler çözümüyle eğitilir ve
+# (il x seri x yıl x bant) float32 dizisi olarak tek bir .npz dosyasına yazılır. Dashboard istediği dilimi
+# dosyadan okur, model eğitmez
+INPUT_FILE = 'TUIK_Nufus_Verileri_20251121_130158.csv'
+OUTPUT_FILE = 'Demografi_Kupu.npz'
+SERIES = list(COUNT_COLS)
+# 'actual' geçmiş yıllarda gözlenen değerdir, tahmin yıllarında NaN
+BANDS = ['actual', 'yhat', 'yhat_lower', 'yhat_upper']
+
+
+def _positions(labels, wanted, axis):
+    if wanted is None:
+        return slice(None)
+    single = isinstance(wanted, (str, int, np.integer))
+    wanted = [wanted] if single else list(wanted)
+    pos = pd.Index(labels).get_indexer(wanted)
+    if (pos < 0).any():
+        raise KeyError(f"Küpte olmayan {axis}: {[w for w, p in zip(wanted, pos) if p < 0]}")
+    return int(pos[0]) if single else pos
+
+
+class DemographicCube:
+    """Demografik tahmin küpü: values dizisi (il x seri x yıl x bant), bantlar BANDS sırasıyla.
+
+    Eksenler provinces (il adları), series (sütunlar) ve years (yıllar) ile etiketlenir; last_observed son
+    gözlem yılıdır. Sorgular dizinin kendisinden dilim alır, tahmin yapılmaz.
+    """
+
+    def __init__(self, provinces, codes, series, years, values, last_observed, source_hash=''):
+        self.provinces = list(provinces)
+        self.codes = np.asarray(codes)
+        self.series = list(series)
+        self.years = np.asarray(years)
+        self.values = values
+        self.last_observed = int(last_observed)
+        self.source_hash = str(source_hash)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def slice(self, provinces=None, series=None, years=None, band='yhat'):
+        """İstenen dilim. Tek bir etiket verilen eksen düşer: slice('Adana', 'Erkek') -> (yıl,) dizisi."""
+        p = _positions(self.provinces, provinces, 'il')
+        s = _positions(self.series, series, 'seri')
+        y = _positions(self.years, years, 'yıl')
+        b = BANDS.index(band)
+        out = self.values[:, :, :, b]
+        # Eksenler sırayla indekslenir; dizi indeksleri (fancy indexing) bir arada kullanılınca eksenler karışmaz
+        out = out[p][:, s] if not isinstance(p, int) else out[p][s]
+        return out[..., y]
+
+    def query(self, province, series):
+        """Bir ilin tek serisi için tahmin tablosu (ds, actual, yhat, yhat_lower, yhat_upper)."""
+        p = _positions(self.provinces, province, 'il')
+        s = _positions(self.series, series, 'seri')
+        out = pd.DataFrame(self.values[p, s].astype(float), columns=BANDS)
+        out.insert(0, 'ds', pd.to_datetime({'year': self.years, 'month': 12, 'day': 31}))
+        return out
+
+    def to_frame(self, year, band='yhat'):
+        """Bir yıl için il x seri tablosu."""
+        return pd.DataFrame(self.slice(years=year, band=band), index=pd.Index(self.provinces, name='İl'),
+                            columns=self.series)
+
+    def save(self, path):
+        np.savez_compressed(path, provinces=np.asarray(self.provinces), codes=self.codes,
+                            series=np.asarray(self.series), years=self.years, values=self.values,
+                            last_observed=self.last_observed, source_hash=self.source_hash)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data['provinces'].tolist(), data['codes'], data['series'].tolist(), data['years'],
+                       data['values'], data['last_observed'], data['source_hash'])
+
+
+def build_cube(df_pop, years=MAX_HORIZON_YEARS, series=SERIES, interval_width=INTERVAL_WIDTH):
+    """Nüfus tablosundaki (İl, Yıl, seriler) bütün il x seri çiftlerini tek seferde tahmin eder."""
+    series = [col for col in series if col in df_pop.columns]
+    names = df_pop['İl'].astype(str)
+    provinces = sorted(names.unique())
+    first, last = int(df_pop['Yıl'].min()), int(df_pop['Yıl'].max())
+
+    # Satırlar (il, yıl) konumlarına tek seferde yerleştirilir; eksik yıllar NaN kalır ve eğitimde yok sayılır
+    actual = np.full((len(provinces), len(series), last - first + 1), np.nan)
+    p = pd.Index(provinces).get_indexer(names)
+    t = df_pop['Yıl'].to_numpy(dtype=int) - first
+    actual[p, :, t] = df_pop[series].to_numpy(dtype=float)
+
+    codes = np.zeros(len(provinces), dtype=np.int16)
+    if 'İl_Kodu' in df_pop.columns:
+        codes[p] = df_pop['İl_Kodu'].to_numpy()
+
+    history_ds = pd.Series(pd.to_datetime({'year': np.arange(first, last + 1), 'month': 12, 'day': 31}))
+    future_ds = make_future_dates(history_ds, years)
+    Y = actual.reshape(-1, actual.shape[2]).T
+    with Trace.span('fit_panel', target='demografi', backend='numpy', series=Y.shape[1]):
+        bands = forecast_trend(history_ds, Y, future_ds, interval_width=interval_width)
+
+    n_years = len(future_ds)
+    values = np.full((len(provinces), len(series), n_years, len(BANDS)), np.nan, dtype=np.float32)
+    values[:, :, :actual.shape[2], 0] = actual
+    for b, band in enumerate(bands, start=1):
+        # Kişi sayıları negatif olamaz
+        values[..., b] = np.clip(band.T.reshape(len(provinces), len(series), n_years), 0, None)
+
+    # İki yıldan az gözlemi olan seriler tahmin edilmez
+    too_short = (~np.isnan(actual)).sum(axis=2) < 2
+    values[too_short, :, 1:] = np.nan
+    return DemographicCube(provinces, codes, series, future_ds.dt.year.to_numpy(), values, last)
+
+
+def build_cube_file(input_path=INPUT_FILE, output_path=OUTPUT_FILE, years=MAX_HORIZON_YEARS, force=False):
+    """Kaynak dosya değişmediyse ve ufuk yetiyorsa mevcut küpü kullanır, yoksa yeniden hesaplayıp yazar."""
+    source_hash = file_hash(input_path)
+    if not force and os.path.exists(output_path):
+        cube = DemographicCube.load(output_path)
+        if cube.source_hash == source_hash and cube.years.max() >= cube.last_observed + years:
+            print(f"{output_path} güncel, yeniden hesaplanmadı.")
+            return cube
+
+    with Trace.span('load', file=input_path):
+        df_pop = read_population(input_path)
+    cube = build_cube(df_pop, years)
+    cube.source_hash = source_hash
+    cube.save(output_path)
+    print(f"{len(cube.provinces)} il x {len(cube.series)} seri = {len(cube.provinces) * len(cube.series)} seri "
+          f"tahmin edildi, {output_path} olarak kaydedildi ({os.path.getsize(output_path) / 2 ** 10:.0f} KB)")
+    return cube
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bütün demografik sütunların il bazlı toplu tahmini")
+    parser.add_argument('--input', default=INPUT_FILE)
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    parser.add_argument('--years', type=int, default=MAX_HORIZON_YEARS)
+    parser.add_argument('--force', action='store_true', help="Kaynak değişmemiş olsa da yeniden hesaplar")
+    args = parser.parse_args()
+
+    Trace.start_run('DemographicCube')
+    cube = build_cube_file(args.input, args.output, args.years, args.force)
+    print(cube.to_frame(cube.last_observed + 5).head())
+    print(Trace.summary())
@@ -0,0 +1,210 @@
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from ProvinceKeys import ProvinceKeys, CODE_SUFFIX, UNMATCHED, name_key
+from ForecastStore import file_hash
+import Trace
+
+
+# Dışsal değişken (regresör) deposu. TÜİK'in eski .xls çıktıları (göç, GSYİH, il nüfusları) veri yenilendiğinde
+# bir kez okunur; il (İl_Kodu) ve yıl anahtarlı, tipli tek bir tablo olarak Parquet'e yazılır. Tabloyu kullanacak
+# yerler load_features ile dosyadan okur, çalışma kitaplarını her seferinde yeniden ayrıştırmaz
+MIGRATION_FILE = 'Gocbilgileri.xls'
+GDP_FILE = 'GayriSafi.xls'
+PIVOT_FILE = 'pivot.xls'
+# Aynı ölçüm birden fazla kaynakta varsa (göç sütunları hem Gocbilgileri hem pivot'ta) listede önce gelen kullanılır
+SOURCES = [MIGRATION_FILE, GDP_FILE, PIVOT_FILE]
+OUTPUT_FILE = 'Ozellik_Deposu.parquet'
+# Kaynak dosyaların özetleri Parquet şema metadatasında tutulur; değişmediyse tablo yeniden hesaplanmaz
+SOURCES_KEY = b'kaynaklar'
+
+# TÜİK ölçüm başlığında geçen ifade -> sütun adı. Karşılaştırma name_key ile yapılır (büyük/küçük harf, aksan ve
+# boşluk farkları önemsizdir). Tanınmayan ölçümler atlanır
+MEASURES = {
+    'Bölgelerin Aldığı Göç': 'Göç_Alınan',
+    'Bölgelerin Verdiği Göç': 'Göç_Verilen',
+    'Bölgelerin Net Göç Bilgileri': 'Göç_Net',
+    'Bölgelerin Net Göç Hızı': 'Göç_Net_Hızı_Binde',
+    'İl Ve İlçe Nüfusları': 'Nüfus_ADNKS',
+    'Gayri Safi Yurtiçi Hasıla': 'GSYIH_Bin_TL',
+}
+# Kişi sayıları ve oranlar float32 (eksik yıllar NaN), büyük tutarlar float64
+FEATURE_SCHEMA = {
+    'Göç_Alınan': 'float32',
+    'Göç_Verilen': 'float32',
+    'Göç_Net': 'float32',
+    'Göç_Net_Hızı_Binde': 'float32',
+    'Nüfus_ADNKS': 'float64',
+    'GSYIH_Bin_TL': 'float64',
+}
+FEATURES = list(FEATURE_SCHEMA)
+KEY_COLS = ['İl_Kodu', 'Yıl']
+
+
+def _measure_column(text):
+    key = name_key(text)
+    for phrase, col in MEASURES.items():
+        if name_key(phrase) in key:
+            return col
+    return None
+
+
+def _read_sheet(path):
+    """Çalışma kitabının ilk sayfası: (metin hücreleri, sayısal hücreler) dizileri. Sayı olmayan hücreler NaN."""
+    import xlrd
+
+    with xlrd.open_workbook(path, on_demand=True) as book:
+        sheet = book.sheet_by_index(0)
+        raw = np.array([sheet.row_values(r) + [''] * (sheet.ncols - sheet.row_len(r))
+                        for r in range(sheet.nrows)], dtype=object)
+    flat = pd.Series(raw.ravel(), dtype=object)
+    text = flat.astype(str).str.strip()
+    # Yıllar bazı dosyalarda metin ('2008'), bazılarında sayı (2008.0) olarak gelir
+    text = text.str.replace(r'^(\d{4})\.0$', r'\1', regex=True).to_numpy(dtype=object).reshape(raw.shape)
+    numeric = pd.to_numeric(flat, errors='coerce').to_numpy(dtype=float).reshape(raw.shape)
+    return text, numeric
+
+
+def _is_province(cells):
+    cells = np.asarray(cells, dtype=object)
+    return np.array([bool(CODE_SUFFIX.match(c)) for c in cells.ravel()], dtype=bool).reshape(cells.shape)
+
+
+def _is_year(cells):
+    cells = np.asarray(cells, dtype=object)
+    return np.array([len(c) == 4 and c.isdigit() for c in cells.ravel()], dtype=bool).reshape(cells.shape)
+
+
+def _ffill(cells):
+    # Birleştirilmiş başlık hücreleri (yıl veya ölçüm grubu) sadece ilk sütunda/satırda yazılıdır
+    return pd.Series(cells, dtype=object).replace('', np.nan).ffill().fillna('').to_numpy(dtype=object)
+
+
+def parse_xls(path):
+    """TÜİK pivot tablosunu (İl_Ham, Yıl, Ölçüm, Değer) uzun tablosuna çevirir.
+
+    İki yerleşim tanınır, satır/sütun numaraları sabit yazılmaz:
+    - iller satırlarda ('Adana-1'), sütun başlığında yıl satırı ve altında ölçüm satırı (Gocbilgileri, pivot)
+    - iller sütun başlığında, satırlarda ölçüm ve yıl sütunu (GayriSafi)
+    """
+    text, numeric = _read_sheet(path)
+    province_rows = _is_province(text[:, 0])
+
+    if province_rows.any():
+        year_rows = np.flatnonzero(_is_year(text[:, 1:]).any(axis=1))
+        if len(year_rows) == 0:
+            raise ValueError(f"'{path}' içinde yıl başlığı bulunamadı")
+        years = _ffill(text[year_rows[0]])
+        measures = _ffill(text[year_rows[0] + 1])
+        rows = np.flatnonzero(province_rows)
+        cols = np.flatnonzero(_is_year(years))
+        names = np.repeat(text[rows, 0], len(cols))
+        year = np.tile(years[cols], len(rows))
+        measure = np.tile(measures[cols], len(rows))
+        values = numeric[np.ix_(rows, cols)].ravel()
+    else:
+        header = np.flatnonzero(_is_province(text).sum(axis=1) > 1)
+        if len(header) == 0:
+            raise ValueError(f"'{path}' içinde il başlığı bulunamadı")
+        cols = np.flatnonzero(_is_province(text[header[0]]))
+        year_col = int(np.argmax(_is_year(text[header[0] + 1:]).sum(axis=0)))
+        rows = header[0] + 1 + np.flatnonzero(_is_year(text[header[0] + 1:, year_col]))
+        measures = _ffill(text[:, 0])
+        names = np.tile(text[header[0], cols], len(rows))
+        year = np.repeat(text[rows, year_col], len(cols))
+        measure = np.repeat(measures[rows], len(cols))
+        values = numeric[np.ix_(rows, cols)].ravel()
+
+    return pd.DataFrame({'İl_Ham': names, 'Yıl': year.astype(int), 'Ölçüm': measure, 'Değer': values})
+
+
+def build_features(sources=SOURCES):
+    """Kaynak dosyaları okuyup il x yıl özellik tablosunu (İl_Kodu, Yıl, İl, FEATURES) döner."""
+    keys = ProvinceKeys()
+    parts = []
+    for path in sources:
+        with Trace.span('parse_xls', file=path):
+            long = parse_xls(path)
+        long['Sütun'] = long['Ölçüm'].map({m: _measure_column(m) for m in long['Ölçüm'].unique()})
+        skipped = long.loc[long['Sütun'].isna(), 'Ölçüm'].unique()
+        if len(skipped):
+            print(f"UYARI: {path}: tanınmayan ölçümler atlandı: {list(skipped)}")
+        long = long.dropna(subset=['Sütun'])
+
+        # Ad çözümlemesi farklı ad başına bir kez yapılır
+        long['İl_Kodu'], unmatched = keys.resolve(long['İl_Ham'])
+        if len(unmatched):
+            print(f"UYARI: {path}: {len(unmatched)} il adı eşleşmedi, satırları atlandı:")
+            print(unmatched.to_string(index=False))
+        long = long[long['İl_Kodu'] != UNMATCHED]
+        parts.append(long.pivot_table(index=KEY_COLS, columns='Sütun', values='Değer', aggfunc='first'))
+
+    # Önceki kaynak öncelikli: her tablo sadece öncekilerde boş kalan hücreleri doldurur
+    table = parts[0]
+    for part in parts[1:]:
+        table = table.combine_first(part)
+    table = table.reindex(columns=FEATURES).reset_index()
+
+    table['İl_Kodu'] = table['İl_Kodu'].astype('int16')
+    table['Yıl'] = table['Yıl'].astype('int16')
+    table.insert(2, 'İl', pd.Categorical(table['İl_Kodu'].map(keys.names)))
+    table = table.astype(FEATURE_SCHEMA)
+    table.columns.name = None
+    return table.sort_values(KEY_COLS).reset_index(drop=True)
+
+
+def _source_hashes(sources):
+    return {os.path.basename(path): file_hash(path) for path in sources}
+
+
+def save_features(table, path, hashes):
+    arrow = pa.Table.from_pandas(table, preserve_index=False)
+    metadata = {**(arrow.schema.metadata or {}), SOURCES_KEY: json.dumps(hashes).encode('utf-8')}
+    pq.write_table(arrow.replace_schema_metadata(metadata), path)
+
+
+def stored_hashes(path):
+    """Depo dosyasının üretildiği kaynakların özetleri; dosya yoksa None."""
+    if not os.path.exists(path):
+        return None
+    metadata = pq.read_schema(path).metadata or {}
+    return json.loads(metadata.get(SOURCES_KEY, b'{}'))
+
+
+def build_feature_file(sources=SOURCES, output_path=OUTPUT_FILE, force=False):
+    """Kaynaklar değişmediyse mevcut depoyu okur, değiştiyse yeniden ayrıştırıp yazar. Tabloyu döner."""
+    hashes = _source_hashes(sources)
+    if not force and stored_hashes(output_path) == hashes:
+        print(f"{output_path} güncel, yeniden hesaplanmadı.")
+        return load_features(output_path)
+
+    table = build_features(sources)
+    save_features(table, output_path, hashes)
+    print(f"{table['İl_Kodu'].nunique()} il x {table['Yıl'].nunique()} yıl x {len(FEATURES)} özellik, "
+          f"{output_path} olarak kaydedildi")
+    return table
+
+
+def load_features(path=OUTPUT_FILE, columns=None):
+    """Depodaki tablo; columns verilirse sadece o özellikler (anahtar sütunlar her zaman gelir)."""
+    if columns is not None:
+        columns = KEY_COLS + [c for c in columns if c not in KEY_COLS]
+    return pd.read_parquet(path, columns=columns)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TÜİK .xls kaynaklarından il x yıl dışsal değişken deposu")
+    parser.add_argument('--sources', nargs='*', default=SOURCES)
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    parser.add_argument('--force', action='store_true', help="Kaynaklar değişmemiş olsa da yeniden hesaplar")
+    args = parser.parse_args()
+
+    Trace.start_run('FeatureStore')
+    features = build_feature_file(args.sources, args.output, args.force)
+    print(features.describe().T[['count', 'mean', 'min', 'max']])
+    print(Trace.summary())
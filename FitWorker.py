@@ -0,0 +1,207 @@
+import os
+import sys
+import stat
+import time
+import getpass
+import secrets
+import argparse
+import threading
+import warnings
+import logging
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+
+import Trace
+
+
+# Uzun ömürlü yerel eğitim sunucusu. Prophet/cmdstanpy'yi ve derlenmiş Stan modelini bir kez yükler, ardından
+# scriptlerin ve dashboard'un eğitim/tahmin işlerini kabul eder. Sunucu çalışıyorsa ForecastCache.fit_baseline
+# ve ForecastBackend'in Prophet yolu işi buraya gönderir, çağıran süreç Prophet'i hiç içe aktarmaz.
+# Sunucu çalışmıyorsa eğitim eskisi gibi çağıran süreçte yapılır.
+# Bağlantı pickle taşıdığı için sunucuya sadece aynı kullanıcı ulaşabilmelidir: adres TCP portu değil, kullanıcıya
+# özel (0700) klasördeki bir Unix soketidir (Windows'ta kullanıcı adlı named pipe). Anahtar koda gömülü değildir;
+# sunucu ilk açılışta rastgele bir anahtar üretip aynı klasöre 0600 izinle yazar. Anahtar yoksa (sunucu hiç
+# başlatılmamışsa ve ortam değişkeni de verilmemişse) istemci sunucuya hiç bağlanmaz
+WORKER_DIR = os.path.join(os.path.expanduser('~'), '.bitirme_egitim')
+KEY_FILE = os.path.join(WORKER_DIR, 'anahtar')
+if sys.platform == 'win32':
+    ADDRESS = rf'\\.\pipe\bitirme-egitim-{getpass.getuser()}'
+else:
+    ADDRESS = os.path.join(WORKER_DIR, 'egitim.sock')
+# Anahtar dosyası yerine ortam değişkeniyle de verilebilir (ör. sunucu ve istemci farklı ev klasörleriyle çalışıyorsa)
+AUTHKEY_ENV = 'BITIRME_EGITIM_ANAHTARI'
+KEY_BYTES = 32
+# Anahtar bulunduğunda sunucu kullanılır; False ise hiç denenmez
+USE_WORKER = True
+# Sunucuya bağlanılamazsa bu süre boyunca tekrar denenmez; sunucu yokken her eğitimde bağlantı denenmez
+RETRY_SECONDS = 30
+
+_unreachable_until = 0.0
+
+
+def _private_dir():
+    # Klasör sadece sahibine açık olmalıdır; başkasının oluşturduğu veya herkese açık bir klasör kullanılmaz
+    os.makedirs(WORKER_DIR, mode=0o700, exist_ok=True)
+    if sys.platform != 'win32':
+        info = os.stat(WORKER_DIR)
+        if info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) & 0o077:
+            raise PermissionError(f"'{WORKER_DIR}' bu kullanıcıya özel değil (sahip/izinler), sunucu kullanılmıyor")
+    return WORKER_DIR
+
+
+def _authkey():
+    """Ortam değişkenindeki veya anahtar dosyasındaki anahtar; ikisi de yoksa (ya da dosya güvensizse) None."""
+    key = os.environ.get(AUTHKEY_ENV)
+    if key:
+        return key.encode('utf-8')
+    try:
+        fd = os.open(KEY_FILE, os.O_RDONLY)
+    except OSError:
+        return None
+    with os.fdopen(fd, 'rb') as f:
+        if sys.platform != 'win32':
+            info = os.fstat(f.fileno())
+            if info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) & 0o077:
+                print(f"UYARI: '{KEY_FILE}' başka kullanıcılarca okunabilir, eğitim sunucusu kullanılmıyor")
+                return None
+        return f.read() or None
+
+
+def _create_authkey():
+    # Anahtar bir kez üretilir; dosya 0600 izinle ve O_EXCL ile oluşturulur (var olan dosyanın üzerine yazılmaz)
+    key = _authkey()
+    if key is not None:
+        return key
+    _private_dir()
+    key = secrets.token_hex(KEY_BYTES).encode('ascii')
+    fd = os.open(KEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(key)
+    return key
+
+
+def call(kind, *args, **fields):
+    """İşi sunucuda çalıştırıp sonucunu döner. Sunucuya ulaşılamazsa None döner, işi çağıran kendisi yapar.
+
+    fields sadece iz kaydına (Trace) yazılır. İş sunucuda hata verirse RuntimeError yükseltilir (yerelde de
+    aynı hatayı vereceği için tekrar denenmez).
+    """
+    global _unreachable_until
+    if not USE_WORKER or time.monotonic() < _unreachable_until:
+        return None
+    key = _authkey()
+    if key is None:
+        return None
+    try:
+        conn = Client(ADDRESS, authkey=key)
+    except (OSError, AuthenticationError):
+        _unreachable_until = time.monotonic() + RETRY_SECONDS
+        return None
+
+    with conn, Trace.span('fit_worker', job=kind, **fields):
+        try:
+            conn.send((kind, args))
+            status, result = conn.recv()
+        except (OSError, EOFError):
+            # Sunucu iş sırasında kapandı; iş yerelde yapılır
+            _unreachable_until = time.monotonic() + RETRY_SECONDS
+            return None
+    if status == 'error':
+        raise RuntimeError(f"Eğitim sunucusu: {result}")
+    return result
+
+
+def ping():
+    """Sunucu çalışıyorsa süreç kimliği (pid), çalışmıyorsa None."""
+    global _unreachable_until
+    _unreachable_until = 0.0
+    return call('ping')
+
+
+def _jobs():
+    # Sunucu tarafında yerel fonksiyonlar çağrılır (tekrar sunucuya gönderilmez)
+    from ForecastCache import _fit_baseline
+    from ForecastBackend import _fit_prophet_forecast
+    return {
+        'ping': os.getpid,
+        'fit_baseline': _fit_baseline,
+        'forecast': _fit_prophet_forecast,
+    }
+
+
+def _warm_up():
+    """Prophet'i içe aktarır ve küçük bir seriyle bir kez eğitir (Stan modeli ve cmdstan ilk çağrıda yüklenir)."""
+    import numpy as np
+    import pandas as pd
+    import Uncertainty
+
+    # Gürültüsüz (tam düzgün) seride gürültü ölçeği sıfıra çöker ve optimizasyon saniyelerce sürer;
+    # ısınma serisi bu yüzden sabit tohumlu gürültü içerir
+    noise = np.random.default_rng(0).standard_normal(20)
+    df = pd.DataFrame({'ds': pd.date_range('2000-12-31', periods=20, freq='YE'),
+                       'y': 100 * 1.02 ** np.arange(20) * (1 + 0.02 * noise)})
+    m = Uncertainty.prophet_model()
+    m.fit(df)
+    Uncertainty.predict(m, m.make_future_dataframe(periods=1, freq='YE'))
+
+
+def _handle(conn, jobs):
+    with conn:
+        try:
+            kind, args = conn.recv()
+        except (OSError, EOFError):
+            return
+        try:
+            conn.send(('ok', jobs[kind](*args)))
+        except Exception as e:
+            Trace.fail('fit_worker', e, job=kind)
+            conn.send(('error', f"{type(e).__name__}: {e}"))
+
+
+def serve(address=ADDRESS):
+    """Sunucuyu başlatır; her bağlantı ayrı bir iş parçacığında karşılanır (cmdstan eğitimleri alt süreçte koşar)."""
+    warnings.filterwarnings('ignore')
+    logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+    logging.getLogger('prophet').setLevel(logging.WARNING)
+
+    authkey = _create_authkey()
+    if sys.platform != 'win32':
+        _private_dir()
+        # Önceki çalıştırmadan kalan soket dosyası silinir; sunucu zaten çalışıyorsa ikincisi başlatılmaz
+        if os.path.exists(address):
+            if ping() is not None:
+                raise RuntimeError(f"Eğitim sunucusu zaten çalışıyor ({address})")
+            os.remove(address)
+
+    start = time.perf_counter()
+    jobs = _jobs()
+    with Trace.span('worker_warm_up'):
+        _warm_up()
+    print(f"Eğitim sunucusu hazır: {address} "
+          f"(Prophet yükleme + ilk eğitim {time.perf_counter() - start:.2f} sn)")
+
+    with Listener(address, authkey=authkey) as listener:
+        while True:
+            try:
+                conn = listener.accept()
+            except (OSError, AuthenticationError) as e:
+                # Yanlış anahtarla bağlanan istemci sunucuyu düşürmez
+                print(f"Bağlantı reddedildi: {e}")
+                continue
+            threading.Thread(target=_handle, args=(conn, jobs), daemon=True).start()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prophet eğitim sunucusu")
+    parser.add_argument('--ping', action='store_true', help="Sunucunun çalışıp çalışmadığını kontrol eder")
+    args = parser.parse_args()
+
+    if args.ping:
+        pid = ping()
+        print(f"Eğitim sunucusu çalışıyor (pid {pid})" if pid else "Eğitim sunucusu çalışmıyor")
+    else:
+        Trace.start_run('FitWorker')
+        try:
+            serve()
+        except KeyboardInterrupt:
+            print("Eğitim sunucusu kapatıldı")
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+from BatchTrend import BatchTrendModel, forecast_trend, make_future_dates
+from WarmStart import fit_prophet
+import FitWorker
+import Uncertainty
+import Trace
+
+
+# Tahmin motoru seçimi. Bütün giriş noktaları (app, TestAll, PerformanceTest) tahmini buradan alır ve
+# aynı biçimde tablo (ds, yhat, yhat_lower, yhat_upper) döner.
+# prophet: varsayılan, Stan ile eğitilen Prophet modeli
+# numpy:   BatchTrend'in parçalı doğrusal trendi. Yıllık veride mevsimsellik bilgi taşımadığı için sonuçlar
+#          Prophet'in trendine yakındır; eğitim kapalı formda olduğu için milisaniyenin altında sürer
+BACKENDS = ['prophet', 'numpy']
+DEFAULT_BACKEND = 'prophet'
+FORECAST_COLS = ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
+# Güven aralığı modu (Uncertainty.MODES). Sadece yhat kullanan çağrılar 'off' ister, aralık hesaplanmaz
+DEFAULT_UNCERTAINTY = Uncertainty.DEFAULT_MODE
+
+
+def _prophet_forecast(df_p, future_ds, province=None, target=None, uncertainty=DEFAULT_UNCERTAINTY,
+                      warm_start=True):
+    # Eğitim sunucusu çalışıyorsa iş oraya gönderilir
+    forecast = FitWorker.call('forecast', df_p, future_ds, province, target, uncertainty, warm_start,
+                              province=province, target=target)
+    if forecast is not None:
+        return forecast
+    return _fit_prophet_forecast(df_p, future_ds, province, target, uncertainty, warm_start)
+
+
+def _fit_prophet_forecast(df_p, future_ds, province=None, target=None, uncertainty=DEFAULT_UNCERTAINTY,
+                          warm_start=True):
+    # Prophet ilk eğitimde içe aktarılır; NumPy motoruyla çalışan süreçler onu hiç yüklemez
+    m = Uncertainty.prophet_model(uncertainty)
+    with Trace.span('fit', province=province, target=target, backend='prophet'):
+        if province is None or not warm_start:
+            m.fit(df_p)
+        else:
+            fit_prophet(m, df_p, province, target)
+    with Trace.span('predict', province=province, target=target, backend='prophet'):
+        return Uncertainty.predict(m, pd.DataFrame({'ds': pd.to_datetime(future_ds)}), uncertainty)[FORECAST_COLS]
+
+
+def _numpy_forecast(df_p, future_ds, province=None, target=None, uncertainty=DEFAULT_UNCERTAINTY):
+    with Trace.span('fit', province=province, target=target, backend='numpy'):
+        model = BatchTrendModel().fit(df_p['ds'], df_p['y'].to_numpy(dtype=float))
+    with Trace.span('predict', province=province, target=target, backend='numpy'):
+        if uncertainty == 'off':
+            yhat = model.predict(future_ds)
+            lower = upper = np.full_like(yhat, np.nan)
+        else:
+            # Kapalı form aralık örnekleme yapmaz; diğer modların hepsi aynı hesabı kullanır
+            yhat, lower, upper = model.predict_interval(future_ds)
+    return pd.DataFrame({'ds': pd.to_datetime(pd.Series(future_ds)).to_numpy(),
+                         'yhat': yhat[:, 0], 'yhat_lower': lower[:, 0], 'yhat_upper': upper[:, 0]})
+
+
+def forecast_series(df_p, future_ds, backend=DEFAULT_BACKEND, province=None, target=None,
+                    uncertainty=DEFAULT_UNCERTAINTY, warm_start=True):
+    """Tek bir seriyi (ds, y) eğitip future_ds tarihleri için tahmin tablosu döner.
+
+    province/target sadece Prophet'in sıcak başlangıç kaydı için kullanılır. uncertainty güven aralığı modudur
+    (Uncertainty.MODES); 'off' ile yhat_lower/yhat_upper NaN olur. warm_start=False ise sıcak başlangıç kaydı
+    hiç kullanılmaz: kısaltılmış geçmişle yapılan CV eğitimleri, bütün geçmişle (tahmin edilen yıllar dahil)
+    bulunmuş parametrelerden başlamaz ve kaydın üzerine yazmaz.
+    """
+    Uncertainty.check_mode(uncertainty)
+    if backend == 'prophet':
+        return _prophet_forecast(df_p, future_ds, province, target, uncertainty, warm_start)
+    if backend == 'numpy':
+        return _numpy_forecast(df_p, future_ds, province, target, uncertainty)
+    raise ValueError(f"Bilinmeyen tahmin motoru: {backend} (seçenekler: {BACKENDS})")
+
+
+def forecast_horizon(df_p, years, backend=DEFAULT_BACKEND, province=None, target=None,
+                     uncertainty=DEFAULT_UNCERTAINTY):
+    """Geçmiş + 'years' yıllık tahmin (Prophet'in make_future_dataframe(periods=years, freq='YE') ile aynı tarihler)."""
+    return forecast_series(df_p, make_future_dates(df_p['ds'], years), backend, province, target, uncertainty)
+
+
+def forecast_panel(df, target_col, years):
+    """Bütün illeri NumPy motoruyla tek seferde tahmin eder; {il: tahmin_tablosu} döner.
+
+    İller ortak yıl eksenine yerleştirilir (eksik yıllar NaN, o il için yok sayılır), tek bir toplu
+    en küçük kareler çözümü bütün illeri birlikte eğitir.
+    """
+    wide = df.pivot_table(index='ds', columns='İl', values=target_col, aggfunc='first').sort_index()
+    future_ds = make_future_dates(wide.index, years)
+    with Trace.span('fit_panel', target=target_col, backend='numpy', series=wide.shape[1]):
+        yhat, lower, upper = forecast_trend(wide.index, wide.to_numpy(dtype=float), future_ds)
+
+    out = {}
+    for j, city in enumerate(wide.columns):
+        observed = wide.index[wide.iloc[:, j].notna()]
+        if len(observed) < 2:
+            continue
+        # Her ilin tablosu kendi ilk gözleminden başlar, tek tek tahmin edilmiş gibi görünür
+        keep = (future_ds >= observed.min()).to_numpy()
+        out[city] = pd.DataFrame({'ds': future_ds[keep].to_numpy(), 'yhat': yhat[keep, j],
+                                  'yhat_lower': lower[keep, j], 'yhat_upper': upper[keep, j]})
+    return out
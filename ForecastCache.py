@@ -0,0 +1,148 @@
+import os
+import pickle
+import hashlib
+import re
+import pandas as pd
+
+from WarmStart import fit_prophet
+import Uncertainty
+import FitWorker
+import Trace
+
+
+# Eğitilmiş modeller ve tahminler diskte tutulur, uygulama yeniden başlasa da kaybolmaz.
+# Anahtar: il + hedef sütun + girdi serisinin özeti (hash). Veri değişirse anahtar da değişir
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.forecast_cache')
+MAX_CACHE_MB = 256
+
+# Tahminler her zaman en uzun ufuk için bir kez hesaplanır, kısa ufuklar bundan kesilir
+MAX_HORIZON_YEARS = 30
+# Temel tahminin güven aralığı modu (Uncertainty.MODES). Dashboard bantları ve senaryolar bu aralığı kullanır;
+# ortak çekimler ufuk ve kriz senaryosu değişse de yeniden üretilmez
+BASELINE_UNCERTAINTY = 'shared'
+
+
+def series_hash(df, cols=('ds', 'y')):
+    """Girdi serisinin içerik özeti. Aynı veri her zaman aynı özeti verir."""
+    h = hashlib.sha1()
+    for col in cols:
+        if col not in df.columns:
+            continue
+        values = df[col]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            values = values.astype('datetime64[ns]').astype('int64')
+        h.update(col.encode('utf-8'))
+        h.update(pd.to_numeric(values, errors='coerce').to_numpy(dtype='float64').tobytes())
+    return h.hexdigest()
+
+
+def cache_key(province, target, df_series, cols=('ds', 'y')):
+    # Dosya adında sorun çıkarabilecek karakterler temizlenir, Türkçe harfler kalabilir
+    safe_province = re.sub(r'[^\w-]+', '_', str(province))
+    return f"{safe_province}__{target}__{series_hash(df_series, cols)[:16]}"
+
+
+class ForecastCache:
+    """Boyutu sınırlı, disk üzerinde kalıcı model/tahmin önbelleği.
+
+    Her kayıt ayrı bir pickle dosyasıdır. Dosyanın değiştirilme zamanı son kullanım zamanı olarak
+    tutulur; toplam boyut sınırı aşılınca en uzun süredir kullanılmayan kayıtlar silinir (LRU).
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_mb=MAX_CACHE_MB):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.pkl')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        # Son kullanım zamanı güncellenir
+        os.utime(path)
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        # Yarım yazılmış dosya okunmasın diye önce geçici dosyaya yazılıp yer değiştirilir
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.pkl'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+def slice_horizon(forecast, n_history, years):
+    """En uzun ufuk için hesaplanmış tahminden geçmiş + 'years' yıllık kısmı keser."""
+    return forecast.iloc[:n_history + years].copy()
+
+
+def fit_baseline(df_p, horizon=MAX_HORIZON_YEARS, province=None, target=None, uncertainty=BASELINE_UNCERTAINTY):
+    """Prophet modelini eğitir; modeli (JSON) ve 'horizon' yıllık tahmini döner.
+
+    province/target verilirse eğitim o il/hedefin kayıtlı parametrelerinden (sıcak başlangıç) başlar.
+    uncertainty güven aralığının nasıl hesaplanacağını seçer (Uncertainty.MODES).
+    Eğitim sunucusu (FitWorker) çalışıyorsa eğitim orada yapılır.
+    """
+    result = FitWorker.call('fit_baseline', df_p, horizon, province, target, uncertainty,
+                            province=province, target=target)
+    if result is not None:
+        return result
+    return _fit_baseline(df_p, horizon, province, target, uncertainty)
+
+
+def _fit_baseline(df_p, horizon=MAX_HORIZON_YEARS, province=None, target=None, uncertainty=BASELINE_UNCERTAINTY):
+    # Prophet ilk eğitimde içe aktarılır; tahmini depodan/önbellekten gelen çalıştırmalar onu hiç yüklemez
+    from prophet.serialize import model_to_json
+
+    m = Uncertainty.prophet_model(uncertainty)
+    with Trace.span('fit', province=province, target=target, backend='prophet'):
+        if province is None:
+            m.fit(df_p)
+        else:
+            fit_prophet(m, df_p, province, target)
+
+    with Trace.span('predict', province=province, target=target, backend='prophet'):
+        future = m.make_future_dataframe(periods=horizon, freq='YE')
+        return {'model': model_to_json(m), 'forecast': Uncertainty.predict(m, future, uncertainty)}
+
+
+def cached_baseline(cache, city, target_col, df_p):
+    """Önbellekte varsa temel tahmini döner, yoksa en uzun ufuk için eğitip kaydeder."""
+    # Aralık modu anahtara girer; mod değişince eski bantlı tahminler kullanılmaz
+    key = cache_key(city, f'{target_col}_{BASELINE_UNCERTAINTY}', df_p)
+    return cache.get_or_compute(key, lambda: fit_baseline(df_p, province=city, target=target_col))
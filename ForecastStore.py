@@ -0,0 +1,186 @@
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+import warnings
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from DataStore import iter_provinces
+from ForecastCache import fit_baseline, series_hash, MAX_HORIZON_YEARS
+from BatchTrend import forecast_sector_shares
+
+warnings.filterwarnings('ignore')
+logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+logging.getLogger('prophet').setLevel(logging.WARNING)
+
+
+# Bütün iller için önceden hesaplanmış tahminler. Dashboard önce buraya bakar, sadece bulamazsa canlı eğitim yapar.
+# Her kayıt girdi serisinin özetini (hash) tutar; veri değiştiyse kayıt bayat sayılır ve kullanılmaz
+INPUT_FILE = 'Prophet_Training_Set_Sektorlu.parquet'
+STORE_FILE = 'Tahmin_Deposu.parquet'
+WORKERS = os.cpu_count() or 1
+
+# İmalat, Sanayi'nin alt kalemi olduğu için kompozisyon grafiğinde ayrıca sayılmaz (app.py ile aynı)
+EXCLUDED_SECTORS = ['Pay_Imalat']
+SECTOR_TARGET = 'Sektorler'
+STORE_COLUMNS = ['İl', 'Hedef', 'Girdi_Hash', 'ds', 'yhat', 'yhat_lower', 'yhat_upper']
+
+
+def main_sectors(columns):
+    return [c for c in columns if c.startswith('Pay_') and c not in EXCLUDED_SECTORS]
+
+
+def sector_hash(df_city, sectors):
+    # Sektör listesi de özete katılır: farklı sektör seti farklı normalizasyon demektir
+    h = hashlib.sha1(series_hash(df_city, ['ds'] + list(sectors)).encode('utf-8'))
+    h.update('|'.join(sectors).encode('utf-8'))
+    return h.hexdigest()
+
+
+def file_hash(path, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ForecastStore:
+    """Önceden hesaplanmış tahmin deposu.
+
+    Depo tek bir Parquet dosyasıdır (uzun format: İl, Hedef, Girdi_Hash, ds, yhat, yhat_lower, yhat_upper).
+    Açılışta (il, hedef) -> tahmin tablosu sözlüğüne indekslenir, sorgular sözlükten okunur. Geçerlilik kayıt
+    bazında denetlenir: girdi serisinin özeti Girdi_Hash'le tutmayan kayıt dönmez, çağıran canlı hesaplar.
+    """
+
+    def __init__(self, path=STORE_FILE):
+        self.path = path
+        self.index = {}
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        df = pd.read_parquet(self.path)
+        for (city, target), group in df.groupby(['İl', 'Hedef'], sort=False):
+            self.index[(city, target)] = (group['Girdi_Hash'].iloc[0],
+                                          group[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].reset_index(drop=True))
+
+    def __len__(self):
+        return len(self.index)
+
+    def lookup(self, city, target, input_hash):
+        """Kayıt varsa ve girdi özeti tutuyorsa tahmin tablosunu döner, yoksa None."""
+        entry = self.index.get((city, target))
+        if entry is None or entry[0] != input_hash:
+            return None
+        return entry[1].copy()
+
+    def lookup_sectors(self, city, sectors, input_hash):
+        """Normalize sektör kompozisyonunu forecast_sector_shares ile aynı biçimde döner."""
+        frames = [self.lookup(city, sector, input_hash) for sector in list(sectors) + ['Total_Sum']]
+        if any(f is None for f in frames):
+            return None
+        out = pd.DataFrame({'ds': frames[0]['ds']})
+        for sector, frame in zip(list(sectors) + ['Total_Sum'], frames):
+            out[sector] = frame['yhat'].to_numpy()
+        return out
+
+
+def _rows(city, target, input_hash, forecast):
+    rows = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
+    rows.insert(0, 'İl', city)
+    rows.insert(1, 'Hedef', target)
+    rows.insert(2, 'Girdi_Hash', input_hash)
+    return rows
+
+
+def city_jobs(df_city):
+    """Bir il için hesaplanacak (hedef, girdi_özeti) listesi: nüfus, GSYİH, GSYİH_USD ve sektörler."""
+    jobs = [('y', series_hash(df_city[['ds', 'y']]))]
+    for col in ('GSYIH', 'GSYIH_USD'):
+        if col in df_city.columns and df_city[col].sum() > 0:
+            jobs.append((col, series_hash(df_city[['ds', col]].rename(columns={col: 'y'}))))
+    sectors = main_sectors(df_city.columns)
+    if sectors:
+        jobs.append((SECTOR_TARGET, sector_hash(df_city, sectors)))
+    return jobs
+
+
+def precompute_city(city, df_city, jobs):
+    """Bir ilin istenen hedeflerini MAX_HORIZON_YEARS yıl için tahmin eder. İşçi süreçte çalışır."""
+    frames, errors = [], []
+    for target, input_hash in jobs:
+        try:
+            if target == SECTOR_TARGET:
+                sectors = main_sectors(df_city.columns)
+                shares = forecast_sector_shares(df_city, sectors, MAX_HORIZON_YEARS)
+                for sector in sectors + ['Total_Sum']:
+                    fc = pd.DataFrame({'ds': shares['ds'], 'yhat': shares[sector],
+                                       'yhat_lower': np.nan, 'yhat_upper': np.nan})
+                    frames.append(_rows(city, sector, input_hash, fc))
+            else:
+                df_p = df_city[['ds', target]].rename(columns={target: 'y'})
+                frames.append(_rows(city, target, input_hash, fit_baseline(df_p, province=city, target=target)['forecast']))
+        except Exception as e:
+            errors.append(f"{city} / {target}: {e}")
+    return frames, errors
+
+
+def _iter_precompute(pending, workers):
+    # Sonuçlar il sırasıyla döner; bir ilin işçi süreci çökerse sadece o il atlanır
+    if workers <= 1:
+        for job in pending:
+            yield precompute_city(*job)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(precompute_city, *job) for job in pending]
+        for (city, _, _), future in zip(pending, futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                yield [], [f"{city}: işçi süreç hatası: {e}"]
+
+
+def precompute_all(input_path=INPUT_FILE, store_path=STORE_FILE, workers=WORKERS):
+    """Bütün illerin tahminlerini hesaplayıp depoya yazar.
+
+    Depodaki kaydın girdi özeti hâlâ tutuyorsa o kayıt yeniden hesaplanmaz, olduğu gibi taşınır.
+    """
+    store = ForecastStore(store_path)
+
+    kept, pending = [], []
+    for city, df_city in iter_provinces(input_path):
+        if len(df_city) < 2:
+            continue
+        todo = []
+        for target, input_hash in city_jobs(df_city):
+            probe = 'Total_Sum' if target == SECTOR_TARGET else target
+            if store.lookup(city, probe, input_hash) is None:
+                todo.append((target, input_hash))
+            elif target == SECTOR_TARGET:
+                sectors = main_sectors(df_city.columns) + ['Total_Sum']
+                kept.extend(_rows(city, s, input_hash, store.lookup(city, s, input_hash)) for s in sectors)
+            else:
+                kept.append(_rows(city, target, input_hash, store.lookup(city, target, input_hash)))
+        if todo:
+            pending.append((city, df_city, todo))
+
+    print(f"{len(pending)} il için tahmin hesaplanacak, {len(kept)} kayıt depodan aynen alındı.")
+
+    frames = list(kept)
+    for i, (city_frames, errors) in enumerate(_iter_precompute(pending, workers)):
+        frames.extend(city_frames)
+        for error in errors:
+            print(f"HATA: {error}")
+        print(f"[{i + 1}/{len(pending)}] {pending[i][0]} tamamlandı")
+
+    out = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=STORE_COLUMNS)
+    out = out.sort_values(['İl', 'Hedef', 'ds']).reset_index(drop=True)
+    out.to_parquet(store_path, index=False)
+    print(f"Tahmin deposu {store_path} olarak kaydedildi ({len(out)} satır)")
+
+
+if __name__ == "__main__":
+    precompute_all(INPUT_FILE, STORE_FILE, WORKERS)
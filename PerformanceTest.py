@@ -1,16 +1,22 @@
 import pandas as pd
-from prophet import Prophet
-from prophet.diagnostics import cross_validation, performance_metrics
 import warnings
 import logging
 import numpy as np
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from DataStore import iter_provinces
+from ForecastCache import cache_key
+from WarmStart import default_store
+from ForecastBackend import forecast_series, DEFAULT_BACKEND
+import Trace
 
 # Suppress warnings for cleaner terminal output
 warnings.filterwarnings('ignore')
 logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
 logging.getLogger('prophet').setLevel(logging.WARNING)
 
-INPUT_FILE = 'Prophet_Training_Set_Sektorlu.xlsx'
+INPUT_FILE = 'Prophet_Training_Set_Sektorlu.parquet'
 
 # CV_INITIAL: Eğitim için kaç yıllık veri kullanılacak
 # CV_PERIOD: Model ne sıklıkla tahmin yapacak
@@ -20,78 +26,172 @@ CV_INITIAL = '3650 days'  # 10 yıllık eğitim verisi kullanacağız
 CV_PERIOD = '365 days'  # Orijinal veriler yıl bazlı olduğu için 365 gün verdim, böylelikle her period 1 yıl olacak
 CV_HORIZON = '1825 days'  # Accuracy (isabetlilik) için 5 yıllık tahmin yapacağız
 
+# Metrikleri etkileyen sütunlar; il parmak izi bunlardan hesaplanır
+METRIC_INPUT_COLS = ['ds', 'y', 'GSYIH']
 
-def performans_metrik_hesabi(input_path):
-    try:
-        df = pd.read_excel(input_path, sheet_name='Iller_Verisi')
-    except Exception as e:
-        print(f"Hata: {e}")
-        return
+# Bütün (il, hedef, kesim) eğitimleri tek bir uzun ömürlü süreç havuzunda çalışır.
+# Prophet'in cross_validation(parallel="processes") çağrısı her model için yeni havuz açıyordu
+CV_WORKERS = os.cpu_count() or 1
+# Metrikler (RMSE, MAPE) sadece yhat kullanır; güven aralığı hesaplanmaz (Uncertainty.MODES)
+CV_UNCERTAINTY = 'off'
+SUMMARY_FILE = 'CV_Metrikleri.csv'
 
-    unique_cities = sorted(df['İl'].unique())
+# Hedef adı -> veri setindeki sütun
+CV_TARGETS = {'Pop': 'y', 'GDP': 'GSYIH'}
 
-    # Sonuçları bir tabloda toplamak için
-    summary_results = []
+# Tahmin motoru: 'prophet' veya 'numpy' (ForecastBackend.BACKENDS). Aynı kesimlerle iki motorun doğruluğu karşılaştırılabilir
+CV_BACKEND = DEFAULT_BACKEND
 
-    for i, city in enumerate(unique_cities):
-        df_city = df[df['İl'] == city].sort_values('ds').copy()
-        #Popülasyon metriği için
-        try:
-            df_p = df_city[['ds', 'y']].copy()
-
-            m_pop = Prophet(yearly_seasonality=True, daily_seasonality=False, weekly_seasonality=False) #Seasonality fonksiyonu trend yakalamak için kullanılır
-                #Elimizdeki veri yıllık olduğu için sadece yearly_seasonality true yaptık
-            m_pop.fit(df_p)
-
-            # Cross Validation (Çapraz Doğrulama) uyguluyoruz
-            # Burada parallel processes çok çekirdekli işlemlemcileri için işlem hızını artırır
-            #Prophet'in dokümantasyonunda çok büyük olmayan veri setleri için parallel="process" kullanmamızı öneriyorlar
-            df_cv_population = cross_validation(m_pop, initial=CV_INITIAL, period=CV_PERIOD, horizon=CV_HORIZON,
-                                         parallel="processes")
 
-            # Metriklerin hesaplanması
-            df_p_metrics = performance_metrics(df_cv_population)
+def city_cv_jobs(city, df_city, backend=CV_BACKEND):
+    """Bir ilin bütün (hedef, kesim tarihi) eğitim işlerini üretir.
 
-            # Horizon değeri için ortalama RMSE ve MAPE değerleri alınıyor
-            pop_rmse = df_p_metrics['rmse'].mean()
-            pop_mape = df_p_metrics['mape'].mean()
-
-            print(f" Nüfus için ortalama RMSE (Root Mean Square Error): {pop_rmse:,.0f} | MAPE (Mean Absolute Percentage Error): {pop_mape:.2%}")
-        except Exception as e:
-            print("Hesaplama sırasında hata oluştu:", e)
-            pop_rmse, pop_mape = np.nan, np.nan #Bu kısım veri sızıntısını engellemeye yarrar.
-            # Bir şehirde hata olursa, değer NaN olarak atandığı için diğer şehirlerin versini etkilemez
+    Kesim tarihleri Prophet'in cross_validation ile aynı kuralla (generate_cutoffs) bulunur.
+    """
+    # Prophet'in yardımcıları ilk kullanımda içe aktarılır (modül açılışı Prophet'i yüklemez)
+    from prophet.diagnostics import generate_cutoffs
 
+    jobs = []
+    for target, col in CV_TARGETS.items():
+        if col not in df_city.columns or (col != 'y' and df_city[col].sum() <= 0):
+            continue
+        df_t = df_city[['ds', col]].rename(columns={col: 'y'}).reset_index(drop=True)
         try:
-            if 'GSYIH' in df_city.columns and df_city['GSYIH'].sum() > 0:
-                df_g = df_city[['ds', 'GSYIH']].rename(columns={'GSYIH': 'y'}).copy()
+            cutoffs = generate_cutoffs(df_t, pd.Timedelta(CV_HORIZON), pd.Timedelta(CV_INITIAL),
+                                       pd.Timedelta(CV_PERIOD))
+        except Exception as e:
+            print(f"{city} / {target}: kesim tarihleri üretilemedi: {e}")
+            Trace.fail('cutoffs', e, province=city, target=target)
+            continue
+        jobs.extend((city, target, cutoff, df_t, backend) for cutoff in cutoffs)
+    return jobs
 
-                m_gdp = Prophet(yearly_seasonality=True, daily_seasonality=False, weekly_seasonality=False) #Aynı şekilde, model yıllık olduğu için sadece yearly değeri true olur
-                m_gdp.fit(df_g)
 
-                df_cv_gdp = cross_validation(m_gdp, initial=CV_INITIAL, period=CV_PERIOD, horizon=CV_HORIZON,
-                                             parallel="processes")
-                df_g_metrics = performance_metrics(df_cv_gdp)
+def fit_cutoff(job):
+    """Tek bir kesim için modeli kesime kadar olan veriyle eğitir ve sonraki 'horizon' dönemini tahmin eder."""
+    city, target, cutoff, df_t, backend = job
+    try:
+        with Trace.span('cv', province=city, target=target, cutoff=cutoff.date(), backend=backend):
+            history = df_t[df_t['ds'] <= cutoff]
+            if len(history) < 2:
+                raise ValueError("Kesimden önce en az iki gözlem gerekli")
+
+            actual = df_t[(df_t['ds'] > cutoff) & (df_t['ds'] <= cutoff + pd.Timedelta(CV_HORIZON))]
+            df_cv = forecast_series(history, actual['ds'], backend, city, target, CV_UNCERTAINTY,
+                                    warm_start=False)
+            df_cv['y'] = actual['y'].to_numpy()
+            df_cv['cutoff'] = cutoff
+        return city, target, df_cv, None
+    except Exception as e:
+        Trace.fail('cv', e, province=city, target=target, cutoff=cutoff.date())
+        return city, target, None, f"{city} / {target} / {cutoff.date()}: {e}"
+
+
+def run_cv_jobs(jobs, workers=CV_WORKERS):
+    """İşleri tek havuzda çalıştırır; {(il, hedef): [cv tabloları]} ve (il, hata) listesi döner."""
+    frames, errors = {}, []
+    if workers <= 1:
+        results = map(fit_cutoff, jobs)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(fit_cutoff, jobs, chunksize=max(1, len(jobs) // (workers * 4)))
+    try:
+        for city, target, df_cv, error in results:
+            if error is not None:
+                errors.append((city, error))
+            else:
+                frames.setdefault((city, target), []).append(df_cv)
+    finally:
+        if workers > 1:
+            executor.shutdown()
+    return frames, errors
+
+
+def metrics_from_cv(city, frames):
+    """Bir ilin cv tablolarından özet satırını üretir. Hesaplanamayan metrikler NaN kalır
+    (bir şehirde hata olursa diğer şehirlerin verisini etkilemez)."""
+    from prophet.diagnostics import performance_metrics
+
+    result = {'City': city}
+    for target in CV_TARGETS:
+        rmse, mape = np.nan, np.nan
+        if frames.get((city, target)):
+            try:
+                df_metrics = performance_metrics(pd.concat(frames[(city, target)], ignore_index=True))
+                # Horizon değeri için ortalama RMSE ve MAPE değerleri alınıyor
+                rmse = df_metrics['rmse'].mean()
+                mape = df_metrics['mape'].mean() if 'mape' in df_metrics.columns else np.nan
+            except Exception as e:
+                print("Hesaplama sırasında hata oluştu:", e)
+                Trace.fail('metrics', e, province=city, target=target)
+        #Kök ortalama kare hatası (Root Mean Square Error) ve Ortalama mutlak hata yüzdesi (Mean Absolute Percentage Error)
+        result[f'{target}_RMSE'] = rmse
+        result[f'{target}_MAPE'] = mape
+    return result
+
+
+def city_metrics(city, df_city, backend=CV_BACKEND):
+    """Bir il için nüfus ve GSYİH modellerinin çapraz doğrulama metriklerini (seri olarak) hesaplar."""
+    frames, errors = run_cv_jobs(city_cv_jobs(city, df_city, backend), workers=1)
+    for _, error in errors:
+        print("Hesaplama sırasında hata oluştu:", error)
+    return metrics_from_cv(city, frames)
+
+
+def write_summary(summary_results, path):
+    # Uzantıya göre CSV veya JSON yazılır
+    df_summary = pd.DataFrame(summary_results)
+    if path.endswith('.json'):
+        df_summary.to_json(path, orient='records', force_ascii=False, indent=2)
+    else:
+        df_summary.to_csv(path, index=False)
+
+
+def performans_metrik_hesabi(input_path, cache=None, workers=CV_WORKERS, summary_file=SUMMARY_FILE,
+                             backend=CV_BACKEND):
+    try:
+        # İller dosyanın il indeksinden tek tek okunur, her il için bütün tablo taranmaz
+        with Trace.span('load', file=input_path):
+            city_frames = dict(iter_provinces(input_path))
+    except Exception as e:
+        print(f"Hata: {e}")
+        Trace.fail('load', e, file=input_path)
+        return
 
-                gdp_rmse = df_g_metrics['rmse'].mean() #Burada RMSE ve MAPE değerleri hesaplanır, ve variablelere atanır, böylelikle çıktıya yazdırabiliriz.
-                gdp_mape = df_g_metrics['mape'].mean()
+    unique_cities = sorted(city_frames)
 
-                print(f"GSYİH için RMSE (Root Mean Square Error): {gdp_rmse:,.0f} | MAPE (Mean Absolute Percentage Error): {gdp_mape:.2%}")
-                #Atadığımız değerler burada ki print tarafından yazdırılır
+    def _key(city):
+        return cache_key(city, f'cv_metrikleri_{backend}', city_frames[city], cols=METRIC_INPUT_COLS)
 
+    # Önbellek verilirse (Pipeline), verisi değişmeyen illerin metrikleri yeniden hesaplanmaz
+    cached = {}
+    if cache is not None:
+        for city in unique_cities:
+            hit = cache.get(_key(city))
+            if hit is not None:
+                cached[city] = hit
 
+    # Bütün illerin bütün kesimleri tek iş listesine düzleştirilir
+    jobs = [job for city in unique_cities if city not in cached for job in city_cv_jobs(city, city_frames[city], backend)]
+    print(f"{len(unique_cities) - len(cached)} il için {len(jobs)} model eğitilecek ({workers} işçi süreç)")
 
-        except Exception as e:
-            print("Hesaplama sırasında hata oluştu:", e)
+    frames, errors = run_cv_jobs(jobs, workers)
+    for _, error in errors:
+        print("Hesaplama sırasında hata oluştu:", error)
+    # Kesimlerinden biri hata veren ilin metrikleri eksiktir; önbelleğe yazılmaz, bir sonraki çalıştırmada
+    # yeniden hesaplanır
+    failed = sorted({city for city, _ in errors})
 
-        # Sonuçları özet tablosuna ekleriz
-        summary_results.append({
-            'City': city,
-            'Pop_RMSE': pop_rmse, #Kök ortalama kare hatası (Root Mean Square Error) ve Ortalama mutlak hata yüzdesi (Mean Absolute Percentage Error) değerleri burada atanır
-            'Pop_MAPE': pop_mape,
-            'GDP_RMSE': gdp_rmse,
-            'GDP_MAPE': gdp_mape
-        })
+    # Sonuçları bir tabloda toplamak için
+    summary_results = []
+    for city in unique_cities:
+        if city in cached:
+            result = cached[city]
+        else:
+            result = metrics_from_cv(city, frames)
+            if cache is not None and city not in failed:
+                cache.put(_key(city), result)
+        summary_results.append(result)
 
     #Sonuçları tablo olarak çıktısını yazdırırız
     for res in summary_results:
@@ -99,7 +199,18 @@ def performans_metrik_hesabi(input_path):
         g_mape = f"{res['GDP_MAPE']:.2%}" if not np.isnan(res['GDP_MAPE']) else "N/A"
         print(f"{res['City']:<20} | {p_mape:<10} | {g_mape:<10}")
 
+    if summary_file:
+        write_summary(summary_results, summary_file)
+        print(f"Özet tablo {summary_file} olarak kaydedildi")
+    if backend == 'prophet':
+        print(default_store().report())
+
+    # Özet tablo ve hesaplaması hata veren illerin listesi (Pipeline bunları değişmemiş saymaz)
+    return summary_results, failed
+
 
 
 if __name__ == "__main__":
-   performans_metrik_hesabi(INPUT_FILE)
\ No newline at end of file
+   Trace.start_run('PerformanceTest')
+   performans_metrik_hesabi(INPUT_FILE)
+   print(Trace.summary())
\ No newline at end of file
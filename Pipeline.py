@@ -0,0 +1,222 @@
+import os
+import json
+import hashlib
+import argparse
+import pandas as pd
+
+import Training
+import TestAll
+import PerformanceTest
+import DemographicCube
+import FeatureStore
+import StaticSite
+from DataStore import load_dataset, dataset_path
+from ForecastCache import ForecastCache
+from ForecastStore import file_hash
+from ForecastBackend import BACKENDS
+import Trace
+
+
+# Training (para birimi dönüşümü dahil) -> TestAll / PerformanceTest zincirini tek komutla çalıştırır.
+# Her aşamanın girdi özetleri (hash) ve il parmak izleri manifest dosyasında tutulur; girdisi değişmeyen
+# aşamalar atlanır, il bazlı aşamalarda sadece verisi değişen iller yeniden hesaplanır
+PIPELINE_DIR = '.pipeline'
+MANIFEST_FILE = os.path.join(PIPELINE_DIR, 'manifest.json')
+CACHE_DIR = os.path.join(PIPELINE_DIR, 'cache')
+CACHE_MB = 1024
+
+# Dosya adları tek yerde toplanır, --config ile verilen JSON dosyası bunları değiştirebilir
+CONFIG = {
+    'population_csv': Training.input_csv,
+    'gdp_file': Training.gdp_file,
+    'training_set': Training.output_file,
+    'report_pop': TestAll.OUTPUT_PDF_POP,
+    'report_gdp': TestAll.OUTPUT_PDF_GDP,
+    'report_totals': TestAll.OUTPUT_TOTALS,
+    'cv_summary': PerformanceTest.SUMMARY_FILE,
+    'demography_cube': DemographicCube.OUTPUT_FILE,
+    # Dışsal değişken deposunun .xls kaynakları (FeatureStore.SOURCES sırasıyla) ve çıktısı
+    'migration_xls': FeatureStore.MIGRATION_FILE,
+    'gdp_xls': FeatureStore.GDP_FILE,
+    'pivot_xls': FeatureStore.PIVOT_FILE,
+    'feature_store': FeatureStore.OUTPUT_FILE,
+    # Dashboard'un statik HTML/SVG karşılığı (StaticSite)
+    'static_site': StaticSite.SITE_DIR,
+    'workers': os.cpu_count() or 1,
+    # Tahmin motoru: 'prophet' veya 'numpy' (ForecastBackend.BACKENDS)
+    'backend': TestAll.BACKEND,
+}
+
+
+def province_fingerprints(df, cols):
+    """Her il için, verilen sütunlardaki verinin özeti. Satırlar hash'lenir, il bazında birleştirilir."""
+    cols = [c for c in cols if c in df.columns]
+    df = df.sort_values(['İl', 'ds']).reset_index(drop=True)
+    row_hashes = pd.util.hash_pandas_object(df[cols], index=False).to_numpy()
+    return {city: hashlib.sha1(row_hashes[idx].tobytes()).hexdigest()
+            for city, idx in df.groupby('İl').indices.items()}
+
+
+def load_manifest(path=MANIFEST_FILE):
+    if not os.path.exists(path):
+        return {'stages': {}}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path=MANIFEST_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _run_training(cfg, cache):
+    Training.prepare_data_for_prophet(cfg['population_csv'], cfg['gdp_file'], cfg['training_set'])
+
+
+def _run_reports(cfg, cache):
+    failed = TestAll.generate_dual_reports(cfg['training_set'], cfg['report_pop'], cfg['report_gdp'],
+                                           workers=cfg['workers'], cache=cache, backend=cfg['backend'],
+                                           render_workers=cfg['workers'], out_totals=cfg['report_totals'])
+    if failed is None:
+        raise RuntimeError(f"{cfg['training_set']} okunamadı, raporlar üretilmedi")
+    return failed
+
+
+def _run_demography(cfg, cache):
+    DemographicCube.build_cube_file(cfg['population_csv'], cfg['demography_cube'], force=True)
+
+
+def _run_features(cfg, cache):
+    sources = [cfg['migration_xls'], cfg['gdp_xls'], cfg['pivot_xls']]
+    FeatureStore.build_feature_file(sources, cfg['feature_store'], force=True)
+
+
+def _run_site(cfg, cache):
+    # Site kendi index.json'ındaki il anahtarlarıyla artımlı çalışır; sadece değişen iller yeniden çizilir
+    return StaticSite.export_site(cfg['training_set'], cfg['static_site'], workers=cfg['workers'],
+                                  backend=cfg['backend'])
+
+
+def _run_cv(cfg, cache):
+    result = PerformanceTest.performans_metrik_hesabi(cfg['training_set'], cache=cache, workers=cfg['workers'],
+                                                      summary_file=cfg['cv_summary'], backend=cfg['backend'])
+    if result is None:
+        raise RuntimeError(f"{cfg['training_set']} okunamadı, metrikler hesaplanmadı")
+    return result[1]
+
+
+# Aşamalar sırasıyla çalışır.
+# files: girdi dosyaları (dosya özeti karşılaştırılır)
+# dataset + province_cols: il bazlı aşamalar (il parmak izleri karşılaştırılır)
+# settings: sonucu değiştiren ayarlar (değişirse aşama yeniden çalışır)
+# run: aşamayı çalıştırır; başarısız illerin (veya hataların) listesini dönebilir
+STAGES = [
+    {'name': 'training', 'files': ['population_csv', 'gdp_file'], 'outputs': ['training_set'],
+     'run': _run_training},
+    {'name': 'reports', 'dataset': 'training_set', 'province_cols': TestAll.REPORT_INPUT_COLS,
+     'settings': ['backend'], 'outputs': ['report_pop', 'report_gdp', 'report_totals'], 'run': _run_reports},
+    {'name': 'demography', 'files': ['population_csv'], 'outputs': ['demography_cube'], 'run': _run_demography},
+    {'name': 'features', 'files': ['migration_xls', 'gdp_xls', 'pivot_xls'], 'outputs': ['feature_store'],
+     'run': _run_features},
+    {'name': 'site', 'files': ['training_set'], 'settings': ['backend'], 'outputs': ['static_site'],
+     'run': _run_site},
+    {'name': 'cv', 'dataset': 'training_set', 'province_cols': PerformanceTest.METRIC_INPUT_COLS,
+     'settings': ['backend'], 'outputs': ['cv_summary'], 'run': _run_cv},
+]
+
+
+def _path(key, cfg):
+    # *_set anahtarları DataStore veri setleridir, diskteki dosya adı dataset_path ile bulunur
+    return dataset_path(cfg[key]) if key.endswith('_set') else cfg[key]
+
+
+def _stage_state(stage, cfg):
+    state = {}
+    if 'files' in stage:
+        state['inputs'] = {key: file_hash(_path(key, cfg)) for key in stage['files']}
+    if 'dataset' in stage:
+        df = load_dataset(cfg[stage['dataset']], columns=['İl'] + stage['province_cols'])
+        state['provinces'] = province_fingerprints(df, stage['province_cols'])
+    if 'settings' in stage:
+        state['settings'] = {key: cfg[key] for key in stage['settings']}
+    return state
+
+
+def run_pipeline(cfg=CONFIG, stages=None, force=False):
+    manifest = load_manifest()
+    cache = ForecastCache(CACHE_DIR, max_mb=CACHE_MB)
+
+    for stage in STAGES:
+        name = stage['name']
+        if stages and name not in stages:
+            continue
+
+        state = _stage_state(stage, cfg)
+        previous = manifest['stages'].get(name, {})
+        outputs_ok = all(os.path.exists(_path(key, cfg)) for key in stage['outputs'])
+
+        reasons = []
+        if force:
+            reasons.append('zorla çalıştırma')
+        if not outputs_ok:
+            reasons.append('çıktı eksik')
+        if state.get('inputs') != previous.get('inputs'):
+            reasons.append('girdi dosyası değişti')
+        if state.get('settings') != previous.get('settings'):
+            reasons.append('ayarlar değişti')
+        if 'provinces' in state:
+            old = previous.get('provinces', {})
+            changed = sorted(c for c, fp in state['provinces'].items() if old.get(c) != fp)
+            removed = sorted(set(old) - set(state['provinces']))
+            if changed or removed:
+                shown = ', '.join(changed[:10]) + (' ...' if len(changed) > 10 else '')
+                reasons.append(f"{len(changed)} il değişti ({shown})" if changed else f"{len(removed)} il çıkarıldı")
+
+        if not reasons:
+            print(f"[{name}] değişiklik yok, atlanıyor")
+            continue
+
+        print(f"[{name}] çalıştırılıyor: {'; '.join(reasons)}")
+        with Trace.span(f"stage_{name}"):
+            failed = stage['run'](cfg, cache) or []
+
+        # Başarısız iller manifeste yazılmaz, bir sonraki çalıştırmada değişmiş sayılıp yeniden denenir. İl
+        # bazında izlenmeyen aşamada hata varsa aşamanın kaydı hiç güncellenmez
+        if failed and 'provinces' in state:
+            print(f"[{name}] {len(failed)} il başarısız, bir sonraki çalıştırmada yeniden denenecek")
+            failed = set(failed)
+            state['provinces'] = {c: fp for c, fp in state['provinces'].items() if c not in failed}
+        elif failed:
+            print(f"[{name}] {len(failed)} hata, aşama bir sonraki çalıştırmada yeniden çalışacak")
+            continue
+
+        # Manifest her aşamadan sonra yazılır; yarıda kalan bir çalıştırma tamamlanan aşamaları kaybetmez
+        manifest['stages'][name] = state
+        save_manifest(manifest)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Training -> TestAll/PerformanceTest")
+    parser.add_argument('--stages', nargs='*', choices=[s['name'] for s in STAGES],
+                        help="Sadece bu aşamaları çalıştır")
+    parser.add_argument('--force', action='store_true', help="Girdiler değişmese de çalıştır")
+    parser.add_argument('--config', help="Dosya adlarını değiştiren JSON dosyası")
+    parser.add_argument('--workers', type=int, help="TestAll ve PerformanceTest işçi süreç sayısı")
+    parser.add_argument('--backend', choices=BACKENDS, help="Tahmin motoru")
+    args = parser.parse_args()
+
+    cfg = dict(CONFIG)
+    if args.config:
+        with open(args.config, encoding='utf-8') as f:
+            cfg.update(json.load(f))
+    if args.workers:
+        cfg['workers'] = args.workers
+    if args.backend:
+        cfg['backend'] = args.backend
+
+    Trace.start_run('Pipeline')
+    run_pipeline(cfg, stages=args.stages, force=args.force)
+    print(Trace.summary())
@@ -0,0 +1,134 @@
+import os
+import json
+import pandas as pd
+
+
+# TÜİK nüfus verisinin tipli şeması. İl ve kategori adları kategorik (her satırda metin yerine küçük bir kod),
+# il kodu ve yıl küçük tamsayı, kişi sayıları int32, oranlar float32 olarak tutulur. Aynı şema hem CSV hem JSON
+# kaynağına ve Training'in yazdığı veri setine uygulanır
+CATEGORY_COLS = ['İl', 'Kategori']
+COUNT_COLS = ['Toplam_Nüfus', 'Erkek', 'Kadın', 'Şehir', 'Köy', 'Çocuk_0_14', 'Genç_15_24', 'Yetişkin_25_64',
+              'Yaşlı_65+']
+RATE_COLS = ['Büyüme_Oranı_%', 'Nüfus_Yoğunluğu_km2']
+POPULATION_SCHEMA = {
+    **{col: 'category' for col in CATEGORY_COLS},
+    'İl_Kodu': 'int16',
+    'Yıl': 'int16',
+    **{col: 'int32' for col in COUNT_COLS},
+    **{col: 'float32' for col in RATE_COLS},
+}
+# Training çıktısında nüfus 'y' sütunundadır
+DATASET_SCHEMA = {**POPULATION_SCHEMA, 'y': 'int32'}
+
+# Dosya bu kadar satırlık parçalar halinde okunur; bellekte aynı anda ham (tipsiz) olarak sadece bir parça bulunur
+CHUNK_ROWS = 100_000
+# JSON dosyasından her seferinde okunan karakter sayısı
+JSON_BUFFER = 1 << 16
+
+
+def apply_schema(df, schema=DATASET_SCHEMA):
+    """Tablodaki şema sütunlarını şemadaki tiplere çevirir (yerinde), tabloyu döner.
+
+    Eksik değer içeren sayı sütunları tamsayıya çevrilemez; bunlar float64 bırakılır ve uyarı yazılır.
+    """
+    for col, dtype in schema.items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        if dtype == 'category':
+            df[col] = df[col].astype('category')
+            continue
+        values = pd.to_numeric(df[col], errors='coerce')
+        if dtype.startswith('int') and values.isna().any():
+            print(f"UYARI: '{col}' sütununda {int(values.isna().sum())} eksik/sayısal olmayan değer var, "
+                  f"tamsayıya çevrilmedi.")
+            df[col] = values.astype('float64')
+        else:
+            df[col] = values.astype(dtype)
+    return df
+
+
+def concat_typed(chunks):
+    """Tipli parçaları birleştirir. Kategorik sütunların kategori listeleri birleştirilir, tip korunur."""
+    chunks = [c for c in chunks if len(c)]
+    if not chunks:
+        return pd.DataFrame(columns=list(POPULATION_SCHEMA)).pipe(apply_schema, POPULATION_SCHEMA)
+    for col in chunks[0].columns:
+        if isinstance(chunks[0][col].dtype, pd.CategoricalDtype):
+            categories = sorted(set().union(*(c[col].cat.categories for c in chunks)))
+            for c in chunks:
+                c[col] = c[col].cat.set_categories(categories)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def iter_json_records(path, buffer_size=JSON_BUFFER):
+    """Kayıt dizisi ([{...}, {...}]) biçimindeki JSON dosyasının kayıtlarını tek tek üretir.
+
+    Dosyanın tamamı belleğe alınmaz; tampon doldukça okunur ve her kayıt ayrıştırılıp bırakılır.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding='utf-8-sig') as f:
+        buf = f.read(buffer_size).lstrip()
+        if not buf.startswith('['):
+            raise ValueError(f"'{path}' bir JSON kayıt dizisi değil")
+        pos = 1
+        while True:
+            # Kayıtlar arasındaki boşluk ve virgüller atlanır, tampon biterse yenisi okunur
+            while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                pos += 1
+            if pos == len(buf):
+                buf, pos = f.read(buffer_size), 0
+                if not buf:
+                    raise ValueError(f"'{path}' beklenmedik şekilde bitti")
+                continue
+            if buf[pos] == ']':
+                return
+            try:
+                record, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Kayıt tamponun sonunda yarım kaldı: kalan kısım yeni okunanla birleştirilip tekrar denenir
+                more = f.read(buffer_size)
+                if not more:
+                    raise
+                buf, pos = buf[pos:] + more, 0
+                continue
+            yield record
+            pos = end
+
+
+def _iter_json(path, chunk_rows):
+    batch = []
+    for record in iter_json_records(path):
+        batch.append(record)
+        if len(batch) == chunk_rows:
+            yield pd.DataFrame.from_records(batch)
+            batch = []
+    if batch:
+        yield pd.DataFrame.from_records(batch)
+
+
+def _iter_csv(path, chunk_rows):
+    # İl ve kategori doğrudan kategorik okunur, ara adımda metin sütunu oluşmaz. İl kodu ('01') sayı olarak okunur
+    dtype = {col: 'category' for col in CATEGORY_COLS}
+    for chunk in pd.read_csv(path, encoding='utf-8-sig', dtype=dtype, chunksize=chunk_rows):
+        yield chunk
+
+
+def iter_population(path, chunk_rows=CHUNK_ROWS):
+    """Nüfus dosyasını (CSV veya JSON) şemaya çevrilmiş parçalar halinde üretir."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.json':
+        chunks = _iter_json(path, chunk_rows)
+    elif ext == '.csv':
+        chunks = _iter_csv(path, chunk_rows)
+    else:
+        raise ValueError(f"Desteklenmeyen nüfus dosyası: {path} (.csv veya .json)")
+
+    for chunk in chunks:
+        # Sütun isimlerindeki olası boşluklar temizlenir
+        chunk.columns = chunk.columns.str.strip()
+        yield apply_schema(chunk, POPULATION_SCHEMA)
+
+
+def read_population(path, chunk_rows=CHUNK_ROWS):
+    """Nüfus dosyasını (CSV veya JSON) tipli tek tablo olarak okur."""
+    return concat_typed(list(iter_population(path, chunk_rows)))
@@ -0,0 +1,132 @@
+import re
+import numpy as np
+import pandas as pd
+
+
+# İl boyut tablosu. Kaynaklar ili farklı yazıyor: nüfus dosyasında 'Adana' + İl_Kodu sütunu, GSYİH dosyasında
+# 'Adana-1' (ad + plaka kodu). İki taraf da buradaki tablo üzerinden tamsayı plaka koduna (İl_Kodu) çevrilir ve
+# birleştirme kod üzerinden yapılır. Ad çözümlemesi satır başına değil, farklı ad başına bir kez yapılır
+PLATE_CODES = {
+    1: 'Adana', 2: 'Adıyaman', 3: 'Afyonkarahisar', 4: 'Ağrı', 5: 'Amasya', 6: 'Ankara', 7: 'Antalya',
+    8: 'Artvin', 9: 'Aydın', 10: 'Balıkesir', 11: 'Bilecik', 12: 'Bingöl', 13: 'Bitlis', 14: 'Bolu',
+    15: 'Burdur', 16: 'Bursa', 17: 'Çanakkale', 18: 'Çankırı', 19: 'Çorum', 20: 'Denizli', 21: 'Diyarbakır',
+    22: 'Edirne', 23: 'Elazığ', 24: 'Erzincan', 25: 'Erzurum', 26: 'Eskişehir', 27: 'Gaziantep', 28: 'Giresun',
+    29: 'Gümüşhane', 30: 'Hakkari', 31: 'Hatay', 32: 'Isparta', 33: 'Mersin', 34: 'İstanbul', 35: 'İzmir',
+    36: 'Kars', 37: 'Kastamonu', 38: 'Kayseri', 39: 'Kırklareli', 40: 'Kırşehir', 41: 'Kocaeli', 42: 'Konya',
+    43: 'Kütahya', 44: 'Malatya', 45: 'Manisa', 46: 'Kahramanmaraş', 47: 'Mardin', 48: 'Muğla', 49: 'Muş',
+    50: 'Nevşehir', 51: 'Niğde', 52: 'Ordu', 53: 'Rize', 54: 'Sakarya', 55: 'Samsun', 56: 'Siirt', 57: 'Sinop',
+    58: 'Sivas', 59: 'Tekirdağ', 60: 'Tokat', 61: 'Trabzon', 62: 'Tunceli', 63: 'Şanlıurfa', 64: 'Uşak',
+    65: 'Van', 66: 'Yozgat', 67: 'Zonguldak', 68: 'Aksaray', 69: 'Bayburt', 70: 'Karaman', 71: 'Kırıkkale',
+    72: 'Batman', 73: 'Şırnak', 74: 'Bartın', 75: 'Ardahan', 76: 'Iğdır', 77: 'Yalova', 78: 'Karabük',
+    79: 'Kilis', 80: 'Osmaniye', 81: 'Düzce',
+}
+# Eski/kısa adlar
+ALIASES = {'İçel': 33, 'Afyon': 3, 'K.Maraş': 46, 'Maraş': 46, 'Urfa': 63, 'Hakkâri': 30}
+# İBBS-1 (NUTS-1) bölgeleri: bölge kodu -> (ad, plaka kodları). Ulusal toplamın altındaki bölge düzeyi
+NUTS1_REGIONS = {
+    'TR1': ('İstanbul', [34]),
+    'TR2': ('Batı Marmara', [59, 22, 39, 10, 17]),
+    'TR3': ('Ege', [35, 9, 20, 48, 45, 3, 43, 64]),
+    'TR4': ('Doğu Marmara', [16, 26, 11, 41, 54, 81, 14, 77]),
+    'TR5': ('Batı Anadolu', [6, 42, 70]),
+    'TR6': ('Akdeniz', [7, 32, 15, 1, 33, 31, 46, 80]),
+    'TR7': ('Orta Anadolu', [71, 68, 51, 50, 40, 38, 58, 66]),
+    'TR8': ('Batı Karadeniz', [67, 78, 74, 37, 18, 57, 55, 60, 19, 5]),
+    'TR9': ('Doğu Karadeniz', [61, 52, 28, 53, 8, 29]),
+    'TRA': ('Kuzeydoğu Anadolu', [25, 24, 69, 4, 36, 76, 75]),
+    'TRB': ('Ortadoğu Anadolu', [44, 23, 12, 62, 65, 49, 13, 30]),
+    'TRC': ('Güneydoğu Anadolu', [27, 2, 79, 63, 21, 47, 72, 56, 73]),
+}
+REGION_OF = {code: region for region, (_, codes) in NUTS1_REGIONS.items() for code in codes}
+
+# Sondaki plaka kodu eki: 'Adana-1', 'Adana - 01'
+CODE_SUFFIX = re.compile(r'^(.*?)\s*-\s*(\d+)$')
+# Türkçe büyük/küçük harf ve noktalı/noktasız i farkları, şapkalı harfler
+_TR_LOWER = str.maketrans({'İ': 'i', 'I': 'ı'})
+_FOLD = str.maketrans('ıçğöşüâîû', 'icgosuaiu')
+UNMATCHED = -1
+
+
+def name_key(text):
+    """Adın karşılaştırma anahtarı: Türkçe küçük harf, aksanlar ve noktalı/noktasız i farkı kaldırılmış,
+    harf ve rakam dışındaki karakterler atılmış. 'İZMİR', 'izmir', 'Izmir' ve 'K.Maraş'/'kmaras' eşleşir."""
+    key = str(text).strip().translate(_TR_LOWER).lower().translate(_FOLD)
+    return re.sub(r'[^0-9a-z]', '', key)
+
+
+class ProvinceKeys:
+    """Plaka kodu -> resmi ad tablosu ve ad varyantı -> plaka kodu eşlemesi.
+
+    extra: kaynağın kendi (kod, ad) çiftleri (ör. nüfus dosyasındaki İl_Kodu/İl). İlçe düzeyinde veya sentetik
+    verilerde tablo bu çiftlerle genişler. Aynı anahtar iki farklı koda gidiyorsa (ör. birçok ildeki 'Merkez'
+    ilçesi) ad tek başına çözümlenmez, sadece kod ekiyle ('Merkez-1101') eşleşir.
+    """
+
+    def __init__(self, extra=None):
+        self.names = dict(PLATE_CODES)
+        self.lookup = {}
+        self._ambiguous = set()
+        for code, name in PLATE_CODES.items():
+            self._add(name, code)
+        for name, code in ALIASES.items():
+            self._add(name, code)
+        for code, name in (extra or []):
+            code = int(code)
+            self.names.setdefault(code, str(name))
+            self._add(name, code)
+
+    def _add(self, name, code):
+        key = name_key(name)
+        if key in self._ambiguous:
+            return
+        if self.lookup.get(key, code) != code:
+            del self.lookup[key]
+            self._ambiguous.add(key)
+            return
+        self.lookup[key] = code
+
+    def table(self):
+        """Boyut tablosu: İl_Kodu, İl (resmi ad), Bölge (İBBS-1 kodu; 81 il dışındaki kodlarda boş)."""
+        codes = sorted(self.names)
+        return pd.DataFrame({'İl_Kodu': np.asarray(codes, dtype=np.int16),
+                             'İl': [self.names[c] for c in codes],
+                             'Bölge': [REGION_OF.get(c) for c in codes]})
+
+    def _resolve_one(self, raw):
+        """(kod, neden). Çözümlenemezse kod UNMATCHED, neden açıklama olur."""
+        text = str(raw).strip()
+        match = CODE_SUFFIX.match(text)
+        base, code = (match.group(1), int(match.group(2))) if match else (text, None)
+        named = self.lookup.get(name_key(base))
+
+        if code is None:
+            if named is not None:
+                return named, None
+            return UNMATCHED, 'belirsiz ad' if name_key(base) in self._ambiguous else 'bilinmeyen ad'
+        if code not in self.names:
+            return UNMATCHED, 'bilinmeyen kod'
+        # Ek kod kararlı anahtardır; ad da tanınıyorsa aynı kodu göstermesi gerekir
+        if named is not None and named != code:
+            return UNMATCHED, 'kod ile ad uyuşmuyor'
+        return code, None
+
+    def resolve(self, names):
+        """Adları plaka koduna çevirir; (int16 kod dizisi, eşleşmeyenler tablosu) döner.
+
+        Eşleşmeyen satırların kodu UNMATCHED (-1) olur. Eşleşmeyenler tablosu: İl_Ham, Satır (kaç satırda
+        geçtiği), Neden.
+        """
+        row_codes, uniques = pd.factorize(pd.Series(names), use_na_sentinel=True)
+        counts = np.bincount(row_codes[row_codes >= 0], minlength=len(uniques))
+        resolved = np.full(len(uniques), UNMATCHED, dtype=np.int16)
+        problems = []
+        for i, raw in enumerate(uniques):
+            code, reason = self._resolve_one(raw)
+            resolved[i] = code
+            if reason is not None:
+                problems.append((raw, int(counts[i]), reason))
+
+        codes = np.full(len(row_codes), UNMATCHED, dtype=np.int16)
+        codes[row_codes >= 0] = resolved[row_codes[row_codes >= 0]]
+        report = pd.DataFrame(problems, columns=['İl_Ham', 'Satır', 'Neden'])
+        return codes, report
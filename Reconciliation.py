@@ -0,0 +1,237 @@
+import numpy as np
+import pandas as pd
+from statistics import NormalDist
+
+from BatchTrend import forecast_trend, INTERVAL_WIDTH
+from ProvinceKeys import ProvinceKeys, NUTS1_REGIONS
+import Trace
+
+
+# İl tahminlerinin bölge (İBBS-1) ve Türkiye toplamlarına uzlaştırılması. Bütün il tahminleri (il x zaman)
+# matrislerine dizilir ve bütün düzeyler tek bir matris çarpımıyla (S P ŷ) hesaplanır; ulusal seri için ayrı
+# model eğitilmez.
+#   'bottom_up': toplamlar il tahminlerinin toplamıdır, il tahminleri (sayfalardaki değerler) değişmez.
+#   'mint': bölge ve Türkiye serileri için de toplu (BatchTrend) temel tahmin alınır; bütün düzeyler geçmiş
+#           hatalarının daraltılmış (shrinkage) kovaryansıyla ağırlıklandırılarak uzlaştırılır, iller de düzelir.
+# Aralıklar hata korelasyonunu hesaba katar: iller birlikte saptığı için toplamın aralığı, il aralıklarının
+# bağımsız toplamından geniştir
+METHODS = ('bottom_up', 'mint')
+DEFAULT_METHOD = 'bottom_up'
+NATIONAL = 'Türkiye'
+LEVELS = ('Ulusal', 'Bölge', 'İl')
+OUTPUT_FILE = 'Uzlastirilmis_Tahminler.csv'
+INPUT_FILE = 'Prophet_Training_Set_Sektorlu.parquet'
+PREDICTION_YEARS = 5
+OUTPUT_COLUMNS = ['Hedef', 'Düzey', 'Kod', 'Ad', 'ds', 'yhat', 'yhat_lower', 'yhat_upper']
+
+
+def province_codes(history):
+    """{il: plaka kodu}. Veri setinde İl_Kodu sütunu varsa ondan, yoksa il adından (ProvinceKeys) alınır."""
+    names = history['İl'].astype(str)
+    codes = dict.fromkeys(names.unique())
+    if 'İl_Kodu' in history.columns:
+        pairs = pd.DataFrame({'İl': names, 'İl_Kodu': history['İl_Kodu']}).dropna().drop_duplicates('İl')
+        codes.update(zip(pairs['İl'], pairs['İl_Kodu'].astype(int)))
+    missing = [city for city, code in codes.items() if code is None]
+    if missing:
+        resolved, _ = ProvinceKeys().resolve(missing)
+        codes.update(zip(missing, resolved.tolist()))
+    return codes
+
+
+def hierarchy(names, codes):
+    """Toplama matrisi S (düğüm x il) ve düğüm tablosu (Düzey, Kod, Ad).
+
+    Satırlar: Türkiye, verideki illeri kapsayan bölgeler, iller (verilen sırayla). Bölgesi olmayan kodlar
+    (eşleşmeyen ad, sentetik veri) sadece ulusal toplama girer.
+    """
+    codes = np.asarray(codes, dtype=int)
+    rows = [np.ones(len(codes))]
+    nodes = [(LEVELS[0], 'TR', NATIONAL)]
+    for region, (region_name, members) in NUTS1_REGIONS.items():
+        row = np.isin(codes, members).astype(float)
+        if row.any():
+            rows.append(row)
+            nodes.append((LEVELS[1], region, region_name))
+    rows.extend(np.eye(len(codes)))
+    nodes.extend((LEVELS[2], str(code), name) for name, code in zip(names, codes))
+    return np.vstack(rows), pd.DataFrame(nodes, columns=['Düzey', 'Kod', 'Ad'])
+
+
+def _matrices(long, names, cols, ds):
+    # Uzun tablodan (İl, ds, sütunlar) her sütun için (il x zaman) matrisi; olmayan il/tarih NaN.
+    # İl ve tarih eşlemesi bütün tablo için tek seferde yapılır, il başına pandas işlemi yoktur
+    row = pd.Index(names).get_indexer(long['İl'].astype(str))
+    pos = pd.DatetimeIndex(ds).get_indexer(pd.DatetimeIndex(long['ds']))
+    hit = (row >= 0) & (pos >= 0)
+    out = np.full((len(cols), len(names), len(ds)), np.nan)
+    for k, col in enumerate(cols):
+        out[k, row[hit], pos[hit]] = long[col].to_numpy(dtype=float)[hit]
+    return out
+
+
+def stack_forecasts(forecasts, names):
+    """{il: tahmin tablosu} -> (ds, yhat, yhat_lower, yhat_upper). Matrisler (il x zaman), bütün illerin
+    ortak tarihlerinde."""
+    cols = ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
+    long = pd.concat({name: forecasts[name][cols] for name in names}, names=['İl', None]).reset_index(level=0)
+    counts = long['ds'].value_counts()
+    ds = pd.DatetimeIndex(counts.index[counts.to_numpy() == len(names)]).sort_values()
+    return (ds, *_matrices(long, names, cols[1:], ds))
+
+
+def _z(interval_width):
+    return NormalDist().inv_cdf(0.5 + interval_width / 2)
+
+
+def shrink_correlation(residuals):
+    """Geçmiş hatalarının (zaman x seri) daraltılmış korelasyonu: R = λ I + (1 - λ) F' F.
+
+    λ Schäfer-Strimmer formülüyle verinin kendisinden hesaplanır. R açıkça kurulmaz; (λ, F, std) döner.
+    Seri sayısı yıl sayısından çok olduğunda da R tekil olmaz (λ > 0); hesap zaman x zaman Gram matrisiyle
+    yapılır (seri x seri x zaman dizisi oluşmaz).
+    """
+    X = residuals - residuals.mean(axis=0)
+    T, m = X.shape
+    std = X.std(axis=0, ddof=1)
+    Z = X / np.where(std > 0, std, 1)
+
+    gram = Z @ Z.T
+    sq = Z ** 2
+    # Σ_{i≠j} Var(r_ij) ve Σ_{i≠j} r_ij²
+    spread = (sq.sum(axis=1) ** 2).sum() - (gram ** 2).sum() / T - ((sq - sq.mean(axis=0)) ** 2).sum()
+    off_diag = (gram ** 2).sum() / (T - 1) ** 2 - m
+    lam = 1.0 if off_diag <= 0 else float(np.clip(T / (T - 1) ** 3 * spread / off_diag, 0, 1))
+    return lam, Z / np.sqrt(T - 1), std
+
+
+def reconcile(S, mean, sigma, shrink=None, weights=None):
+    """Temel tahminleri uzlaştırır; bütün düğümler için (yhat, sigma) matrisleri (düğüm x zaman) döner.
+
+    weights verilmezse aşağıdan yukarı: mean ve sigma sadece iller (S'in sütunları) içindir, G = S.
+    weights (MinT, düğüm x düğüm) verilirse mean ve sigma bütün düğümleri kapsar ve
+    G = S (S' W⁻¹ S)⁻¹ S' W⁻¹. shrink: temel hataların korelasyonu (shrink_correlation); yoksa bağımsız sayılır.
+    """
+    if weights is None:
+        G = S
+    else:
+        try:
+            Winv_S = np.linalg.solve(weights, S)
+            G = S @ np.linalg.solve(S.T @ Winv_S, Winv_S.T)
+        except np.linalg.LinAlgError:
+            Winv_S = np.linalg.pinv(weights) @ S
+            G = S @ np.linalg.pinv(S.T @ Winv_S) @ Winv_S.T
+
+    lam, F = (1.0, None) if shrink is None else shrink[:2]
+    var = lam * (G ** 2) @ (sigma ** 2)
+    if F is not None and lam < 1:
+        # Σ_r (G (σ ∘ F_r))²: düşük ranklı kısım, her zaman adımı için ayrı kovaryans matrisi kurulmaz
+        var += (1 - lam) * ((G @ (F[:, :, None] * sigma[None, :, :])) ** 2).sum(axis=0)
+    return G @ mean, np.sqrt(np.clip(var, 0, None))
+
+
+def reconcile_forecasts(forecasts, codes, history=None, target='y', method=DEFAULT_METHOD,
+                        interval_width=INTERVAL_WIDTH):
+    """İl tahminlerini bölge ve Türkiye toplamlarıyla birlikte tutarlı hale getirir.
+
+    forecasts: {il: tahmin tablosu (ds, yhat, yhat_lower, yhat_upper)}; codes: {il: plaka kodu}.
+    history: uzun il verisi (İl, ds, target); hata korelasyonu ve MinT temel tahminleri bundan hesaplanır.
+    Uzun tablo döner: Hedef, Düzey, Kod, Ad, ds, yhat, yhat_lower, yhat_upper.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Bilinmeyen uzlaştırma yöntemi: {method} ({', '.join(METHODS)})")
+    names = list(forecasts)
+    S, nodes = hierarchy(names, [codes[name] for name in names])
+    n_agg = len(S) - len(names)
+    ds, mean, lower, upper = stack_forecasts(forecasts, names)
+    z = _z(interval_width)
+    sigma = np.nan_to_num((upper - lower) / (2 * z))
+
+    actual, complete = None, np.zeros(len(ds), dtype=bool)
+    if history is not None:
+        actual = _matrices(history, names, [target], ds)[0]
+        complete = ~np.isnan(actual).any(axis=0)
+
+    with Trace.span('reconcile', target=target, method=method, series=len(names)):
+        if method == 'bottom_up':
+            shrink = shrink_correlation((actual - mean)[:, complete].T) if complete.sum() > 2 else None
+            rec_mean, rec_sigma = reconcile(S, mean, sigma, shrink)
+        else:
+            if complete.sum() < 3:
+                raise ValueError("MinT için bütün illerde en az 3 yıllık ortak geçmiş gerekir")
+            # Bölge ve Türkiye temel tahminleri: toplam serileri tek toplu çözümle eğitilir
+            agg_history = S[:n_agg] @ actual[:, complete]
+            agg_yhat, agg_lower, agg_upper = forecast_trend(ds[complete], agg_history.T, ds,
+                                                            interval_width=interval_width)
+            base_mean = np.vstack([agg_yhat.T, mean])
+            base_sigma = np.vstack([np.nan_to_num((agg_upper - agg_lower).T / (2 * z)), sigma])
+
+            residuals = (np.vstack([agg_history, actual[:, complete]]) - base_mean[:, complete]).T
+            shrink = shrink_correlation(residuals)
+            lam, F, std = shrink
+            std = np.maximum(std, 1e-9 * std.max())
+            weights = (lam * np.eye(len(std)) + (1 - lam) * F.T @ F) * np.outer(std, std)
+            rec_mean, rec_sigma = reconcile(S, base_mean, base_sigma, shrink, weights)
+
+    out = nodes.loc[nodes.index.repeat(len(ds))].reset_index(drop=True)
+    out.insert(0, 'Hedef', target)
+    out['ds'] = np.tile(ds.to_numpy(), len(nodes))
+    out['yhat'] = rec_mean.ravel()
+    out['yhat_lower'] = (rec_mean - z * rec_sigma).ravel()
+    out['yhat_upper'] = (rec_mean + z * rec_sigma).ravel()
+    return out
+
+
+def reconcile_targets(forecasts_by_target, history, method=DEFAULT_METHOD):
+    """{hedef: {il: tahmin}} -> bütün hedeflerin uzlaştırılmış tablosu.
+
+    history: uzun il verisi (İl, ds, hedefler; varsa İl_Kodu). Tahmini olmayan iller toplama girmez.
+    """
+    codes = province_codes(history)
+    tables = []
+    for target, forecasts in forecasts_by_target.items():
+        if not forecasts:
+            continue
+        totals = history.groupby(history['İl'].astype(str))[target].sum()
+        missing = [city for city in totals.index[totals > 0] if city not in forecasts]
+        if missing:
+            print(f"UYARI: {target} için {len(missing)} ilin tahmini yok, toplamlar bu iller olmadan hesaplandı: "
+                  f"{', '.join(missing[:10])}{' ...' if len(missing) > 10 else ''}")
+        try:
+            tables.append(reconcile_forecasts(forecasts, codes, history, target, method))
+        except Exception as e:
+            print(f"HATA: {target} toplamları uzlaştırılamadı: {e}")
+            Trace.fail('reconcile', e, target=target)
+    return pd.concat(tables, ignore_index=True) if tables else pd.DataFrame(columns=OUTPUT_COLUMNS)
+
+
+def save_reconciled(df, path=OUTPUT_FILE):
+    if path.endswith('.parquet'):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False, encoding='utf-8-sig')
+    print(f"Uzlaştırılmış toplamlar {path} olarak kaydedildi ({len(df)} satır)")
+
+
+if __name__ == "__main__":
+    import argparse
+    from DataStore import load_dataset
+    from ForecastBackend import forecast_panel
+
+    parser = argparse.ArgumentParser(description="İl tahminlerini bölge ve Türkiye toplamlarına uzlaştırır "
+                                                 "(NumPy motoru, bütün iller tek seferde)")
+    parser.add_argument('--method', choices=METHODS, default=DEFAULT_METHOD)
+    parser.add_argument('--years', type=int, default=PREDICTION_YEARS)
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    Trace.start_run('Reconciliation')
+    df = load_dataset(INPUT_FILE)
+    targets = [col for col in ('y', 'GSYIH') if col in df.columns]
+    forecasts = {}
+    for target in targets:
+        # GSYİH verisi olmayan iller (hepsi 0) toplama girmez
+        df_target = df[df[target].notna() & (df[target] > 0)] if target != 'y' else df
+        forecasts[target] = forecast_panel(df_target, target, args.years)
+    save_reconciled(reconcile_targets(forecasts, df, args.method), args.output)
+    print(Trace.summary())
@@ -0,0 +1,210 @@
+import os
+import hashlib
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+from ForecastCache import series_hash
+import Trace
+
+# Parçaları birleştirmek için pypdf gerekir. Kurulu değilse TestAll sayfaları eskisi gibi tek PdfPages akışına çizer
+try:
+    from pypdf import PdfWriter
+except ImportError:
+    PdfWriter = None
+
+
+# Rapor sayfaları işçi süreçlerde çizilir ve her sayfa ayrı bir PDF parçası olarak yazılır; raporlar bu
+# parçaların il sırasıyla birleştirilmesiyle oluşur. Parça adı sayfanın girdilerinin özetidir, girdisi
+# değişmeyen ilin sayfası bir sonraki çalıştırmada yeniden çizilmez
+PAGE_DIR = '.rapor_sayfalari'
+# Sayfa düzeni değiştirilirse artırılır, eski parçalar geçersiz olur
+TEMPLATE_VERSION = 1
+PAGE_SIZES = {'nufus': (10, 7), 'gsyih': (10, 10)}
+
+# Her süreçte sayfa türü başına bir figür şablonu tutulur. Figür, eksenler ve alt not bir kez oluşturulur,
+# her sayfada sadece eksenler temizlenip yeniden çizilir
+_templates = {}
+
+
+def can_merge():
+    return PdfWriter is not None
+
+
+def _template(kind):
+    if kind not in _templates:
+        # matplotlib ilk sayfada içe aktarılır; bütün sayfaları önbellekten gelen çalıştırmalar onu yüklemez
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=PAGE_SIZES[kind])
+        if kind == 'nufus':
+            axes = [fig.add_subplot(1, 1, 1)]
+            note = fig.text(0.5, 0.01, '', ha="center", fontsize=10,
+                            bbox={"facecolor": "orange", "alpha": 0.2, "pad": 5})
+        else:
+            axes = list(fig.subplots(2, 1, gridspec_kw={'height_ratios': [1, 1]}))
+            note = None
+        _templates[kind] = (fig, axes, note)
+    fig, axes, note = _templates[kind]
+    for ax in axes:
+        ax.clear()
+    return fig, axes, note
+
+
+def population_figure(city, df_city, forecast_pop, years):
+    fig, (ax,), note = _template('nufus')
+    df_p = df_city[['ds', 'y']]
+
+    # Bulunan popülasyon görselleştirilir
+    ax.plot(df_p['ds'], df_p['y'], 'ko', label='Actual Data')
+    ax.plot(forecast_pop['ds'], forecast_pop['yhat'], 'b-', linewidth=2, label='Forecast')
+    ax.fill_between(forecast_pop['ds'], forecast_pop['yhat_lower'], forecast_pop['yhat_upper'],
+                    color='blue', alpha=0.2)
+
+    ax.set_title(f"{city} Popülasyon tahmini (Sonraki {years} yıl için)", fontsize=14, fontweight='bold')
+    ax.set_xlabel("Yıl")
+    ax.set_ylabel("Nüfus")
+    ax.grid(True, alpha=0.3)
+    ax.legend()
+
+    last_val = forecast_pop['yhat'].iloc[-1]
+    note.set_text(f"Tahmin edilen popülasyon: {forecast_pop['ds'].iloc[-1].year}: {int(last_val):,}")
+    return fig
+
+
+def gdp_figure(city, df_city, forecast_gdp, sector_cols):
+    fig, (ax1, ax2), _ = _template('gsyih')
+    df_g = df_city[['ds', 'GSYIH']].rename(columns={'GSYIH': 'y'})
+
+    # GDP tahmini için plot oluşturulur
+    ax1.plot(df_g['ds'], df_g['y'], 'go', label='Actual GDP')
+    ax1.plot(forecast_gdp['ds'], forecast_gdp['yhat'], 'g-', linewidth=2, label='GDP Forecast')
+    ax1.fill_between(forecast_gdp['ds'], forecast_gdp['yhat_lower'], forecast_gdp['yhat_upper'],
+                     color='green', alpha=0.2)
+    ax1.set_title(f"{city} - Economic Outlook (GSYIH)", fontsize=12, fontweight='bold')
+    ax1.set_ylabel("GDP Value (TL)")
+    ax1.grid(True, alpha=0.3)
+    ax1.legend()
+
+    # Sektör dağılımı için görselleştirme burada yapılır
+    df_sectors = df_city[['ds'] + sector_cols].dropna() if sector_cols else None
+    if df_sectors is None:
+        ax2.text(0.5, 0.5, "Sektör verisi yok", ha='center')
+    elif df_sectors.empty:
+        ax2.text(0.5, 0.5, "Yetersiz veri", ha='center')
+    else:
+        means = df_sectors[sector_cols].mean().sort_values(ascending=False)
+        top_5 = means.head(5).index.tolist()
+
+        x = df_sectors['ds']
+        y_stack = [df_sectors[col] for col in top_5]
+        labels = [col.replace('Pay_', '') for col in top_5]
+
+        ax2.stackplot(x, y_stack, labels=labels, alpha=0.7)
+        ax2.set_title(f"({city}) için en büyük 5 sektör", fontsize=12)
+        ax2.set_ylabel("Sektör Payı (%)")
+        ax2.set_xlabel("Yıl")
+        ax2.legend(loc='upper left', fontsize='small', framealpha=0.5)
+        ax2.grid(True, alpha=0.3)
+
+    fig.tight_layout()
+    return fig
+
+
+def build_figure(kind, city, df_city, forecast, option):
+    """option: nüfus sayfasında tahmin yılı sayısı, GSYİH sayfasında sektör sütunları."""
+    if kind == 'nufus':
+        return population_figure(city, df_city, forecast, option)
+    return gdp_figure(city, df_city, forecast, option)
+
+
+def page_key(kind, city, df_city, cols, settings):
+    """Sayfanın girdilerinin özeti: il verisi (ilgili sütunlar), ayarlar ve şablon sürümü."""
+    h = hashlib.sha1(f"{kind}|{city}|{settings}|{TEMPLATE_VERSION}".encode('utf-8'))
+    h.update(series_hash(df_city, cols).encode('utf-8'))
+    return h.hexdigest()
+
+
+def fragment_path(kind, key, page_dir=PAGE_DIR):
+    return os.path.join(page_dir, f"{kind}_{key}.pdf")
+
+
+def forecast_path(fragment):
+    """Sayfada çizilen tahmin tablosunun parçanın yanında tutulduğu dosya. Toplamlar (Reconciliation)
+    sayfası yeniden çizilmeyen illerde de bu tablodan, sayfadaki değerlerle hesaplanır."""
+    return os.path.splitext(fragment)[0] + '.parquet'
+
+
+def render_page(kind, city, df_city, forecast, option, path):
+    """Tek bir sayfayı çizip parça dosyasına yazar; (yol, hata) döner. İşçi süreçte çalışır."""
+    target = 'y' if kind == 'nufus' else 'GSYIH'
+    try:
+        with Trace.span('plot', province=city, target=target):
+            fig = build_figure(kind, city, df_city, forecast, option)
+        with Trace.span('savefig', province=city, target=target):
+            # Yarım yazılmış parça birleştirmeye girmesin diye önce geçici dosyaya yazılır
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            fig.savefig(tmp_path, format='pdf')
+            os.replace(tmp_path, path)
+        return path, None
+    except Exception as e:
+        Trace.fail('plot', e, province=city, target=target)
+        return None, f"{city} için sayfa çizilemedi ({kind}): {e}"
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg')
+    warnings.filterwarnings('ignore')
+
+
+class PageRenderer:
+    """Sayfa çizim işlerini işçi süreç havuzunda (workers <= 1 ise ana süreçte) çalıştırır."""
+
+    def __init__(self, workers=1):
+        self.workers = workers
+        self.executor = None
+        self.pending = []
+
+    def __enter__(self):
+        if self.workers > 1:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        return self
+
+    def __exit__(self, *exc):
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    def submit(self, kind, city, df_city, forecast, option, path):
+        if self.executor is None:
+            self.pending.append(render_page(kind, city, df_city, forecast, option, path))
+        else:
+            self.pending.append(self.executor.submit(render_page, kind, city, df_city, forecast, option, path))
+
+    def results(self):
+        """Bütün işler bitene kadar bekler; (yol, hata) listesi döner."""
+        out = [p if isinstance(p, tuple) else p.result() for p in self.pending]
+        self.pending = []
+        return out
+
+
+def merge_fragments(paths, out_path):
+    """Parçaları verilen sırayla tek PDF'te birleştirir."""
+    writer = PdfWriter()
+    for path in paths:
+        writer.append(path)
+    # Her parça kendi yazı tipi ve ortak kaynaklarını taşır; birebir aynı nesneler tek kopyaya indirilir
+    writer.compress_identical_objects()
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        writer.write(f)
+    writer.close()
+    os.replace(tmp_path, out_path)
+
+
+def prune_fragments(keep, page_dir=PAGE_DIR):
+    """Artık hiçbir rapora girmeyen eski parçaları ve tahmin tablolarını siler."""
+    keep = {os.path.abspath(p) for p in keep} | {os.path.abspath(forecast_path(p)) for p in keep}
+    for name in os.listdir(page_dir):
+        path = os.path.abspath(os.path.join(page_dir, name))
+        if name.endswith(('.pdf', '.parquet')) and path not in keep:
+            os.remove(path)
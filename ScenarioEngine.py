@@ -0,0 +1,190 @@
+import numpy as np
+import pandas as pd
+import warnings
+import logging
+
+from DataStore import load_dataset
+from ForecastCache import ForecastCache, cached_baseline, MAX_HORIZON_YEARS
+from ForecastBackend import forecast_panel, DEFAULT_BACKEND
+
+warnings.filterwarnings('ignore')
+logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+logging.getLogger('prophet').setLevel(logging.WARNING)
+
+
+INPUT_FILE = 'Prophet_Training_Set_Sektorlu.parquet'
+OUTPUT_FILE = 'Senaryo_Kupu.npz'
+
+# Dashboard'daki olay tipleri ve hangi hedefleri etkiledikleri
+EVENT_TYPES = ["Economic Crash (GDP)", "Population Decline", "Both"]
+TARGETS = ['Nufus', 'GSYIH']
+EVENT_TARGETS = {
+    "Economic Crash (GDP)": ['GSYIH'],
+    "Population Decline": ['Nufus'],
+    "Both": ['Nufus', 'GSYIH'],
+}
+BANDS = ['yhat', 'yhat_lower', 'yhat_upper']
+
+# Varsayılan tarama ızgarası: 2024-2050 arası olay yılları, %5-%90 arası şiddet
+DEFAULT_EVENT_YEARS = list(range(2024, 2051))
+DEFAULT_SEVERITIES = [s / 100 for s in range(5, 95, 5)]
+
+
+def event_affects(event_type, is_gdp):
+    return ('GSYIH' if is_gdp else 'Nufus') in EVENT_TARGETS.get(event_type, [])
+
+
+def apply_crash(forecast, c_year, c_sev):
+    """Tek bir senaryoyu tahmin tablosuna uygular: olay yılından itibaren bütün bantlar (1 - şiddet) ile çarpılır."""
+    forecast = forecast.copy()
+    mask = forecast['ds'].dt.year >= c_year
+    forecast.loc[mask, BANDS] *= (1 - c_sev)
+    return forecast
+
+
+class ScenarioCube:
+    """Senaryo ızgarasının sonuçları.
+
+    Sonuçların tamamı (il x olay x yıl x şiddet x hedef x zaman x bant) çok büyük olacağı için açıkça saklanmaz.
+    Temel tahminler (il x hedef x zaman x bant) ve çarpanlar (olay x yıl x şiddet x hedef x zaman) ayrı tutulur,
+    istenen dilim sorgu anında tek bir yayınlama (broadcast) çarpımıyla üretilir.
+    """
+
+    def __init__(self, provinces, years, baseline, event_types, event_years, severities):
+        self.provinces = list(provinces)
+        self.years = np.asarray(years)
+        self.baseline = baseline
+        self.event_types = list(event_types)
+        self.event_years = np.asarray(event_years)
+        self.severities = np.asarray(severities, dtype=float)
+
+        affects = np.array([[t in EVENT_TARGETS[e] for t in TARGETS] for e in self.event_types], dtype=float)
+        active = (self.years[None, :] >= self.event_years[:, None]).astype(float)
+        # (olay, yıl, şiddet, hedef, zaman)
+        self.factors = 1 - (self.severities[None, None, :, None, None]
+                            * affects[:, None, None, :, None]
+                            * active[None, :, None, None, :])
+
+    @property
+    def shape(self):
+        return (len(self.provinces), len(self.event_types), len(self.event_years), len(self.severities),
+                len(TARGETS), len(self.years))
+
+    def values(self, band='yhat', horizon_year=None):
+        """(il, olay, olay_yılı, şiddet, hedef, zaman) dizisi; horizon_year verilirse zaman ekseni o yıla indirgenir."""
+        b = BANDS.index(band)
+        base = self.baseline[..., b]
+        factors = self.factors
+        if horizon_year is not None:
+            t = int(np.flatnonzero(self.years == horizon_year)[0])
+            base = base[..., t]
+            factors = factors[..., t]
+        return base[:, None, None, None, ...] * factors[None, ...]
+
+    def query(self, province, event_type, event_year, severity):
+        """Tek bir il ve senaryo için tahmin tablosu (ds, Nufus_yhat, ..., GSYIH_yhat_upper)."""
+        p = self.provinces.index(province)
+        e = self.event_types.index(event_type)
+        y = int(np.flatnonzero(self.event_years == event_year)[0])
+        s = int(np.argmin(np.abs(self.severities - severity)))
+
+        out = pd.DataFrame({'ds': pd.to_datetime([f"{yr}-12-31" for yr in self.years])})
+        scaled = self.baseline[p] * self.factors[e, y, s][..., None]
+        for g, target in enumerate(TARGETS):
+            for b, band in enumerate(BANDS):
+                out[f"{target}_{band}"] = scaled[g, :, b]
+        return out
+
+    def sensitivity_table(self, target, event_type, horizon_year, province=None, band='yhat'):
+        """Olay yılı x şiddet tablosu. province verilmezse bütün illerin toplamı (Türkiye) alınır."""
+        g = TARGETS.index(target)
+        e = self.event_types.index(event_type)
+        vals = self.values(band=band, horizon_year=horizon_year)[:, e, :, :, g]
+        if province is None:
+            table = np.nansum(vals, axis=0)
+        else:
+            table = vals[self.provinces.index(province)]
+        return pd.DataFrame(table, index=pd.Index(self.event_years, name='Olay_Yili'),
+                            columns=pd.Index(np.round(self.severities * 100).astype(int), name='Siddet_%'))
+
+    def to_frame(self, horizon_year, band='yhat'):
+        """Belirli bir ufuk yılı için uzun formatlı tablo (grafik/filtreleme için)."""
+        vals = self.values(band=band, horizon_year=horizon_year)
+        idx = pd.MultiIndex.from_product(
+            [self.provinces, self.event_types, self.event_years, self.severities, TARGETS],
+            names=['İl', 'Olay', 'Olay_Yili', 'Siddet', 'Hedef'])
+        return pd.DataFrame({band: vals.ravel()}, index=idx).reset_index()
+
+    def save(self, path):
+        np.savez_compressed(path, provinces=np.asarray(self.provinces), years=self.years, baseline=self.baseline,
+                            event_types=np.asarray(self.event_types), event_years=self.event_years,
+                            severities=self.severities)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path, allow_pickle=False)
+        return cls(data['provinces'].tolist(), data['years'], data['baseline'], data['event_types'].tolist(),
+                   data['event_years'], data['severities'])
+
+
+def baseline_array(baselines):
+    """{il: {hedef: tahmin_tablosu}} sözlüğünü (il x hedef x zaman x bant) dizisine çevirir.
+
+    Eksik il/hedef/yıl kombinasyonları NaN olarak kalır.
+    """
+    provinces = sorted(baselines)
+    years = sorted({int(y) for per_target in baselines.values() for fc in per_target.values()
+                    for y in fc['ds'].dt.year})
+    year_pos = {y: i for i, y in enumerate(years)}
+
+    out = np.full((len(provinces), len(TARGETS), len(years), len(BANDS)), np.nan)
+    for p, province in enumerate(provinces):
+        for g, target in enumerate(TARGETS):
+            fc = baselines[province].get(target)
+            if fc is None:
+                continue
+            cols = [year_pos[int(y)] for y in fc['ds'].dt.year]
+            out[p, g, cols, :] = fc[BANDS].to_numpy(dtype=float)
+    return provinces, np.asarray(years), out
+
+
+def run_scenario_grid(baselines, event_types=EVENT_TYPES, event_years=DEFAULT_EVENT_YEARS,
+                      severities=DEFAULT_SEVERITIES):
+    """Her il için tek temel tahminden bütün (olay, yıl, şiddet) kombinasyonlarını değerlendirir."""
+    provinces, years, baseline = baseline_array(baselines)
+    return ScenarioCube(provinces, years, baseline, event_types, event_years, severities)
+
+
+def collect_baselines(df, cache, backend=DEFAULT_BACKEND):
+    """Önbellekteki (yoksa yeni eğitilen) 30 yıllık nüfus ve GSYİH temel tahminlerini toplar.
+
+    backend='numpy' ise bütün iller tek bir toplu trend çözümüyle tahmin edilir, önbellek kullanılmaz.
+    """
+    gdp_col = 'GSYIH_USD' if 'GSYIH_USD' in df.columns else 'GSYIH'
+    if backend == 'numpy':
+        panels = {target: forecast_panel(df, col, MAX_HORIZON_YEARS)
+                  for target, col in (('Nufus', 'y'), ('GSYIH', gdp_col))}
+        return {city: {target: panels[target][city] for target in panels if city in panels[target]}
+                for city in sorted(df['İl'].unique())}
+
+    baselines = {}
+    for city, df_city in df.groupby('İl', sort=True):
+        df_city = df_city.sort_values('ds')
+        baselines[city] = {}
+        for target, col in (('Nufus', 'y'), ('GSYIH', gdp_col)):
+            if len(df_city) < 2 or (col != 'y' and df_city[col].sum() <= 0):
+                continue
+            df_p = df_city[['ds', col]].rename(columns={col: 'y'})
+            try:
+                baselines[city][target] = cached_baseline(cache, city, col, df_p)['forecast']
+            except Exception as e:
+                print(f"{city} için {target} temel tahmini alınamadı: {e}")
+    return baselines
+
+
+if __name__ == "__main__":
+    df = load_dataset(INPUT_FILE)
+    cube = run_scenario_grid(collect_baselines(df, ForecastCache()))
+    cube.save(OUTPUT_FILE)
+    print(f"{np.prod(cube.shape):,} senaryo değeri hesaplandı, {OUTPUT_FILE} olarak kaydedildi")
+    print(cube.sensitivity_table('Nufus', 'Population Decline', int(cube.years.max())).iloc[::5, ::3])
@@ -0,0 +1,442 @@
+import os
+import json
+import html
+import hashlib
+import shutil
+import argparse
+import warnings
+import logging
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from DataStore import iter_provinces
+from ForecastCache import ForecastCache, cached_baseline, slice_horizon, series_hash, MAX_HORIZON_YEARS, \
+    BASELINE_UNCERTAINTY
+from ForecastStore import ForecastStore, main_sectors, sector_hash, STORE_FILE
+from ForecastBackend import BACKENDS, DEFAULT_BACKEND, DEFAULT_UNCERTAINTY, FORECAST_COLS, forecast_horizon
+from BatchTrend import forecast_sector_shares
+from ProvinceKeys import name_key
+import Trace
+
+warnings.filterwarnings('ignore')
+logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+logging.getLogger('prophet').setLevel(logging.WARNING)
+
+
+# Dashboard'un (app.py) statik karşılığı. Her ilin nüfus, GSYİH ve sektör kompozisyonu grafikleri standart
+# ufuklar için önceden SVG olarak çizilir ve düz HTML sayfalarına yerleştirilir; site herhangi bir dosya
+# sunucusundan yayınlanır, ziyaretçi başına model veya çizim çalışmaz. index.json il listesini, özet değerleri
+# ve her ilin veri dosyasını (geçmiş + tahmin) gösterir. İl anahtarı girdilerin özetidir; verisi değişmeyen ilin
+# sayfası bir sonraki dışa aktarımda yeniden çizilmez
+INPUT_FILE = 'Prophet_Training_Set_Sektorlu.parquet'
+SITE_DIR = 'statik_site'
+INDEX_FILE = 'index.json'
+PROVINCE_DIR = 'il'
+# Dashboard'daki slider'ın 1-30 aralığı yerine önceden çizilen ufuklar (yıl)
+HORIZONS = [5, 10, 20, 30]
+# İl sayfasını etkileyen sütunlar; sektör payları ayrıca province_key'e girer
+SITE_INPUT_COLS = ['ds', 'y', 'GSYIH', 'GSYIH_USD']
+# Tahmin motoru: 'prophet' veya 'numpy' (ForecastBackend.BACKENDS). Prophet'te önce tahmin deposuna bakılır
+BACKEND = DEFAULT_BACKEND
+WORKERS = os.cpu_count() or 1
+# Sayfa/grafik düzeni değiştirilirse artırılır, bütün iller yeniden çizilir
+TEMPLATE_VERSION = 1
+FIGURE_SIZES = {'nufus': (10, 6), 'gsyih': (10, 4), 'sektor': (10, 5)}
+# Kenar boşlukları sabittir; tight_layout her grafikte yazıları ölçtüğü için çizim süresinin üçte birini
+# alıyordu.
+# Sektör grafiğinin lejantı eksenlerin sağına taşar, ona yer bırakılır
+MARGINS = {'left': 0.1, 'right': 0.97, 'bottom': 0.1, 'top': 0.92}
+SECTOR_RIGHT = 0.78
+# Sayfa stili mevcut TÜİK nüfus raporundan (TUIK_Nufus_Raporu_*.html) alınmıştır
+STYLE = """
+body { font-family: Arial, sans-serif; margin: 20px; background: #f5f5f5; }
+.container { max-width: 1200px; margin: 0 auto; background: white; padding: 20px; border-radius: 10px; box-shadow: 0 0 10px rgba(0,0,0,0.1); }
+h1 { color: #2c3e50; border-bottom: 3px solid #3498db; padding-bottom: 10px; }
+h2 { color: #34495e; margin-top: 30px; }
+table { width: 100%; border-collapse: collapse; margin: 20px 0; }
+th { background: #3498db; color: white; padding: 12px; text-align: left; }
+td { padding: 10px; border-bottom: 1px solid #ddd; }
+tr:hover { background: #f8f9fa; }
+.stat-box { display: inline-block; background: #ecf0f1; padding: 15px; margin: 10px; border-radius: 5px; }
+.number { font-size: 24px; font-weight: bold; color: #2c3e50; }
+.label { color: #7f8c8d; margin-top: 5px; }
+.tabs a { display: inline-block; padding: 8px 14px; margin-right: 4px; background: #ecf0f1; border-radius: 5px; color: #2c3e50; text-decoration: none; }
+.horizon { display: none; }
+.horizon:target, .horizon.default { display: block; }
+.horizon:target ~ .horizon.default { display: none; }
+img { max-width: 100%; }
+"""
+
+# Her süreçte grafik türü başına bir figür tutulur, her grafikte eksenler temizlenip yeniden çizilir
+_figures = {}
+_stores = {}
+
+
+def province_slug(city):
+    """İlin site içindeki klasör adı: Türkçe karakterleri sadeleştirilmiş ad ('İstanbul' -> 'istanbul')."""
+    return name_key(city) or hashlib.sha1(str(city).encode('utf-8')).hexdigest()[:8]
+
+
+def gdp_column(df_city):
+    """Dashboard'la aynı seçim: USD sütunu varsa o, yoksa TL; değer yoksa None."""
+    col = 'GSYIH_USD' if 'GSYIH_USD' in df_city.columns else 'GSYIH'
+    return col if col in df_city.columns and df_city[col].sum() > 0 else None
+
+
+def province_key(df_city, backend=BACKEND, horizons=HORIZONS):
+    """İl sayfasının girdilerinin özeti: çizilen sütunlar, motor, ufuklar, aralık modu ve şablon sürümü."""
+    cols = SITE_INPUT_COLS + main_sectors(df_city.columns)
+    # _baseline'ın gerçekten kullandığı mod: Prophet'te depo/önbellek temel tahmininin modu
+    uncertainty = BASELINE_UNCERTAINTY if backend == 'prophet' else DEFAULT_UNCERTAINTY
+    settings = (backend, tuple(horizons), uncertainty, TEMPLATE_VERSION)
+    h = hashlib.sha1(repr(settings).encode('utf-8'))
+    h.update(series_hash(df_city, cols).encode('utf-8'))
+    return h.hexdigest()
+
+
+def _store(path):
+    mtime = os.path.getmtime(path) if os.path.exists(path) else None
+    if path not in _stores or _stores[path][0] != mtime:
+        _stores[path] = (mtime, ForecastStore(path))
+    return _stores[path][1]
+
+
+def _baseline(city, df_city, col, backend, store_path):
+    # Dashboard'daki run_prophet ile aynı sıra: NumPy anında hesaplanır; Prophet'te depo, yoksa önbellek
+    df_p = df_city[['ds', col]].rename(columns={col: 'y'})
+    if backend != 'prophet':
+        return forecast_horizon(df_p, MAX_HORIZON_YEARS, backend)
+    baseline = _store(store_path).lookup(city, col, series_hash(df_p))
+    if baseline is None:
+        baseline = cached_baseline(ForecastCache(), city, col, df_p)['forecast']
+    return baseline
+
+
+def _sectors(city, df_city, sectors, store_path):
+    stored = _store(store_path).lookup_sectors(city, sectors, sector_hash(df_city, sectors))
+    return stored if stored is not None else forecast_sector_shares(df_city, sectors, MAX_HORIZON_YEARS)
+
+
+def _figure(kind):
+    if kind not in _figures:
+        # matplotlib sadece çizim yapan süreçte içe aktarılır
+        import matplotlib
+        from matplotlib.figure import Figure
+
+        # Yazılar SVG'de metin olarak kalır (her harf yol olarak gömülmez), dosyalar küçük olur
+        matplotlib.rcParams['svg.fonttype'] = 'none'
+        fig = Figure(figsize=FIGURE_SIZES[kind])
+        fig.subplots_adjust(**{**MARGINS, **({'right': SECTOR_RIGHT} if kind == 'sektor' else {})})
+        _figures[kind] = (fig, fig.add_subplot(1, 1, 1))
+    fig, ax = _figures[kind]
+    ax.clear()
+    return fig, ax
+
+
+def _forecast_svg(kind, history_ds, history_y, forecast, color, label):
+    fig, ax = _figure(kind)
+    ax.plot(history_ds, history_y, 'o', color='black' if kind == 'nufus' else color, label='History')
+    ax.plot(forecast['ds'], forecast['yhat'], '-', color=color, linewidth=2, label='Forecast')
+    ax.fill_between(forecast['ds'], forecast['yhat_lower'], forecast['yhat_upper'], color=color, alpha=0.2)
+    ax.set_ylabel(label)
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    return _svg(fig)
+
+
+def _sector_svg(table, plot_cols, last_history):
+    fig, ax = _figure('sektor')
+    ax.axvline(last_history, color='white', linestyle='--', linewidth=1.5, alpha=0.8)
+    ax.text(last_history, 5, ' Forecast Start', color='white', fontsize=9, ha='left')
+    ax.stackplot(table['ds'], [table[c] for c in plot_cols], labels=[c.replace('Pay_', '') for c in plot_cols],
+                 alpha=0.85)
+    ax.set_title("Tahmini ekonomik kompozisyon")
+    ax.set_ylabel("Share (%)")
+    ax.set_ylim(0, 100)
+    ax.legend(loc='upper left', fontsize='small', framealpha=0.6, bbox_to_anchor=(1, 1))
+    return _svg(fig)
+
+
+def _svg(fig):
+    import io
+
+    buf = io.StringIO()
+    # Sabit metadata: aynı grafik her seferinde aynı dosyayı verir
+    fig.savefig(buf, format='svg', metadata={'Date': None})
+    return buf.getvalue()
+
+
+def sector_table(shares, sectors, n_history, years):
+    """Dashboard'daki gibi: ufuktaki ortalamaya göre en büyük 5 sektör, kalanlar 'Others'."""
+    table = slice_horizon(shares, n_history, years)
+    top_5 = table[sectors].mean().sort_values(ascending=False).head(5).index.tolist()
+    table['Others'] = 100 - table[top_5].sum(axis=1)
+    return table, top_5 + ['Others']
+
+
+def _growth(forecast, years):
+    start, end = forecast['yhat'].iloc[-years - 1], forecast['yhat'].iloc[-1]
+    return float((end - start) / start * 100) if start else None
+
+
+def _records(forecast):
+    return [{'yil': int(ds.year), 'yhat': _round(yhat), 'alt': _round(lower), 'ust': _round(upper)}
+            for ds, yhat, lower, upper in forecast[FORECAST_COLS].itertuples(index=False)]
+
+
+def _round(value):
+    return None if value != value else round(float(value), 2)
+
+
+def _write(path, data):
+    # Yarım yazılmış dosya yayınlanmasın diye önce geçici dosyaya yazılır
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _horizon_sections(views, years_default):
+    # Sekmeler JavaScript'siz, CSS :target ile çalışır. Varsayılan ufuk en sona yazılır; başka bir ufuk
+    # seçilince '~' seçicisi onu gizleyebilsin diye
+    tabs = ' '.join(f'<a href="#h{years}">{years} yıl</a>' for years in views)
+    sections = []
+    for years, parts in sorted(views.items(), key=lambda item: item[0] == years_default):
+        css = 'horizon default' if years == years_default else 'horizon'
+        body = '\n'.join(f'<h2>{html.escape(title)}</h2>\n{metric}<img src="{src}" alt="{html.escape(title)}">'
+                         for title, metric, src in parts)
+        sections.append(f'<div class="{css}" id="h{years}">\n{body}\n</div>')
+    return f'<div class="tabs">{tabs}</div>\n' + '\n'.join(sections)
+
+
+def _page(title, body):
+    return (f'<!DOCTYPE html>\n<html lang="tr">\n<head>\n<meta charset="UTF-8">\n'
+            f'<meta name="viewport" content="width=device-width, initial-scale=1.0">\n'
+            f'<title>{html.escape(title)}</title>\n<style>{STYLE}</style>\n</head>\n<body>\n'
+            f'<div class="container">\n{body}\n</div>\n</body>\n</html>\n')
+
+
+def _stat(number, label):
+    return (f'<div class="stat-box"><div class="number">{html.escape(number)}</div>'
+            f'<div class="label">{html.escape(label)}</div></div>\n')
+
+
+# Grafik türü -> (başlık, metrikteki ad, çizgi rengi, eksen adı)
+PANELS = {'nufus': ("Nüfus Tahmini", "nüfus", 'blue', 'Nüfus'),
+          'gsyih': ("Ekonomik Tahmin", "GSYİH", 'green', 'GSYİH')}
+
+
+def _forecast_part(kind, out_dir, years, history_y, history_ds, forecast, summary, prefix, label=None):
+    # Grafiği yazar, özet değerleri summary'ye ekler; sayfadaki (başlık, metrik, dosya) üçlüsünü döner
+    title, name, color, axis = PANELS[kind]
+    last = forecast['yhat'].iloc[-1]
+    growth = _growth(forecast, years)
+    summary.update({kind: _round(last), f'{kind}_buyume_%': _round(growth)})
+    path = f"{kind}_{years}.svg"
+    _write(os.path.join(out_dir, path), _forecast_svg(kind, history_ds, history_y, forecast, color, label or axis))
+    change = f" ({growth:+.2f}%)" if growth is not None else ''
+    metric = (f"<p>Tahmini {name} ({forecast['ds'].iloc[-1].year}): "
+              f"<strong>{prefix}{int(last):,}</strong>{change}</p>\n")
+    return title, metric, path
+
+
+def render_province(city, df_city, key, site_dir=SITE_DIR, backend=BACKEND, horizons=HORIZONS,
+                    store_path=STORE_FILE):
+    """Bir ilin grafiklerini, veri dosyasını ve sayfasını yazar; (index kaydı, hata) döner.
+
+    İşçi süreçte çalışır; hata yakalanıp sonuçla birlikte döner, bir ilin hatası diğerlerini durdurmaz. Dosyalar
+    önce geçici klasöre yazılır ve klasör ancak bütün il bitince eskisinin yerine konur; çizim yarıda kalırsa
+    eski sayfa olduğu gibi durur.
+    """
+    slug = province_slug(city)
+    final_dir = os.path.join(site_dir, PROVINCE_DIR, slug)
+    out_dir = f"{final_dir}.{os.getpid()}.tmp"
+    try:
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.makedirs(out_dir)
+        n_history = df_city['ds'].nunique()
+        gdp_col = gdp_column(df_city)
+        sectors = main_sectors(df_city.columns) if gdp_col else []
+
+        with Trace.span('fit', province=city, target='y', backend=backend):
+            pop = _baseline(city, df_city, 'y', backend, store_path)
+            gdp = _baseline(city, df_city, gdp_col, backend, store_path) if gdp_col else None
+            shares = _sectors(city, df_city, sectors, store_path) if sectors else None
+
+        prefix = "$" if gdp_col == 'GSYIH_USD' else "₺"
+        views, summary = {}, {}
+        with Trace.span('plot', province=city):
+            for years in horizons:
+                parts, summary[years] = [], {}
+                f_pop = slice_horizon(pop, n_history, years)
+                parts.append(_forecast_part('nufus', out_dir, years, df_city['y'], df_city['ds'], f_pop,
+                                            summary[years], ''))
+                if gdp is not None:
+                    f_gdp = slice_horizon(gdp, n_history, years)
+                    parts.append(_forecast_part('gsyih', out_dir, years, df_city[gdp_col], df_city['ds'], f_gdp,
+                                                summary[years], prefix, gdp_col))
+                if shares is not None:
+                    table, plot_cols = sector_table(shares, sectors, n_history, years)
+                    name = f"sektor_{years}.svg"
+                    _write(os.path.join(out_dir, name), _sector_svg(table, plot_cols, df_city['ds'].max()))
+                    parts.append(("Sektör trendleri", '', name))
+                views[years] = parts
+
+        # Veri dosyası en uzun ufku taşır; kısa ufuklar bunun ilk satırlarıdır
+        data = {'il': city, 'anahtar': key, 'gecmis': {'yil': df_city['ds'].dt.year.astype(int).tolist(),
+                                                        'nufus': df_city['y'].astype(float).tolist()},
+                'tahmin': {'nufus': _records(slice_horizon(pop, n_history, max(horizons)))}}
+        if gdp is not None:
+            data['gecmis'][gdp_col] = df_city[gdp_col].astype(float).tolist()
+            data['tahmin'][gdp_col] = _records(slice_horizon(gdp, n_history, max(horizons)))
+        _write(os.path.join(out_dir, 'veri.json'), json.dumps(data, ensure_ascii=False))
+
+        last = df_city.iloc[-1]
+        stats = _stat(f"{int(last['y']):,}", f"Nüfus ({last['ds'].year})")
+        if gdp_col:
+            stats += _stat(f"{prefix}{int(last[gdp_col]):,}", f"GSYİH ({last['ds'].year})")
+        body = (f'<p><a href="../../index.html">← Bütün iller</a></p>\n<h1>{html.escape(city)}</h1>\n'
+                f'<div>\n{stats}</div>\n{_horizon_sections(views, horizons[0])}\n'
+                f'<p><a href="veri.json">Veri (JSON)</a></p>')
+        _write(os.path.join(out_dir, 'index.html'), _page(f"{city} - Tahminler", body))
+        _swap_dir(out_dir, final_dir)
+
+        entry = {'il': city, 'anahtar': key, 'sayfa': f"{PROVINCE_DIR}/{slug}/index.html",
+                 'veri': f"{PROVINCE_DIR}/{slug}/veri.json", 'ozet': {str(y): s for y, s in summary.items()}}
+        return entry, None
+    except Exception as e:
+        shutil.rmtree(out_dir, ignore_errors=True)
+        Trace.fail('site', e, province=city)
+        return None, f"{city} için sayfa üretilemedi: {e}"
+
+
+def _swap_dir(new_dir, final_dir):
+    # Dolu bir klasörün üzerine os.replace yapılamaz; eskisi önce kenara alınır, yenisi yerine konunca silinir
+    old_dir = f"{new_dir}.old"
+    if os.path.exists(final_dir):
+        os.replace(final_dir, old_dir)
+    os.replace(new_dir, final_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg')
+    warnings.filterwarnings('ignore')
+
+
+def _iter_render(pending, workers, **kwargs):
+    # Sonuçlar il sırasıyla döner
+    if workers <= 1:
+        for city, df_city, key in pending:
+            yield render_province(city, df_city, key, **kwargs)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        futures = [executor.submit(render_province, city, df_city, key, **kwargs) for city, df_city, key in pending]
+        for (city, _, _), future in zip(pending, futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                yield None, f"{city}: işçi süreç hatası: {e}"
+
+
+def load_index(site_dir=SITE_DIR):
+    path = os.path.join(site_dir, INDEX_FILE)
+    if not os.path.exists(path):
+        return {'iller': []}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _index_page(entries, horizons):
+    first = str(horizons[0])
+    rows = []
+    for e in entries:
+        s = e['ozet'].get(first, {})
+        # Özetinde bu ufuk olmayan kayıt tabloya yazılmaz; sayfası yine de yerinde durur
+        if s.get('nufus') is None:
+            continue
+        pop, gdp = (f"{s[k]:+.2f}%" if s.get(k) is not None else '-' for k in ('nufus_buyume_%', 'gsyih_buyume_%'))
+        rows.append(f"<tr><td><a href=\"{html.escape(e['sayfa'])}\"><strong>{html.escape(e['il'])}</strong></a></td>"
+                    f"<td>{int(s['nufus']):,}</td><td>{pop}</td><td>{gdp}</td></tr>")
+    total = sum(e['ozet'].get(first, {}).get('nufus') or 0 for e in entries)
+    body = (f"<h1>🇹🇷 Türkiye Nüfus ve GSYİH Tahminleri</h1>\n"
+            f"<p><strong>Oluşturulma:</strong> {datetime.now():%d.%m.%Y %H:%M}</p>\n"
+            f"<div>\n{_stat(f'{int(total):,}', f'{first} yıl sonra toplam nüfus')}"
+            f"{_stat(str(len(entries)), 'İl Sayısı')}</div>\n"
+            f"<h2>İller ({first} yıllık tahmin)</h2>\n<table>\n<tr><th>İl</th><th>Tahmini Nüfus</th>"
+            f"<th>Nüfus Değişimi</th><th>GSYİH Değişimi</th></tr>\n" + '\n'.join(rows) + "\n</table>\n"
+            f"<p><a href=\"{INDEX_FILE}\">Veri indeksi (JSON)</a></p>")
+    return _page("Türkiye Nüfus ve GSYİH Tahminleri", body)
+
+
+def export_site(input_path=INPUT_FILE, site_dir=SITE_DIR, workers=WORKERS, backend=BACKEND, horizons=HORIZONS,
+                store_path=STORE_FILE, force=False):
+    """Bütün illerin statik sayfalarını üretir ve hata listesini döner.
+
+    Anahtarı değişmeyen ve sayfası yerinde duran iller yeniden çizilmez, index.json'daki kaydı aynen alınır.
+    """
+    horizons = sorted(h for h in horizons if 1 <= h <= MAX_HORIZON_YEARS)
+    previous = {e['il']: e for e in load_index(site_dir)['iller']}
+    os.makedirs(os.path.join(site_dir, PROVINCE_DIR), exist_ok=True)
+
+    entries, pending = {}, []
+    with Trace.span('load', file=input_path):
+        for city, df_city in iter_provinces(input_path):
+            if len(df_city) < 2:
+                continue
+            key = province_key(df_city, backend, horizons)
+            old = previous.get(city)
+            page = os.path.join(site_dir, old['sayfa']) if old else None
+            if not force and old and old['anahtar'] == key and os.path.exists(page):
+                entries[city] = old
+            else:
+                pending.append((city, df_city, key))
+    print(f"{len(pending)} il çizilecek, {len(entries)} il değişmedi.")
+
+    errors = []
+    results = _iter_render(pending, workers, site_dir=site_dir, backend=backend, horizons=horizons,
+                           store_path=store_path)
+    for i, ((city, _, _), (entry, error)) in enumerate(zip(pending, results)):
+        if error:
+            print(f"HATA: {error}")
+            errors.append(error)
+            # Çizilemeyen ilin önceki sayfası, bu çalıştırmanın bütün ufuklarını içeriyorsa yerinde kalır ve
+            # indekste tutulur; ufuklar değiştiyse eski sayfa kaldırılır
+            old = previous.get(city)
+            if (old and os.path.exists(os.path.join(site_dir, old['sayfa']))
+                    and all(str(years) in old['ozet'] for years in horizons)):
+                entries[city] = old
+            continue
+        entries[entry['il']] = entry
+        print(f"[{i + 1}/{len(pending)}] {entry['il']} tamamlandı")
+
+    # Veride artık olmayan illerin klasörleri ve yarıda kalmış çalıştırmaların geçici klasörleri silinir
+    keep = {province_slug(city) for city in entries}
+    for name in os.listdir(os.path.join(site_dir, PROVINCE_DIR)):
+        if name not in keep:
+            shutil.rmtree(os.path.join(site_dir, PROVINCE_DIR, name), ignore_errors=True)
+
+    ordered = [entries[city] for city in sorted(entries)]
+    index = {'olusturulma': datetime.now().isoformat(timespec='seconds'), 'ufuklar': horizons,
+             'motor': backend, 'iller': ordered}
+    _write(os.path.join(site_dir, INDEX_FILE), json.dumps(index, ensure_ascii=False, indent=1))
+    _write(os.path.join(site_dir, 'index.html'), _index_page(ordered, horizons))
+    print(f"Statik site {site_dir} klasörüne yazıldı ({len(ordered)} il)")
+    return errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dashboard'un statik HTML/SVG karşılığını üretir")
+    parser.add_argument('--input', default=INPUT_FILE)
+    parser.add_argument('--output', default=SITE_DIR)
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    parser.add_argument('--backend', choices=BACKENDS, default=BACKEND)
+    parser.add_argument('--horizons', type=int, nargs='*', default=HORIZONS)
+    parser.add_argument('--force', action='store_true', help="Değişmeyen illeri de yeniden çizer")
+    args = parser.parse_args()
+
+    Trace.start_run('StaticSite')
+    export_site(args.input, args.output, args.workers, args.backend, args.horizons, force=args.force)
+    print(Trace.summary())
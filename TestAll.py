@@ -1,9 +1,18 @@
+import os
 import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_pdf import PdfPages
-from prophet import Prophet
 import warnings
 import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from DataStore import iter_provinces, dataset_columns
+from ForecastCache import cache_key
+from WarmStart import default_store
+import Trace
+from ForecastBackend import forecast_horizon, DEFAULT_BACKEND
+from Uncertainty import DEFAULT_MODE
+from ReportPages import (population_figure, gdp_figure, page_key, fragment_path, forecast_path, PageRenderer,
+                         merge_fragments, prune_fragments, can_merge, PAGE_DIR)
+from Reconciliation import reconcile_targets, save_reconciled, DEFAULT_METHOD
 
 # Hatalar supresslenir, temiz bir log için ayarlanır
 warnings.filterwarnings('ignore')
@@ -11,143 +20,287 @@ logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
 logging.getLogger('prophet').setLevel(logging.WARNING)
 
 
-INPUT_FILE = 'Prophet_Training_Set_Sektorlu.xlsx'
+INPUT_FILE = 'Prophet_Training_Set_Sektorlu.parquet'
 OUTPUT_PDF_POP = 'Rapor_1_Nufus_Tahminleri.pdf'
 OUTPUT_PDF_GDP = 'Rapor_2_GSYIH_ve_Sektor_Analizi.pdf'
+# Sayfalardaki il tahminlerinden hesaplanan bölge ve Türkiye toplamları (Reconciliation)
+OUTPUT_TOTALS = 'Rapor_3_Toplamlar.csv'
 
 #Ayarlar
 PREDICTION_YEARS = 5
+# İl modellerini eğiten işçi süreç sayısı. 1 ise her şey ana süreçte sırayla yapılır
+WORKERS = 1
+# Rapor modellerini etkileyen sütunlar; önbellek anahtarı (il parmak izi) bunlardan hesaplanır
+REPORT_INPUT_COLS = ['ds', 'y', 'GSYIH']
+# Tahmin motoru: 'prophet' veya 'numpy' (ForecastBackend.BACKENDS)
+BACKEND = DEFAULT_BACKEND
+# Rapor sayfalarını çizen işçi süreç sayısı (ReportPages). 1 ise sayfalar ana süreçte çizilir
+RENDER_WORKERS = 1
+# Toplamların uzlaştırma yöntemi: 'bottom_up' (il sayfalarıyla birebir tutarlı) veya 'mint'
+RECONCILE_METHOD = DEFAULT_METHOD
+# Sayfalardaki güven bandının modu (Uncertainty.MODES). 'shared' bantları ortak çekimlerden hesaplar, Prophet'in
+# predict başına 1000 örneklik simülasyonu çalışmaz
+UNCERTAINTY = DEFAULT_MODE
+
+
+def fit_city_forecasts(city, df_city, backend=BACKEND):
+    """Bir ilin nüfus ve GSYİH modellerini eğitir, sadece tahmin tablolarını döner.
+
+    İşçi süreçlerde çalışır; çizim yapmaz. Hatalar yakalanıp sonuçla birlikte ana sürece gönderilir,
+    böylece bir ilin hatası diğer illeri durdurmaz.
+    """
+    result = {'city': city, 'pop': None, 'gdp': None, 'errors': []}
+    try:
+        df_p = df_city[['ds', 'y']].copy()
+        result['pop'] = forecast_horizon(df_p, PREDICTION_YEARS, backend, city, 'y', UNCERTAINTY)
+    except Exception as e:
+        result['errors'].append(f"{city} için popülasyon modeli hatası: {e}")
+        Trace.fail('fit', e, province=city, target='y')
 
-
-def generate_dual_reports(input_path, out_pop, out_gdp):
-    # Veri yüklenir
     try:
-        # Oluşturulan veri dosyası okunur
-        df = pd.read_excel(input_path, sheet_name='Iller_Verisi')
-        print(f"{df.shape}")
+        if _has_gdp(df_city):
+            df_g = df_city[['ds', 'GSYIH']].rename(columns={'GSYIH': 'y'}).copy()
+            result['gdp'] = forecast_horizon(df_g, PREDICTION_YEARS, backend, city, 'GSYIH', UNCERTAINTY)
+    except Exception as e:
+        result['errors'].append(f"{city} için hata: {e}")
+        Trace.fail('fit', e, province=city, target='GSYIH')
 
-        # Sektörler incelenir
-        sector_cols = [col for col in df.columns if col.startswith('Pay_')]
-        if sector_cols:
-            print(f"{len(sector_cols)} adet ekonomik bulundu: {sector_cols}")
+    return result
 
 
-    except Exception as e:
-        print(f"ERROR: Dosya: '{input_path}' okunamıyor. Çünkü: {e}")
-        return
+def draw_population_page(pdf, city, df_city, forecast_pop):
+    # Tek PdfPages akışına çizim (pypdf yoksa ve Benchmark için). Sayfa düzeni ReportPages'tedir
+    with Trace.span('plot', province=city, target='y'):
+        fig1 = population_figure(city, df_city, forecast_pop, PREDICTION_YEARS)
+    with Trace.span('savefig', province=city, target='y'):
+        pdf.savefig(fig1)
 
-    unique_cities = sorted(df['İl'].unique())
-    print(f"{len(unique_cities)} adet il bulundu. Analiz yapılıyor, lütfen bekleyiniz.")
 
-    with PdfPages(out_pop) as pdf_pop, PdfPages(out_gdp) as pdf_gdp:
+def draw_gdp_page(pdf, city, df_city, forecast_gdp, sector_cols):
+    with Trace.span('plot', province=city, target='GSYIH'):
+        fig2 = gdp_figure(city, df_city, forecast_gdp, sector_cols)
+    with Trace.span('savefig', province=city, target='GSYIH'):
+        pdf.savefig(fig2)
 
-        for i, city in enumerate(unique_cities):
-            print(f"[{i + 1}/{len(unique_cities)}] işlenmekte olan: {city}")
 
-            # Filter data for the specific city
-            df_city = df[df['İl'] == city].sort_values('ds').copy()
+def _report_key(city, df_city, backend):
+    return cache_key(city, f"rapor_{PREDICTION_YEARS}_{backend}_{UNCERTAINTY}", df_city, cols=REPORT_INPUT_COLS)
 
-            if len(df_city) < 2:
-                print(f"Yeterli veri olmadığından {city} atlanıyor.")
-                continue
 
+def _iter_city_forecasts(city_frames, workers, cache=None, backend=BACKEND):
+    # Sonuçlar her zaman il sırasıyla döner, böylece PDF sayfaları deterministik sırada yazılır.
+    # Önbellek verilirse (Pipeline) verisi değişmeyen iller yeniden eğitilmez
+    cached = {}
+    if cache is not None:
+        for city, df_city in city_frames:
+            hit = cache.get(_report_key(city, df_city, backend))
+            if hit is not None:
+                cached[city] = hit
 
-           #Nüfus tahmin raporu burada oluşturulur
+    def _store(city, df_city, result):
+        if cache is not None and not result['errors']:
+            cache.put(_report_key(city, df_city, backend), result)
+        return result
 
+    if workers <= 1:
+        for city, df_city in city_frames:
+            yield cached.get(city) or _store(city, df_city, fit_city_forecasts(city, df_city, backend))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {city: executor.submit(fit_city_forecasts, city, df_city, backend)
+                   for city, df_city in city_frames if city not in cached}
+        for city, df_city in city_frames:
+            if city in cached:
+                yield cached[city]
+                continue
             try:
-                # Veri hazırlanır
-                df_p = df_city[['ds', 'y']].copy()
+                yield _store(city, df_city, futures[city].result())
+            except Exception as e:
+                # İşçi sürecin kendisi çökerse (bellek vb.) sadece bu il atlanır
+                Trace.fail('worker', e, province=city)
+                yield {'city': city, 'pop': None, 'gdp': None, 'errors': [f"{city} için işçi süreç hatası: {e}"]}
 
-                m_pop = Prophet(yearly_seasonality=True, daily_seasonality=False, weekly_seasonality=False)
-                m_pop.fit(df_p)
 
-                future_pop = m_pop.make_future_dataframe(periods=PREDICTION_YEARS, freq='YE')
-                forecast_pop = m_pop.predict(future_pop)
+def _has_gdp(df_city):
+    return 'GSYIH' in df_city.columns and df_city['GSYIH'].sum() > 0
 
-                # Bulunan popülasyon görselleştirilir
-                fig1 = plt.figure(figsize=(10, 7))
 
-                plt.plot(df_p['ds'], df_p['y'], 'ko', label='Actual Data')
-                plt.plot(forecast_pop['ds'], forecast_pop['yhat'], 'b-', linewidth=2, label='Forecast')
-                plt.fill_between(forecast_pop['ds'], forecast_pop['yhat_lower'], forecast_pop['yhat_upper'],
-                                 color='blue', alpha=0.2)
+def _collect(forecasts, result):
+    if result['pop'] is not None:
+        forecasts['y'][result['city']] = result['pop']
+    if result['gdp'] is not None:
+        forecasts['GSYIH'][result['city']] = result['gdp']
 
-                plt.title(f"{city} Popülasyon tahmini (Sonraki {PREDICTION_YEARS} yıl için)", fontsize=14,
-                          fontweight='bold')
-                plt.xlabel("Yıl")
-                plt.ylabel("Nüfus")
-                plt.grid(True, alpha=0.3)
-                plt.legend()
 
-                last_val = forecast_pop['yhat'].iloc[-1]
-                plt.figtext(0.5, 0.01, f"Tahmin edilen popülasyon: {future_pop['ds'].iloc[-1].year}: {int(last_val):,}",
-                            ha="center", fontsize=10, bbox={"facecolor": "orange", "alpha": 0.2, "pad": 5})
+def _save_forecast(forecast, fragment):
+    # Sayfadaki tahmin (toplamlar için) parçayla aynı adla saklanır
+    forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].to_parquet(forecast_path(fragment), index=False)
 
-                pdf_pop.savefig(fig1)
-                plt.close(fig1)
-            except Exception as e:
-                print(f"{city} için popülasyon modeli hatası: {e}")
+
+def _print_result(i, total, result):
+    print(f"[{i + 1}/{total}] işlenmekte olan: {result['city']}")
+    for error in result['errors']:
+        print(error)
+
+
+def _write_reports_serial(city_frames, out_pop, out_gdp, sector_cols, workers, cache, backend):
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    frames_by_city = dict(city_frames)
+    forecasts = {'y': {}, 'GSYIH': {}}
+    failed = set()
+
+    with PdfPages(out_pop) as pdf_pop, PdfPages(out_gdp) as pdf_gdp:
+
+        for i, result in enumerate(_iter_city_forecasts(city_frames, workers, cache, backend)):
+            city = result['city']
+            df_city = frames_by_city[city]
+            _print_result(i, len(city_frames), result)
+            _collect(forecasts, result)
+            if result['errors']:
+                failed.add(city)
+
+           #Nüfus tahmin raporu burada oluşturulur
+            if result['pop'] is not None:
+                try:
+                    draw_population_page(pdf_pop, city, df_city, result['pop'])
+                except Exception as e:
+                    print(f"{city} için popülasyon modeli hatası: {e}")
+                    Trace.fail('plot', e, province=city, target='y')
+                    failed.add(city)
 
             #Sektör dağılımı ve GPD analizi bu kısımda yapılır.
+            if result['gdp'] is not None:
+                try:
+                    draw_gdp_page(pdf_gdp, city, df_city, result['gdp'], sector_cols)
+                except Exception as e:
+                    print(f"{city} için hata: {e}")
+                    Trace.fail('plot', e, province=city, target='GSYIH')
+                    failed.add(city)
+            elif not result['errors']:
+                print(f"{city} için veri yok")
+    return forecasts, failed
+
+
+def _write_reports_paged(city_frames, out_pop, out_gdp, sector_cols, workers, cache, backend, render_workers):
+    """Sayfalar işçi süreçlerde ayrı parçalar olarak çizilir ve il sırasıyla birleştirilir.
+
+    Parçası diskte duran (girdisi değişmemiş) illerin modeli yeniden eğitilmez, sayfası yeniden çizilmez;
+    bu illerin tahminleri parçanın yanındaki tablodan okunur. ({hedef: {il: tahmin}}, başarısız iller) döner.
+    """
+    os.makedirs(PAGE_DIR, exist_ok=True)
+    settings = (backend, PREDICTION_YEARS, UNCERTAINTY)
+    paths = {}
+    for city, df_city in city_frames:
+        paths[city] = {
+            'nufus': fragment_path('nufus', page_key('nufus', city, df_city, ['ds', 'y'], settings)),
+            'gsyih': fragment_path('gsyih', page_key('gsyih', city, df_city, ['ds', 'GSYIH'] + sector_cols,
+                                                     settings)) if _has_gdp(df_city) else None,
+        }
+
+    todo = [(city, df_city) for city, df_city in city_frames
+            if not all(p is None or (os.path.exists(p) and os.path.exists(forecast_path(p)))
+                       for p in paths[city].values())]
+    print(f"{len(city_frames) - len(todo)} ilin sayfaları değişmedi, {len(todo)} il için sayfa çizilecek.")
+
+    todo_frames = dict(todo)
+    failed = set()
+    with PageRenderer(render_workers) as renderer:
+        # Eğitim sonuçları geldikçe çizim işleri gönderilir; çizim ve eğitim aynı anda ilerler
+        for i, result in enumerate(_iter_city_forecasts(todo, workers, cache, backend)):
+            city = result['city']
+            df_city = todo_frames[city]
+            _print_result(i, len(todo), result)
+            if result['errors']:
+                failed.add(city)
+
+            if result['pop'] is not None:
+                _save_forecast(result['pop'], paths[city]['nufus'])
+                renderer.submit('nufus', city, df_city, result['pop'], PREDICTION_YEARS, paths[city]['nufus'])
+            if result['gdp'] is not None:
+                _save_forecast(result['gdp'], paths[city]['gsyih'])
+                renderer.submit('gsyih', city, df_city, result['gdp'], sector_cols, paths[city]['gsyih'])
+            elif not result['errors']:
+                print(f"{city} için veri yok")
+
+        for _, error in renderer.results():
+            if error:
+                print(error)
+
+    # Sayfası çizilemeyen iller de başarısız sayılır (parçası diskte yoktur)
+    failed.update(city for city, _ in todo
+                  if any(p is not None and not os.path.exists(p) for p in paths[city].values()))
+
+    for kind, out_path in (('nufus', out_pop), ('gsyih', out_gdp)):
+        fragments = [paths[city][kind] for city, _ in city_frames
+                     if paths[city][kind] is not None and os.path.exists(paths[city][kind])]
+        with Trace.span('merge_pdf', file=out_path, pages=len(fragments)):
+            merge_fragments(fragments, out_path)
+
+    prune_fragments([p for per_city in paths.values() for p in per_city.values() if p is not None])
+
+    forecasts = {'y': {}, 'GSYIH': {}}
+    for city, _ in city_frames:
+        for kind, target in (('nufus', 'y'), ('gsyih', 'GSYIH')):
+            path = paths[city][kind]
+            if path is not None and os.path.exists(path) and os.path.exists(forecast_path(path)):
+                forecasts[target][city] = pd.read_parquet(forecast_path(path))
+    return forecasts, failed
+
+
+def generate_dual_reports(input_path, out_pop, out_gdp, workers=WORKERS, cache=None, backend=BACKEND,
+                          render_workers=RENDER_WORKERS, out_totals=OUTPUT_TOTALS, reconcile_method=RECONCILE_METHOD):
+    # Modeli veya sayfası üretilemeyen illerin listesini döner (Pipeline bunları değişmemiş saymaz);
+    # veri dosyası okunamazsa None
+    # Veri yüklenir
+    try:
+        # Oluşturulan veri dosyası okunur
+        # İller dosyanın il indeksinden tek tek okunur, her il için bütün tablo taranmaz
+        with Trace.span('load', file=input_path):
+            columns = dataset_columns(input_path)
+            city_frames = list(iter_provinces(input_path))
+        print(f"{sum(len(df_city) for _, df_city in city_frames)} satır, {len(columns)} sütun")
 
-            try:
-                if 'GSYIH' in df_city.columns and df_city['GSYIH'].sum() > 0:
-                    df_g = df_city[['ds', 'GSYIH']].rename(columns={'GSYIH': 'y'}).copy()
-
-                    m_gdp = Prophet(yearly_seasonality=True, daily_seasonality=False, weekly_seasonality=False)
-                    m_gdp.fit(df_g)
-
-                    future_gdp = m_gdp.make_future_dataframe(periods=PREDICTION_YEARS, freq='YE')
-                    forecast_gdp = m_gdp.predict(future_gdp)
-
-                    fig2, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 10), gridspec_kw={'height_ratios': [1, 1]})
-
-                    # GDP tahmini için plot oluşturulur
-                    ax1.plot(df_g['ds'], df_g['y'], 'go', label='Actual GDP')
-                    ax1.plot(forecast_gdp['ds'], forecast_gdp['yhat'], 'g-', linewidth=2, label='GDP Forecast')
-                    ax1.fill_between(forecast_gdp['ds'], forecast_gdp['yhat_lower'], forecast_gdp['yhat_upper'],
-                                     color='green', alpha=0.2)
-                    ax1.set_title(f"{city} - Economic Outlook (GSYIH)", fontsize=12, fontweight='bold')
-                    ax1.set_ylabel("GDP Value (TL)")
-                    ax1.grid(True, alpha=0.3)
-                    ax1.legend()
-
-                    # Sektör dağılımı için görselleştirme burada yapılır
-                    if sector_cols:
-                        df_sectors = df_city[['ds'] + sector_cols].dropna()
-
-                        if not df_sectors.empty:
-                            means = df_sectors[sector_cols].mean().sort_values(ascending=False)
-                            top_5 = means.head(5).index.tolist()
-
-                            x = df_sectors['ds']
-                            y_stack = [df_sectors[col] for col in top_5]
-                            labels = [col.replace('Pay_', '') for col in top_5]
-
-                            ax2.stackplot(x, y_stack, labels=labels, alpha=0.7)
-                            ax2.set_title(f"({city}) için en büyük 5 sektör", fontsize=12)
-                            ax2.set_ylabel("Sektör Payı (%)")
-                            ax2.set_xlabel("Yıl")
-                            ax2.legend(loc='upper left', fontsize='small', framealpha=0.5)
-                            ax2.grid(True, alpha=0.3)
-                        else:
-                            ax2.text(0.5, 0.5, "Yetersiz veri", ha='center')
-                    else:
-                        ax2.text(0.5, 0.5, "Sektör verisi yok", ha='center')
-
-                    plt.tight_layout()
-                    pdf_gdp.savefig(fig2)
-                    plt.close(fig2)
-                else:
-                    print(f"{city} için veri yok")
+        # Sektörler incelenir
+        sector_cols = [col for col in columns if col.startswith('Pay_')]
+        if sector_cols:
+            print(f"{len(sector_cols)} adet ekonomik bulundu: {sector_cols}")
 
-            except Exception as e:
-                print(f"{city} için hata: {e}")
+
+    except Exception as e:
+        print(f"ERROR: Dosya: '{input_path}' okunamıyor. Çünkü: {e}")
+        Trace.fail('load', e, file=input_path)
+        return
+
+    print(f"{len(city_frames)} adet il bulundu. Analiz yapılıyor, lütfen bekleyiniz.")
+
+    for city, df_city in city_frames:
+        if len(df_city) < 2:
+            print(f"Yeterli veri olmadığından {city} atlanıyor.")
+    city_frames = [(city, df_city) for city, df_city in city_frames if len(df_city) >= 2]
+
+    if not can_merge():
+        print("pypdf kurulu değil, sayfalar tek süreçte ve tek akışta çiziliyor.")
+        forecasts, failed = _write_reports_serial(city_frames, out_pop, out_gdp, sector_cols, workers, cache, backend)
+    else:
+        forecasts, failed = _write_reports_paged(city_frames, out_pop, out_gdp, sector_cols, workers, cache, backend,
+                                         render_workers)
+
+    # Bölge ve Türkiye toplamları sayfalardaki il tahminlerinden tek matris işlemiyle hesaplanır
+    if out_totals:
+        history = pd.concat([df_city for _, df_city in city_frames], ignore_index=True)
+        save_reconciled(reconcile_targets(forecasts, history, reconcile_method), out_totals)
 
     print("\nİşlem tamamlandı")
     print(f"Popülasyon raporu {out_pop} olarak kaydedildi")
     print(f"Ekonomi raporu {out_gdp} olarak kaydedildi")
+    if backend == 'prophet':
+        print(default_store().report())
+    return sorted(failed)
 
 
 if __name__ == "__main__":
-    generate_dual_reports(INPUT_FILE, OUTPUT_PDF_POP, OUTPUT_PDF_GDP)
\ No newline at end of file
+    Trace.start_run('TestAll')
+    generate_dual_reports(INPUT_FILE, OUTPUT_PDF_POP, OUTPUT_PDF_GDP, WORKERS)
+    print(Trace.summary())
\ No newline at end of file
@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+import pandas as pd
+
+
+# Aşama ve il bazında süre ölçümü. Her ölçüm (span) ve hata tek satırlık bir JSON kaydı olarak iz dosyasına
+# eklenir; Training, TestAll, PerformanceTest ve Pipeline aynı dosyaya yazar. Çalıştırma kimliği ve dosya yolu
+# ortam değişkeninde tutulur, böylece işçi süreçler de ana süreçle aynı çalıştırmaya yazar. start_run
+# çağrılmadıysa (dashboard, Benchmark, kütüphane olarak içe aktarma) hiçbir şey yazılmaz
+TRACE_FILE = 'Calisma_Izi.jsonl'
+TRACE = True
+# İz dosyası bu boyutu geçince yeni çalıştırma başlarken '.1' uzantısıyla bir kez döndürülür; diskte en fazla iki
+# dosya kalır ve bir çalıştırmanın kayıtları iki dosyaya bölünmez
+TRACE_MAX_BYTES = 8 << 20
+RUN_ENV = 'BITIRME_IZ_CALISMA'
+FILE_ENV = 'BITIRME_IZ_DOSYASI'
+
+_local = threading.local()
+
+
+def start_run(entry_point, path=TRACE_FILE):
+    """Yeni bir çalıştırma başlatır; bundan sonraki kayıtlar (alt süreçler dahil) bu kimlikle yazılır."""
+    run_id = f"{entry_point}-{time.strftime('%Y%m%d_%H%M%S')}-{os.getpid()}"
+    path = os.path.abspath(path)
+    try:
+        if os.path.getsize(path) > TRACE_MAX_BYTES:
+            os.replace(path, path + '.1')
+    except OSError:
+        pass
+    os.environ[RUN_ENV] = run_id
+    os.environ[FILE_ENV] = path
+    event('run_start', entry_point=entry_point)
+    return run_id
+
+
+def current_run():
+    return os.environ.get(RUN_ENV)
+
+
+def enabled():
+    return TRACE and current_run() is not None
+
+
+def _write(record):
+    if not enabled():
+        return
+    record = {'run': current_run(), 'pid': os.getpid(), 'time': time.time(), **record}
+    # Tek satır, tek write çağrısı: farklı süreçlerin eklemeleri birbirine karışmaz
+    with open(os.environ.get(FILE_ENV, TRACE_FILE), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+
+
+def event(kind, **fields):
+    _write({'kind': kind, **fields})
+
+
+def fail(stage, error, **fields):
+    """Yakalanıp geçilen bir hatayı kaydeder (konsola yazmaz)."""
+    _write({'kind': 'error', 'name': stage, 'error': str(error), 'error_type': type(error).__name__, **fields})
+
+
+@contextmanager
+def span(name, **fields):
+    """Bloğun süresini kaydeder. Blok hata verirse kayıt 'error' durumuyla yazılır ve hata yükseltilir.
+
+    province alanı taşıyan ve il taşıyan başka bir ölçümün içinde olmayan ölçümler 'province_root' olarak
+    işaretlenir; il toplamları sadece bunlardan hesaplanır (iç içe ölçümler iki kez sayılmaz).
+    """
+    if not enabled():
+        yield
+        return
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    parent = stack[-1] if stack else None
+    has_province = fields.get('province') is not None
+    in_province = any(outer for _, outer in stack)
+    stack.append((name, has_province))
+
+    status, error = 'ok', None
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        status, error = 'error', f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        stack.pop()
+        record = {'kind': 'span', 'name': name, 'seconds': seconds, 'status': status,
+                  'parent': parent[0] if parent else None,
+                  'province_root': has_province and not in_province, **fields}
+        if error:
+            record['error'] = error
+        _write(record)
+
+
+def load_trace(path=None, run_id=None):
+    """İz dosyasını tablo olarak okur; run_id verilirse sadece o çalıştırma."""
+    path = path or os.environ.get(FILE_ENV, TRACE_FILE)
+    records = []
+    for p in (path + '.1', path):
+        if os.path.exists(p):
+            with open(p, encoding='utf-8') as f:
+                records.extend(json.loads(line) for line in f if line.strip())
+    df = pd.DataFrame(records)
+    if run_id is not None and not df.empty:
+        df = df[df['run'] == run_id]
+    return df
+
+
+def summary(run_id=None, path=None, top=10):
+    """Çalıştırma sonu özeti: en yavaş aşamalar, en yavaş iller ve hata sayıları."""
+    df = load_trace(path, run_id or current_run())
+    if df.empty or 'kind' not in df.columns:
+        return "İz kaydı yok."
+
+    lines = []
+    spans = df[df['kind'] == 'span']
+    if not spans.empty:
+        stages = spans.groupby('name')['seconds'].agg(['count', 'sum', 'mean', 'max'])
+        stages = stages.sort_values('sum', ascending=False).head(top)
+        lines.append("En yavaş aşamalar (toplam sn):")
+        for name, row in stages.iterrows():
+            lines.append(f"  {name:<12} {row['sum']:>9.2f}  ({int(row['count'])} kez, ort. {row['mean']:.3f}, "
+                         f"en uzun {row['max']:.3f})")
+
+        if 'province' in spans.columns:
+            roots = spans[spans['province_root'] & spans['province'].notna()]
+            provinces = roots.groupby('province')['seconds'].sum().sort_values(ascending=False).head(top)
+            if not provinces.empty:
+                lines.append("En yavaş iller (toplam sn):")
+                for province, seconds in provinces.items():
+                    lines.append(f"  {province:<16} {seconds:>9.2f}")
+
+    # Yakalanıp geçilen hatalar (fail). Hata veren ölçümler zaten aşama tablosunda görünür
+    errors = df[df['kind'] == 'error']
+    if not errors.empty:
+        counts = errors.groupby('name').size().sort_values(ascending=False)
+        lines.append(f"Hatalar: {len(errors)} ({', '.join(f'{k}: {v}' for k, v in counts.items())})")
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    df = load_trace()
+    last = df['run'].dropna().iloc[-1] if not df.empty else None
+    print(f"Son çalıştırma: {last}")
+    print(summary(last))
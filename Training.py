@@ -1,24 +1,120 @@
 import pandas as pd
+import numpy as np
 import os
-import re
+
+from DataStore import save_dataset, export_excel, DATASET_SHEET, TOTAL_SHEET
+from ConvertToUsd import convert_currency
+from PopulationSource import read_population, apply_schema
+from ProvinceKeys import ProvinceKeys, UNMATCHED
+import Trace
+
+
+# GSYİH dosyasında her yıl bloğu 1 GSYİH + 11 sektör payı sütunundan oluşur, sıralama dosyadaki ile aynıdır
+SECTOR_COLS = ['Pay_Tarim', 'Pay_Sanayi', 'Pay_Imalat', 'Pay_Insaat', 'Pay_Hizmet', 'Pay_Bilgi',
+               'Pay_Finans', 'Pay_Gayrimenkul', 'Pay_Mesleki', 'Pay_Kamu', 'Pay_Diger']
+GDP_VALUE_COLS = ['GSYIH'] + SECTOR_COLS
+
+
+def parse_gdp_sector_file(gdp_file):
+    """TÜİK'in '|' ayrılmış GSYİH/sektör dosyasını tek geçişte okur.
+
+    Yıl başlık satırı ve şehir/sektör satır çiftleri bir kez bulunur, bütün GSYİH değerleri ve
+    sektör payları hücre hücre iloc yerine NumPy blokları olarak çekilir.
+    (veri, atlanan_hücreler) döner; atlanan hücreler İl_Ham, Yıl, Sütun, Ham_Değer ve Neden içerir.
+    """
+    df_raw = pd.read_csv(gdp_file, sep='|', header=None, dtype=str, encoding='utf-8-sig',
+                         skip_blank_lines=False)
+    raw = df_raw.to_numpy(dtype=object)
+    n_rows, n_cols = raw.shape
+
+    # Bütün tablo tek seferde düz bir seriye açılır: boşluk temizliği, sayıya çevirme ve yıl tespiti
+    # hücre hücre değil, tek vektörel işlemle yapılır. Sayı olmayan hücreler NaN olur
+    flat = pd.Series(raw.ravel(), dtype=object).str.strip()
+    stripped = flat.to_numpy(dtype=object).reshape(raw.shape)
+    numeric = pd.to_numeric(flat, errors='coerce').to_numpy(dtype=float).reshape(raw.shape)
+    is_year = flat.str.fullmatch(r'\d{4}').fillna(False).to_numpy(dtype=bool).reshape(raw.shape)
+
+    # Yıl başlığı: dört haneli yıl içeren ilk satır. Satır numarası hardcoding yapılmaz
+    header_rows = np.flatnonzero(is_year.any(axis=1))
+    if len(header_rows) == 0:
+        raise ValueError(f"'{gdp_file}' içinde yıl başlığı bulunamadı")
+    header_row = header_rows[0]
+    year_cols = np.flatnonzero(is_year[header_row])
+    years = stripped[header_row, year_cols].astype(int)
+
+    # Şehir satırı: başlıktan sonra ilk sütunu dolu olan satır. Sektör payları bir alt satırdadır
+    first_col = pd.Series(stripped[:, 0], dtype=object).fillna('')
+    city_rows = np.flatnonzero((first_col != '').to_numpy())
+    city_rows = city_rows[(city_rows > header_row) & (city_rows + 1 < n_rows)]
+    cities = raw[city_rows, 0]
+
+    # Sağ tarafa NaN dolgu eklenir, son yıl bloğu dosya sonunda kesik olsa da indeksler taşmaz
+    width = len(SECTOR_COLS) + 1
+    numeric = np.pad(numeric, ((0, 0), (0, width)), constant_values=np.nan)
+    stripped = np.pad(stripped, ((0, 0), (0, width)), constant_values=np.nan)
+
+    # (il, yıl, sütun) bloğu: 0. sütun şehir satırındaki GSYİH, 1..11 alt satırdaki sektör payları
+    rows = np.empty((len(city_rows), 1, width), dtype=int)
+    rows[..., 0] = city_rows[:, None]
+    rows[..., 1:] = city_rows[:, None, None] + 1
+    cols = year_cols[None, :, None] + np.arange(width)[None, None, :]
+    rows, cols = np.broadcast_arrays(rows, cols)
+
+    values = numeric[rows, cols]
+    raw_values = stripped[rows, cols]
+
+    n_cities, n_years = len(city_rows), len(year_cols)
+    df_gdp = pd.DataFrame(values.reshape(n_cities * n_years, width), columns=GDP_VALUE_COLS)
+    df_gdp.insert(0, 'İl_Ham', np.repeat(cities, n_years))
+    df_gdp.insert(1, 'Yıl', np.tile(years, n_cities))
+
+    # Sayıya çevrilemeyen hücrelerin raporu
+    bad = np.isnan(values)
+    city_idx, year_idx, col_idx = np.nonzero(bad)
+    bad_raw = raw_values[bad]
+    is_empty = pd.isna(bad_raw) | (bad_raw == '')
+    skipped = pd.DataFrame({
+        'İl_Ham': cities[city_idx],
+        'Yıl': years[year_idx],
+        'Sütun': np.asarray(GDP_VALUE_COLS)[col_idx],
+        'Ham_Değer': bad_raw,
+        'Neden': np.where(is_empty, 'boş', 'sayısal değil'),
+    })
+
+    return df_gdp, skipped
+
+
+def _report_unmatched(unmatched, source):
+    # Eşleşmeyen adlar sessizce atlanmaz, nedenleriyle özetlenir
+    if unmatched.empty:
+        return
+    print(f"   '{source}' içinde il tablosuyla eşleşmeyen {len(unmatched)} ad "
+          f"({int(unmatched['Satır'].sum())} satır):")
+    for row in unmatched.itertuples(index=False):
+        print(f"     {row.İl_Ham} ({row.Neden}, {row.Satır} satır)")
+    Trace.event('unmatched_names', file=source, count=len(unmatched),
+                names=unmatched['İl_Ham'].astype(str).tolist())
 
 
-def prepare_data_for_prophet(input_file, gdp_file, output_file):
+def prepare_data_for_prophet(input_file, gdp_file, output_file, excel_file=None, currencies=('USD',),
+                             real_base_year=None):
 
 
 
-    # Adım 1: Uygulama 81 il için olan nüfüus verilerini okumaya başlar.
+    # Adım 1: Uygulama 81 il için olan nüfüus verilerini okumaya başlar. CSV veya JSON kaynağı parça parça ve
+    # tipli okunur (kategorik il, int32 sayılar, float32 oranlar)
 
     if not os.path.exists(input_file):
         print(f"HATA: '{input_file}' bulunamadı.")
+        Trace.fail('load', FileNotFoundError(input_file))
         return
 
     try:
-        df_pop = pd.read_csv(input_file, encoding='utf-8-sig')
-        # Sütun isimlerindeki olası boşlukları temizle
-        df_pop.columns = df_pop.columns.str.strip()
+        with Trace.span('load', file=input_file):
+            df_pop = read_population(input_file)
     except Exception as e:
         print(f"HATA: Nüfus dosyası okunamadı: {e}")
+        Trace.fail('load', e, file=input_file)
         return
 
 
@@ -29,117 +125,77 @@ def prepare_data_for_prophet(input_file, gdp_file, output_file):
     if os.path.exists(gdp_file):
         print("Ekonomik veriler okunuyor")
         try:
-            df_raw = pd.read_csv(gdp_file, sep='|', header=None, engine='python')
-
-
-            years_row = df_raw.iloc[3] #Bu kısım yıl değerlerine bakar. Bu da hardcoding yapmadan farklı veri dosyları yüklesekde sıkıntı çıkmamasına olanak sağlar
-            year_indices = {}
-
-            for col_idx, val in enumerate(years_row):
-                if pd.notna(val) and str(val).strip().isdigit():
-                    year_indices[int(str(val).strip())] = col_idx
-
-            print(f"   Bulunan Yıllar: {min(year_indices.keys())} - {max(year_indices.keys())}")
-
-            # Şehirleri tarayan döngü burada. N = Şehir Adı + GSYIH Değerleri ve N+1 = Sektör Payları
-            # Bu şekilde 2şerli okur
-            gdp_data = []
-            max_rows = len(df_raw)
-
-            # 5'ten başlayıp dosya sonuna kadar 2'şer atlayarak gidiyoruz, tüm iller için
-
-                # Dosya sonu kontrolü
-                if row_idx + 1 >= max_rows:
-                    break
-
-                # Şehir adını al
-                raw_city = str(df_raw.iloc[row_idx, 0])
-                if raw_city == 'nan' or not raw_city.strip():
-                    continue
-
-                # Her yıl için veri çekilir
-                for year, start_col in year_indices.items():
-                    try:
-                        # GSYIH Değeri (Şehir satırında, yıl başlangıç sütununda)
-                        gdp_val = df_raw.iloc[row_idx, start_col]
-
-                        # Sektör Payları (Bir alt satırda, sırayla dizili)
-                        sector_shares = df_raw.iloc[row_idx + 1, start_col + 1: start_col + 12].values
-
-                        # Veri Sözlüğü
-                        entry = {
-                            'İl_Ham': raw_city,
-                            'Yıl': year,
-                            'GSYIH': gdp_val,
-                            # Sektörleri sırasıyla eşleştiriyoruz
-                            'Pay_Tarim': sector_shares[0],
-                            'Pay_Sanayi': sector_shares[1],
-                            'Pay_Imalat': sector_shares[2],
-                            'Pay_Insaat': sector_shares[3],
-                            'Pay_Hizmet': sector_shares[4],
-                            'Pay_Bilgi': sector_shares[5],
-                            'Pay_Finans': sector_shares[6],
-                            'Pay_Gayrimenkul': sector_shares[7],
-                            'Pay_Mesleki': sector_shares[8],
-                            'Pay_Kamu': sector_shares[9],
-                            'Pay_Diger': sector_shares[10]
-                        }
-                        gdp_data.append(entry)
-
-                    except Exception as e:
-                        # Yılın sütunu boşsa veya hata varsa atla
-                        continue
-
-            df_gdp_clean = pd.DataFrame(gdp_data)
-
-            # Sayısal Dönüşüm (Hata varsa 0 yap)
-            cols_to_numeric = ['GSYIH', 'Pay_Tarim', 'Pay_Sanayi', 'Pay_Imalat', 'Pay_Insaat',
-                               'Pay_Hizmet', 'Pay_Bilgi', 'Pay_Finans', 'Pay_Gayrimenkul',
-                               'Pay_Mesleki', 'Pay_Kamu', 'Pay_Diger']
-
-            for col in cols_to_numeric:
-                df_gdp_clean[col] = pd.to_numeric(df_gdp_clean[col], errors='coerce').fillna(0)
+            with Trace.span('parse', file=gdp_file):
+                df_gdp_clean, skipped = parse_gdp_sector_file(gdp_file)
+
+            years = df_gdp_clean['Yıl'].unique()
+            print(f"   Bulunan Yıllar: {years.min()} - {years.max()}")
+            if not skipped.empty:
+                # Atlanan hücreler artık sessizce yutulmuyor, nedenlerine göre özetlenir
+                print(f"   Atlanan hücre sayısı: {len(skipped)} "
+                      f"({skipped['Neden'].value_counts().to_dict()})")
+                Trace.event('skipped_cells', file=gdp_file, count=len(skipped),
+                            reasons=skipped['Neden'].value_counts().to_dict())
+
+            # Sayısal olmayan/boş hücreler 0 yapılır
+            df_gdp_clean[GDP_VALUE_COLS] = df_gdp_clean[GDP_VALUE_COLS].fillna(0)
 
             print(f"Toplam {len(df_gdp_clean)} veri noktası oluşturuldu.")
 
         except Exception as e:
             print(f"GDP dosyası işlenirken sorun oluştu: {e}")
+            Trace.fail('parse', e, file=gdp_file)
             return
     else:
         print(f"'{gdp_file}' dosyası bulunamadı. Sadece nüfus verisi kullanılacak.")
 
-    # Şehir isimlerini temizleme fonksiyonum. Örneğim Adana-1'i adana yapar
-    def clean_city_name(text):
-        if pd.isna(text): return ""
-        text = str(text).strip()
-        # Sondaki tire ve sayıyı sil (-1, -02 vb.)
-        text = re.sub(r'-\d+$', '', text)
-        # Türkçe karakterleri düzelt ve büyüt
-        text = text.replace('i', 'İ').upper()
-        return text
-
-    # Her iki tabloya da temizlenmiş isim anahtarı ekle
-    df_pop['İl_Key'] = df_pop['İl'].apply(clean_city_name)
-
-    if not df_gdp_clean.empty:
-        df_gdp_clean['İl_Key'] = df_gdp_clean['İl_Ham'].apply(clean_city_name)
-
-        # Nüfus tablosundaki her satıra uygun GDP verisini ekle
-        df_merged = pd.merge(df_pop,
-                             df_gdp_clean.drop(columns=['İl_Ham']),
-                             on=['İl_Key', 'Yıl'],
-                             how='left')
-        fill_cols = ['GSYIH'] + [c for c in df_gdp_clean.columns if c.startswith('Pay_')]
-        df_merged[fill_cols] = df_merged.groupby('İl_Key')[fill_cols].ffill().fillna(0)
-
-        df_final = df_merged
-    else:
-        df_final = df_pop
-        # Sütunlar eksik kalmasın diye boş ekle
-        df_final['GSYIH'] = 0
+    with Trace.span('merge'):
+        # İki taraf da il boyut tablosu üzerinden plaka koduna (İl_Kodu) çevrilir, birleştirme tamsayı kod
+        # üzerinden yapılır. Nüfus dosyası kodu zaten taşır; kendi (kod, ad) çiftleri tabloya eklenir, böylece
+        # ilçe düzeyindeki veya sentetik veriler de çözümlenir
+        if 'İl_Kodu' in df_pop.columns:
+            pairs = df_pop[['İl_Kodu', 'İl']].drop_duplicates()
+            keys = ProvinceKeys(zip(pairs['İl_Kodu'], pairs['İl']))
+        else:
+            keys = ProvinceKeys()
+            df_pop['İl_Kodu'], unmatched_pop = keys.resolve(df_pop['İl'])
+            _report_unmatched(unmatched_pop, input_file)
+            df_pop = df_pop[df_pop['İl_Kodu'] != UNMATCHED]
+
+        if not df_gdp_clean.empty:
+            # 'Adana-1' gibi adlar ek koduyla, diğerleri ad varyantlarıyla çözümlenir. Eşleşmeyen adlar
+            # raporlanır ve birleştirmeye girmez
+            df_gdp_clean['İl_Kodu'], unmatched_gdp = keys.resolve(df_gdp_clean['İl_Ham'])
+            _report_unmatched(unmatched_gdp, gdp_file)
+            df_gdp_clean = df_gdp_clean[df_gdp_clean['İl_Kodu'] != UNMATCHED]
+            df_gdp_clean['İl_Kodu'] = df_gdp_clean['İl_Kodu'].astype(df_pop['İl_Kodu'].dtype)
+            df_gdp_clean['Yıl'] = df_gdp_clean['Yıl'].astype(df_pop['Yıl'].dtype)
+
+            # Nüfus tablosundaki her satıra uygun GDP verisini ekle
+            df_merged = pd.merge(df_pop,
+                                 df_gdp_clean.drop(columns=['İl_Ham']),
+                                 on=['İl_Kodu', 'Yıl'],
+                                 how='left')
+
+            # GSYİH verisi olan illerde eksik yıllar önceki yılın değeriyle, kapsam öncesi yıllar 0 ile doldurulur.
+            # Hiç GSYİH verisi eşleşmeyen iller 0 ile doldurulmaz, boş (NaN) kalır ve raporlanır
+            fill_cols = ['GSYIH'] + [c for c in df_gdp_clean.columns if c.startswith('Pay_')]
+            has_gdp = df_merged['İl_Kodu'].isin(df_gdp_clean['İl_Kodu'].unique())
+            df_merged.loc[has_gdp, fill_cols] = (df_merged[has_gdp].groupby('İl_Kodu')[fill_cols]
+                                                 .ffill().fillna(0))
+            missing = sorted(df_merged.loc[~has_gdp, 'İl'].astype(str).unique())
+            if missing:
+                print(f"   GSYİH verisi eşleşmeyen {len(missing)} il: {', '.join(missing)}")
+                Trace.event('missing_gdp', file=gdp_file, count=len(missing), provinces=missing)
+
+            df_final = df_merged
+        else:
+            df_final = df_pop
+            # Sütunlar eksik kalmasın diye boş ekle
+            df_final['GSYIH'] = 0
 
     # Prophet için gerekli tarih sütunu
-    df_final['ds'] = pd.to_datetime(df_final['Yıl'].astype(str) + '-12-31')
+    df_final['ds'] = pd.to_datetime({'year': df_final['Yıl'], 'month': 12, 'day': 31})
     df_final['y'] = df_final['Toplam_Nüfus']
 
     # Ülke geneli özet
@@ -152,16 +208,29 @@ def prepare_data_for_prophet(input_file, gdp_file, output_file):
     df_total = df_final.groupby('ds').agg(agg_dict).reset_index()
 
     # İller Verisi bazlı veri
-    base_cols = ['ds', 'y', 'İl', 'Yıl', 'Kategori', 'Erkek', 'Kadın']
+    base_cols = ['ds', 'y', 'İl', 'İl_Kodu', 'Yıl', 'Kategori', 'Erkek', 'Kadın']
     econ_cols = ['GSYIH'] + [c for c in df_final.columns if c.startswith('Pay_')]
 
     final_cols = [c for c in base_cols + econ_cols if c in df_final.columns]
-    df_provinces = df_final[final_cols]
+    # Çıktı da aynı tipli şemayla yazılır (Parquet kategorik ve int32 tiplerini korur)
+    df_provinces = apply_schema(df_final[final_cols].copy())
+
+    # Para birimi ve reel değer dönüşümü burada, kaydetmeden önce yapılır (ayrı bir okuma/yazma turu gerekmez)
+    if 'GSYIH' in df_provinces.columns:
+        with Trace.span('currency'):
+            convert_currency(df_provinces, currencies, real_base_year)
+            df_total['Yıl'] = df_total['ds'].dt.year
+            convert_currency(df_total, currencies, real_base_year)
+
+    # Kaydetme kısmı. Ana çıktı Parquet, Excel sadece istenirse yazılır
+    with Trace.span('save', file=output_file):
+        out_path = save_dataset(df_provinces, output_file)
+        save_dataset(df_total, output_file, sheet_name=TOTAL_SHEET)
+    print(f"Veri seti {out_path} olarak kaydedildi")
 
-    # Kaydetme kısmı. Burada ki işlem çok karmaşık değil, hazır fonksiyonlar bize yardımcı oluyor
-    with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-        df_total.to_excel(writer, sheet_name='Turkiye_Toplam', index=False)
-        df_provinces.to_excel(writer, sheet_name='Iller_Verisi', index=False)
+    if excel_file:
+        with Trace.span('save_excel', file=excel_file):
+            export_excel({TOTAL_SHEET: df_total, DATASET_SHEET: df_provinces}, excel_file)
 
 
 
@@ -169,7 +238,13 @@ def prepare_data_for_prophet(input_file, gdp_file, output_file):
 # Son kontrol olaraktan dosya isimlerinin tam eşleştiğinden emin olmak için
 input_csv = 'TUIK_Nufus_Verileri_20251121_130158.csv'
 gdp_file = 'GayriSafiSektor.csv'
-output_excel = 'Prophet_Training_Set_Sektorlu.xlsx'
+output_file = 'Prophet_Training_Set_Sektorlu.parquet'
+output_excel = None  # Excel çıktısı da istenirse: 'Prophet_Training_Set_Sektorlu.xlsx'
+# GSYİH ve kişi başı GSYİH bu para birimlerine çevrilir; reel değerler için baz yıl verilebilir (ör. 2024)
+currencies = ('USD', 'EUR')
+real_base_year = None
 
 if __name__ == "__main__":
-    prepare_data_for_prophet(input_csv, gdp_file, output_excel)
\ No newline at end of file
+    Trace.start_run('Training')
+    prepare_data_for_prophet(input_csv, gdp_file, output_file, output_excel, currencies, real_base_year)
+    print(Trace.summary())
\ No newline at end of file
@@ -0,0 +1,110 @@
+from functools import lru_cache
+import numpy as np
+
+
+# Prophet'in güven aralığı (yhat_lower/yhat_upper) ayarı. Prophet her predict çağrısında varsayılan olarak 1000
+# örneklik bir gelecek trend simülasyonu yapar; yıllık seride bu, eğitimin kendisi kadar sürer. Her çağrı yeri
+# sadece kullandığı kadar aralık işini ister:
+#   'full':    Prophet'in kendi simülasyonu, FULL_SAMPLES örnek (Prophet'in varsayılanı)
+#   'reduced': aynı simülasyon, REDUCED_SAMPLES örnek
+#   'shared':  Prophet'in simülasyonu kapatılır. Aralıklar, bütün modeller, ufuklar ve senaryolar için ortak olan
+#              ve bir kez çekilip saklanan standart çekimlerden tek bir vektörel işlemle hesaplanır. Çekimler
+#              sabit tohumludur; aynı veri her çalıştırmada aynı aralığı verir
+#   'off':     aralık hesaplanmaz, yhat_lower/yhat_upper NaN olur (sadece yhat kullanan yerler için)
+MODES = ('full', 'reduced', 'shared', 'off')
+DEFAULT_MODE = 'shared'
+FULL_SAMPLES = 1000
+REDUCED_SAMPLES = 200
+SHARED_SAMPLES = 1000
+SHARED_SEED = 0
+
+
+def check_mode(mode):
+    if mode not in MODES:
+        raise ValueError(f"Bilinmeyen aralık modu: {mode} (seçenekler: {MODES})")
+    return mode
+
+
+def sample_count(mode):
+    """Moda karşılık gelen Prophet uncertainty_samples değeri (Prophet'in simülasyonu sadece full/reduced'da)."""
+    return {'full': FULL_SAMPLES, 'reduced': REDUCED_SAMPLES}.get(check_mode(mode), 0)
+
+
+def prophet_model(mode=DEFAULT_MODE):
+    """Dashboard ve raporlarla aynı ayarlı Prophet modeli; simülasyon örnek sayısı moda göre ayarlanır."""
+    from prophet import Prophet
+
+    return Prophet(yearly_seasonality=True, daily_seasonality=False, weekly_seasonality=False,
+                   uncertainty_samples=sample_count(mode))
+
+
+@lru_cache(maxsize=16)
+def _draws(steps, n_samples, seed):
+    # (adım x örnek) dizileri. Her dağılım kendi akışından satır satır üretildiği için kısa bir ufkun çekimleri,
+    # uzun ufkun çekimlerinin ilk satırlarıyla aynıdır
+    streams = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(3)]
+    change = streams[0].random((steps, n_samples))
+    shift = streams[1].laplace(0, 1, (steps, n_samples))
+    noise = streams[2].standard_normal((steps, n_samples))
+    for a in (change, shift, noise):
+        a.setflags(write=False)
+    return change, shift, noise
+
+
+def shared_draws(steps, n_samples=SHARED_SAMPLES, seed=SHARED_SEED):
+    """İlk 'steps' adımın ortak standart çekimleri: (değişim olasılığı için U(0,1), Laplace(0,1), N(0,1)).
+
+    Çekimler 2'nin kuvveti uzunlukta bir kez üretilip saklanır, daha kısa ufuklar bunların ilk satırlarını kullanır.
+    """
+    size = 1 << max(int(steps) - 1, 0).bit_length()
+    return tuple(a[:steps] for a in _draws(max(size, 1), n_samples, seed))
+
+
+def shared_interval(m, forecast, n_samples=SHARED_SAMPLES, seed=SHARED_SEED):
+    """Eğitilmiş (MAP) doğrusal Prophet modelinin tahmin tablosu için (yhat_lower, yhat_upper).
+
+    Prophet'in vektörel simülasyonuyla aynı üretici model kullanılır: gelecekteki her adımda olasılığı geçmişteki
+    kırılma sıklığı kadar olan, büyüklüğü Laplace(ortalama |delta|) dağılımlı eğim değişimleri ve bütün satırlara
+    N(0, sigma_obs) gözlem gürültüsü. Rastgele sayılar yerine ortak çekimler modelin parametreleriyle ölçeklenir.
+    """
+    t = ((forecast['ds'] - m.start) / m.t_scale).to_numpy(dtype=float)
+    future = t > 1
+    n_future = int(future.sum())
+    change, shift, noise = shared_draws(len(t), n_samples, seed)
+
+    trend = np.zeros((len(t), n_samples))
+    if n_future:
+        tf = t[future]
+        single_diff = np.diff(tf).mean() if n_future > 1 else np.diff(m.history['t']).mean()
+        likelihood = len(m.changepoints_t) * single_diff
+        mean_delta = np.mean(np.abs(m.params['delta'][0])) + 1e-8
+        steps = mean_delta * shift[:n_future] * (change[:n_future] < likelihood)
+        # Prophet'teki gibi her değişim iki adıma yarı yarıya dağıtılır, eğimden seviyeye iki kez toplanır
+        steps = (steps + np.vstack([np.zeros((1, n_samples)), steps[:-1]])) / 2
+        trend[future] = steps.cumsum(axis=0).cumsum(axis=0) * single_diff
+
+    sigma = float(np.ravel(m.params['sigma_obs'])[0])
+    multiplicative = forecast['multiplicative_terms'].to_numpy(dtype=float)[:, None]
+    draws = forecast['yhat'].to_numpy(dtype=float)[:, None] + m.y_scale * (trend * (1 + multiplicative)
+                                                                             + sigma * noise)
+    tail = (1 - m.interval_width) / 2 * 100
+    lower, upper = np.percentile(draws, [tail, 100 - tail], axis=1)
+    return lower, upper
+
+
+def predict(m, future, mode=DEFAULT_MODE):
+    """m.predict(future); yhat_lower/yhat_upper moda göre (Prophet simülasyonu, ortak çekimler veya NaN).
+
+    Eğitilmiş model başka bir modla da tahmin yapabilir; örnek sayısı çağrı süresince moda göre ayarlanır.
+    """
+    samples, m.uncertainty_samples = m.uncertainty_samples, sample_count(mode)
+    try:
+        forecast = m.predict(future)
+    finally:
+        m.uncertainty_samples = samples
+    if mode == 'shared':
+        forecast['yhat_lower'], forecast['yhat_upper'] = shared_interval(m, forecast)
+    elif mode == 'off':
+        forecast['yhat_lower'] = np.nan
+        forecast['yhat_upper'] = np.nan
+    return forecast
@@ -0,0 +1,201 @@
+import os
+import re
+import json
+import time
+import numpy as np
+import pandas as pd
+
+
+# Aynı ilin serisi defalarca, neredeyse aynı veriyle yeniden eğitiliyor (TestAll, dashboard). CV kesimleri
+# bu kaydı kullanmaz: bütün geçmişle bulunan parametreler, kesimin tahmin ettiği yılları görmüş olur.
+# Her eğitimin Stan optimizasyonunu sıfırdan başlatmak yerine, aynı il/hedef için en son bulunan parametreler
+# başlangıç değeri olarak verilir. Parametreler il/hedef başına ayrı JSON dosyalarında tutulur; böylece
+# paralel süreçler birbirinin kaydını bozmaz
+WARM_START_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.warm_start')
+STATS_FILE = 'stats.jsonl'
+# İstatistik dosyası bu boyutu geçince '.1' uzantısıyla bir kez döndürülür; diskte en fazla iki dosya kalır
+STATS_MAX_BYTES = 1 << 20
+WARM_START = True
+
+# Prophet'in varsayılan kırılma noktası kuralı (n_changepoints=25, changepoint_range=0.8)
+N_CHANGEPOINTS = 25
+CHANGEPOINT_RANGE = 0.8
+
+
+def changepoint_dates(ds, n_changepoints=N_CHANGEPOINTS, changepoint_range=CHANGEPOINT_RANGE):
+    """Prophet'in bu seri için seçeceği kırılma noktası tarihleri (Prophet.set_changepoints ile aynı kural)."""
+    ds = pd.Series(pd.to_datetime(ds)).sort_values().reset_index(drop=True)
+    hist_size = int(np.floor(len(ds) * changepoint_range))
+    n = min(n_changepoints, hist_size - 1)
+    if n <= 0:
+        return pd.Series([], dtype='datetime64[ns]')
+    idx = np.linspace(0, hist_size - 1, n + 1).round().astype(int)
+    return ds.iloc[idx[1:]].reset_index(drop=True)
+
+
+def stan_init(m):
+    """Eğitilmiş modelin parametreleri ve bu parametrelerin hangi ölçekte olduğunu gösteren bilgiler.
+
+    Prophet y'yi en büyük mutlak değere, zamanı geçmişin uzunluğuna böler. Veri uzadıkça bu ölçekler
+    değiştiği için parametreler ölçekleriyle birlikte saklanır ve yeni veriye dönüştürülerek kullanılır.
+    """
+    res = {}
+    for pname in ['k', 'm', 'sigma_obs']:
+        res[pname] = float(m.params[pname][0][0])
+    for pname in ['delta', 'beta']:
+        res[pname] = m.params[pname][0].tolist()
+    res['y_scale'] = float(m.y_scale)
+    res['t_scale_days'] = m.t_scale / pd.Timedelta(days=1)
+    res['changepoints'] = [str(c) for c in (m.changepoints if len(m.changepoints) else [])]
+    return res
+
+
+def rescale_init(params, df):
+    """Kayıtlı parametreleri yeni serinin y ve zaman ölçeğine dönüştürür.
+
+    Eğimler (k, delta) y oranı x zaman oranıyla, seviyeler (m, beta) y oranıyla çarpılır.
+    Eski kırılma noktalarındaki eğim değişimleri yeni kırılma noktalarının en yakınına toplanır.
+    """
+    ds = pd.to_datetime(df['ds'])
+    y_scale = float(np.abs(df['y']).max()) or 1.0
+    t_scale_days = max((ds.max() - ds.min()) / pd.Timedelta(days=1), 1.0)
+    r_y = params['y_scale'] / y_scale
+    r_t = t_scale_days / params['t_scale_days']
+
+    new_cps = changepoint_dates(ds)
+    delta = np.zeros(max(len(new_cps), 1))
+    old_delta = np.asarray(params['delta'], dtype=float)
+    old_cps = pd.to_datetime(pd.Series(params['changepoints'], dtype='object'))
+    if len(new_cps) and len(old_cps) == len(old_delta):
+        gaps = np.abs(old_cps.to_numpy()[:, None] - new_cps.to_numpy()[None, :])
+        np.add.at(delta, gaps.argmin(axis=1), old_delta)
+
+    return {
+        'k': params['k'] * r_y * r_t,
+        'm': params['m'] * r_y,
+        # Kısa serilerde gürültü ölçeği sıfıra çöküp optimizasyon iterasyon sınırına dayanabiliyor; böyle bir
+        # değerden başlamak sonraki eğitimi de aynı çukura sokar. Bu yüzden sigma_obs her zaman Prophet'in
+        # varsayılanından başlar
+        'sigma_obs': 1.0,
+        'delta': delta * r_y * r_t,
+        'beta': np.asarray(params['beta'], dtype=float) * r_y,
+    }
+
+
+def iteration_count(m):
+    """Son Stan optimizasyonunun iterasyon sayısı; çıktı dosyası okunamazsa None."""
+    try:
+        with open(m.stan_backend.stan_fit.runset.stdout_files[0], encoding='utf-8', errors='ignore') as f:
+            text = f.read()
+    except Exception:
+        return None
+    # Newton: "Iteration 74. Log joint probability ..."; LBFGS: tablo satırları "     74       114.563 ..."
+    newton = re.findall(r'Iteration (\d+)\.', text)
+    if newton:
+        return int(newton[-1])
+    lbfgs = re.findall(r'^\s+(\d+)\s+-?\d', text, flags=re.MULTILINE)
+    return int(lbfgs[-1]) if lbfgs else None
+
+
+class WarmStartStore:
+    def __init__(self, store_dir=WARM_START_DIR):
+        self.store_dir = store_dir
+        os.makedirs(self.store_dir, exist_ok=True)
+
+    def _path(self, province, target):
+        safe = re.sub(r'[^\w-]+', '_', f"{province}__{target}")
+        return os.path.join(self.store_dir, safe + '.json')
+
+    def _read(self, province, target):
+        try:
+            with open(self._path(province, target), encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def get(self, province, target, df):
+        """Yeni seri (df: ds, y) için başlangıç değerleri; kayıt yoksa None."""
+        entry = self._read(province, target)
+        if entry is None:
+            return None
+        try:
+            return rescale_init(entry['params'], df)
+        except (KeyError, ValueError, ZeroDivisionError):
+            return None
+
+    def put(self, province, target, m):
+        entry = {'params': stan_init(m)}
+        path = self._path(province, target)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+        return entry
+
+    def record(self, **event):
+        # Her satır kısa tek bir JSON kaydı; farklı süreçlerin eklemeleri karışmaz
+        path = os.path.join(self.store_dir, STATS_FILE)
+        try:
+            if os.path.getsize(path) > STATS_MAX_BYTES:
+                os.replace(path, path + '.1')
+        except OSError:
+            pass
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(event, ensure_ascii=False) + '\n')
+
+    def report(self):
+        """Soğuk ve sıcak başlangıçlı eğitimlerin ortalama iterasyon ve sürelerini karşılaştırır."""
+        path = os.path.join(self.store_dir, STATS_FILE)
+        events = []
+        for p in (path + '.1', path):
+            if os.path.exists(p):
+                with open(p, encoding='utf-8') as f:
+                    events.extend(json.loads(line) for line in f if line.strip())
+        if not events:
+            return "Sıcak başlangıç istatistiği yok."
+
+        cold = [e for e in events if not e['warm']]
+        warm = [e for e in events if e['warm']]
+
+        def _avg(items, key):
+            vals = [e[key] for e in items if e.get(key) is not None]
+            return np.mean(vals) if vals else float('nan')
+
+        return (f"Eğitim: {len(events)} (soğuk {len(cold)}, sıcak {len(warm)})\n"
+                f"Ortalama iterasyon: soğuk {_avg(cold, 'iterations'):.1f} | sıcak {_avg(warm, 'iterations'):.1f}\n"
+                f"Ortalama süre (sn): soğuk {_avg(cold, 'seconds'):.3f} | sıcak {_avg(warm, 'seconds'):.3f}")
+
+
+_default_store = None
+
+
+def default_store():
+    global _default_store
+    if _default_store is None:
+        _default_store = WarmStartStore()
+    return _default_store
+
+
+def fit_prophet(m, df, province, target, store=None):
+    """m.fit(df) ile aynı; kayıtlı parametre varsa Stan optimizasyonu onlardan başlatılır."""
+    if not WARM_START:
+        return m.fit(df)
+    store = store or default_store()
+
+    init = store.get(province, target, df)
+    start = time.perf_counter()
+    if init is not None:
+        m.fit(df, init=init)
+    else:
+        m.fit(df)
+    seconds = time.perf_counter() - start
+    iterations = iteration_count(m)
+
+    store.put(province, target, m)
+    store.record(province=str(province), target=target, warm=init is not None, n_obs=len(df),
+                 iterations=iterations, seconds=seconds)
+    return m
+
+
+if __name__ == "__main__":
+    print(default_store().report())
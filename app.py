@@ -1,9 +1,18 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from prophet import Prophet
 import warnings
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from DataStore import list_provinces, load_province
+from ForecastCache import ForecastCache, cached_baseline, slice_horizon, series_hash, MAX_HORIZON_YEARS
+from ForecastStore import ForecastStore, sector_hash
+from BatchTrend import forecast_sector_shares
+from ScenarioEngine import EVENT_TYPES, event_affects, apply_crash, run_scenario_grid
+from ForecastBackend import BACKENDS, DEFAULT_BACKEND, forecast_horizon
+from DemographicCube import DemographicCube
 
 #Hataları filtreler
 warnings.filterwarnings('ignore')
@@ -17,17 +26,24 @@ st.markdown("Estimate population, economic growth, and **sectoral shifts** using
 st.sidebar.header("Simülasyon Ayarları")
 
 # İşlenmiş, kullanmaya uygun veriyi bulunduran dosyayı alırız
-INPUT_FILE = '.venv/Prophet_Training_Set_Sektorlu_USD.xlsx'
+INPUT_FILE = '.venv/Prophet_Training_Set_Sektorlu.parquet'
+# ForecastStore.py ile önceden hesaplanmış tahminler. Dosya yoksa her şey canlı hesaplanır
+STORE_FILE = '.venv/Tahmin_Deposu.parquet'
+# DemographicCube.py ile hesaplanmış cinsiyet, şehir/köy ve yaş grubu tahminleri. Dosya yoksa bölüm gösterilmez
+DEMOGRAPHY_FILE = '.venv/Demografi_Kupu.npz'
 
 #Yıl seçimi yapılır
 years_to_predict = st.sidebar.slider("Tahmin öngörüsü (Yıl)", 1, 30, 5)
 
+# Tahmin motoru: Prophet veya NumPy trend modeli (anında hesaplanır, hızlı senaryo denemeleri için)
+backend = st.sidebar.selectbox("Tahmin modeli", BACKENDS, index=BACKENDS.index(DEFAULT_BACKEND))
+
 # Kriz senaryoları için ek menüw
 st.sidebar.subheader("Kriz senaryoları")
 enable_crash = st.sidebar.checkbox("Enable 'Sudden Event' Scenario")
 
 if enable_crash:
-    crash_type = st.sidebar.radio("Event Type", ["Economic Crash (GDP)", "Population Decline", "Both"])
+    crash_type = st.sidebar.radio("Event Type", EVENT_TYPES)
     crash_year = st.sidebar.number_input("Year of Event", min_value=2024, max_value=2050, value=2026)
     crash_severity = st.sidebar.slider("Severity (% Drop)", 1, 90, 20) / 100
 else:
@@ -36,194 +52,326 @@ else:
     crash_severity = 0
 
 
-#Veriler yüklenir
+#Veriler yüklenir. Bütün tablo yerine il listesi dosya indeksinden, seçilen ilin satırları kendi row group'undan
+#okunur
 @st.cache_data
-def load_data(file_path):
+def load_city_list(file_path):
     try:
-        df = pd.read_excel(file_path, sheet_name='Iller_Verisi')
-        return df
+        return list_provinces(file_path)
     except Exception as e:
         return None
 
 
-df = load_data(INPUT_FILE)
+@st.cache_data
+def load_city(file_path, city):
+    return load_province(file_path, city)
+
+
+city_list = load_city_list(INPUT_FILE)
 
-if df is None:
+if city_list is None:
     st.error(f"Dosya yüklenemedi")
     st.stop()
 
 #Şehir seçimi yapımı için
-city_list = sorted(df['İl'].unique())
 selected_city = st.selectbox("Analiz için şehir seçiniz:", city_list)
 
-#Veri şehir için filtrelenir
-df_city = df[df['İl'] == selected_city].copy()
+#Veri şehir için okunur
+df_city = load_city(INPUT_FILE, selected_city).copy()
 
 #Sektör dağılımı yapılır
 all_sector_cols = [col for col in df_city.columns if col.startswith('Pay_')]
 main_sector_cols = [col for col in all_sector_cols if col != 'Pay_Imalat']
 
 
+# Eğitilmiş modeller ve tahminler diskte önbelleklenir. Slider, checkbox veya şehir değişince
+# model yeniden eğitilmez; tahmin en uzun ufuk (30 yıl) için bir kez hesaplanıp kesilerek kullanılır
+forecast_cache = ForecastCache()
+
+
+# Depo dosyası yeniden yazılınca (toplu iş tekrar çalışınca) değiştirilme zamanı değişir ve depo yeniden okunur
+@st.cache_resource
+def load_store(file_path, mtime):
+    return ForecastStore(file_path)
+
+
+forecast_store = load_store(STORE_FILE, os.path.getmtime(STORE_FILE) if os.path.exists(STORE_FILE) else None)
+
+
+@st.cache_resource
+def load_demography(file_path, mtime):
+    return DemographicCube.load(file_path) if mtime is not None else None
+
+
+demography = load_demography(DEMOGRAPHY_FILE,
+                             os.path.getmtime(DEMOGRAPHY_FILE) if os.path.exists(DEMOGRAPHY_FILE) else None)
+
+
 # Prophet için temel fonksiyonlar
 def run_prophet(df_input, target_col, years, crash_on, c_year, c_sev, is_gdp=False):
     df_p = df_input[['ds', target_col]].rename(columns={target_col: 'y'})
-    if len(df_p) < 2: return None, None
-
-    m = Prophet(yearly_seasonality=True, daily_seasonality=False, weekly_seasonality=False)
-    m.fit(df_p)
+    if len(df_p) < 2: return None
+
+    # Önce önceden hesaplanmış depoya bakılır. Depoda yoksa veya veri değiştiyse canlı eğitilir (önbellekli).
+    # Paneller sadece tahmin tablosunu kullanır; model nesnesi JSON'dan geri yüklenmez, böylece eğitim sunucusu
+    # (FitWorker) çalışırken dashboard Prophet'i hiç içe aktarmaz
+    city = df_input['İl'].iloc[0]
+    if backend != 'prophet':
+        # NumPy trendi milisaniyenin altında hesaplandığı için depo/önbellek kullanılmaz
+        baseline = forecast_horizon(df_p, MAX_HORIZON_YEARS, backend)
+    else:
+        baseline = forecast_store.lookup(city, target_col, series_hash(df_p))
+        if baseline is None:
+            baseline = cached_baseline(forecast_cache, city, target_col, df_p)['forecast']
 
-    future = m.make_future_dataframe(periods=years, freq='YE')
-    forecast = m.predict(future)
+    # Kriz senaryosu temel tahminin üstüne uygulanır, yeniden eğitim gerekmez
+    forecast = slice_horizon(baseline, df_p['ds'].nunique(), years)
 
     # Kriz senaryolarının uygulanıp uygulanmadığını kontrol eder, uygulanırsa etkilerini uygular
-    if crash_on:
-        apply_crash = False
-        if is_gdp and (crash_type in ["Economic Crash (GDP)", "Both"]):
-            apply_crash = True
-        elif not is_gdp and (crash_type in ["Population Decline", "Both"]):
-            apply_crash = True
+    if crash_on and event_affects(crash_type, is_gdp):
+        forecast = apply_crash(forecast, c_year, c_sev)
 
-        if apply_crash:
-            mask = forecast['ds'].dt.year >= c_year
-            forecast.loc[mask, ['yhat', 'yhat_lower', 'yhat_upper']] *= (1 - c_sev)
-
-    return m, forecast
+    return forecast
 
 
 # Sektörler büyüyüp küçülürken bazen matematiksel olarak %100 değerinin üstüne çıkıyor, burada normalizasyon ile dağıtım yapıyoruz
 def forecast_sector_trends(df_input, sectors, years):
 
-    # Dummy bir model ile gelecek oluşturulur
-    m_dummy = Prophet(yearly_seasonality=True)
-    m_dummy.fit(df_input[['ds']].assign(y=0))
-    future_dates = m_dummy.make_future_dataframe(periods=years, freq='YE')
+    stored = forecast_store.lookup_sectors(df_input['İl'].iloc[0], sectors, sector_hash(df_input, sectors))
+    if stored is not None:
+        return slice_horizon(stored, df_input['ds'].nunique(), years)
 
-    forecast_results = pd.DataFrame({'ds': future_dates['ds']})
+    # Bütün sektör payları tek bir vektörel trend modeliyle birlikte tahmin edilir (sektör başına Prophet yerine).
+    # Negatif değerler kırpılır ve toplam %100'e normalize edilir
+    return forecast_sector_shares(df_input, sectors, years)
 
-    # Sektörlere, her biri için ayrı olarak forcast uygulanır
-    progress_bar = st.progress(0)
 
-    for i, sector in enumerate(sectors):
-        df_s = df_input[['ds', sector]].rename(columns={sector: 'y'})
+# Sektör payları tahmin edilir, en büyük 5 sektör dışındakiler 'Others' altında toplanır
+def sector_panel(df_input, sectors, years):
+    df_norm = forecast_sector_trends(df_input, sectors, years)
+    future_means = df_norm[sectors].mean().sort_values(ascending=False)
+    top_5_cols = future_means.head(5).index.tolist()
+    df_norm['Others'] = 100 - df_norm[top_5_cols].sum(axis=1)
+    return df_norm, top_5_cols + ['Others']
 
-        # Model koyulur
-        m = Prophet(yearly_seasonality=True, daily_seasonality=False, weekly_seasonality=False)
-        m.fit(df_s)
-        fcst = m.predict(future_dates)
 
-        # Negatif değerler kaldırılır
-        forecast_results[sector] = fcst['yhat'].clip(lower=0)
+# Nüfus, GSYİH ve sektör tahminleri birbirinden bağımsızdır. Üçü aynı anda arka plandaki iş parçacıklarına verilir ve
+# her panel kendi sonucu gelir gelmez çizilir; bekleme süresi üç modelin toplamı değil en yavaşı kadardır.
+# Prophet eğitimi cmdstan alt sürecinde çalıştığı için iş parçacıkları gerçekten paralel ilerler.
+# Havuz her tarayıcı oturumunun kendisine aittir (session_state); bir kullanıcının eğitimleri, şehri hızlı
+# değiştirse bile sadece kendi havuzunu doldurur, diğer kullanıcıların panellerini bekletmez
+PANEL_WORKERS = 3
+# Sonuç beklenirken panellerdeki süre bu aralıkla güncellenir. Her güncelleme Streamlit'e çalışmayı durdurma
+# fırsatı verir, böylece şehir değişince sayfa eski şehrin sonucunu beklemeden yeniden başlar
+PANEL_POLL_SECONDS = 0.5
 
-        progress_bar.progress((i + 1) / len(sectors))
 
-    progress_bar.empty()
+def panel_executor():
+    # Oturum kapanınca havuz session_state ile birlikte silinir, boştaki iş parçacıkları da kapanır
+    if 'panel_executor' not in st.session_state:
+        st.session_state['panel_executor'] = ThreadPoolExecutor(max_workers=PANEL_WORKERS,
+                                                                thread_name_prefix='panel')
+    return st.session_state['panel_executor']
 
-    forecast_results['Total_Sum'] = forecast_results[sectors].sum(axis=1)
 
-    # Sektörler bölünür, toplamda 100e yuvarlanır/100e göre dağıtılır
-    for sector in sectors:
-        forecast_results[sector] = (forecast_results[sector] / forecast_results['Total_Sum']) * 100
+def submit_panels(key, jobs):
+    """jobs: {panel: (fonksiyon, argümanlar)}; {panel: future} döner.
+
+    Aynı seçim (key) için işler zaten verilmişse yeniden verilmez. Seçim değiştiyse önceki seçimin henüz
+    başlamamış işleri iptal edilir; başlamış bir eğitim yarıda kesilemez, biter ve sonucu önbelleğe yazılır
+    ama çizilmez.
+    """
+    previous = st.session_state.get('panel_jobs')
+    if previous is not None:
+        if previous[0] == key:
+            return previous[1]
+        for future in previous[1].values():
+            future.cancel()
+
+    executor = panel_executor()
+    futures = {panel: executor.submit(func, *args) for panel, (func, args) in jobs.items()}
+    st.session_state['panel_jobs'] = (key, futures)
+    return futures
+
+
+# matplotlib ilk çizimde içe aktarılır; sayfa iskeleti ve bekleme mesajları ondan önce görünür
+def draw_population(f_pop):
+    import matplotlib.pyplot as plt
+
+    future_val = f_pop.iloc[-1]['yhat']
+    growth = ((future_val - f_pop.iloc[-years_to_predict - 1]['yhat']) / f_pop.iloc[-years_to_predict - 1][
+        'yhat']) * 100
+
+    st.metric("Est. Population", f"{int(future_val):,}", f"{growth:.2f}% Growth")
+
+    fig1, ax1 = plt.subplots(figsize=(10, 6))
+    ax1.plot(df_city['ds'], df_city['y'], 'ko', label='History')
+    ax1.plot(f_pop['ds'], f_pop['yhat'], 'b-', linewidth=2, label='Forecast')
+    ax1.fill_between(f_pop['ds'], f_pop['yhat_lower'], f_pop['yhat_upper'], color='blue', alpha=0.2)
+    if enable_crash and crash_type in ["Population Decline", "Both"]:
+        ax1.axvline(pd.to_datetime(f'{crash_year}-01-01'), color='red', linestyle='--', label='Crash')
+    ax1.legend()
+    ax1.grid(True, alpha=0.3)
+    st.pyplot(fig1)
+
+
+def draw_gdp(f_gdp):
+    import matplotlib.pyplot as plt
+
+    current_gdp = f_gdp.iloc[-years_to_predict - 1]['yhat']
+    future_gdp = f_gdp.iloc[-1]['yhat']
+    gdp_growth = ((future_gdp - current_gdp) / current_gdp) * 100
+
+    # Metrikler gösterilir
+    prefix = "$" if target_col == 'GSYIH_USD' else "₺"
+    st.metric("Est. GDP", f"{prefix}{int(future_gdp):,}", f"{gdp_growth:.2f}% Growth")
+
+    # Matplot ile plotting işlemi
+    fig2, ax2 = plt.subplots(figsize=(10, 4))
+
+    ax2.plot(df_city['ds'], df_city[target_col], 'go', label='History')
+    ax2.plot(f_gdp['ds'], f_gdp['yhat'], 'g-', linewidth=2, label='Forecast')
+    ax2.fill_between(f_gdp['ds'], f_gdp['yhat_lower'], f_gdp['yhat_upper'], color='green', alpha=0.2)
+
+    if enable_crash and crash_type in ["Economic Crash (GDP)", "Both"]:
+        ax2.axvline(pd.to_datetime(f'{crash_year}-01-01'), color='red', linestyle='--', label='Crash')
+
+    ax2.legend()
+    ax2.grid(True, alpha=0.3)
+    st.pyplot(fig2)
+
+
+def draw_sectors(df_norm, plot_cols):
+    import matplotlib.pyplot as plt
+
+    #Matplot ile plotting
+    fig3, ax3 = plt.subplots(figsize=(10, 5))
+
+    x = df_norm['ds']
+    y_stack = [df_norm[c] for c in plot_cols]
+    labels = [c.replace('Pay_', '') for c in plot_cols]
+
+    # Tahmin çizgisi plota çekilir
+    last_hist_date = df_city['ds'].max()
+    ax3.axvline(last_hist_date, color='white', linestyle='--', linewidth=1.5, alpha=0.8)
+    ax3.text(last_hist_date, 5, ' Forecast Start', color='white', fontsize=9, ha='left')
+    ax3.stackplot(x, y_stack, labels=labels, alpha=0.85)
+
+    ax3.set_title(f"Tahmini ekonomik kompozisyon")
+    ax3.set_ylabel("Share (%)")
+    ax3.set_ylim(0, 100)
+    ax3.legend(loc='upper left', fontsize='small', framealpha=0.6, bbox_to_anchor=(1, 1))
+    st.pyplot(fig3)
+
 
-    return forecast_results
+def draw_demography(series):
+    import matplotlib.pyplot as plt
+
+    # Küpteki tahmin dosyadan okunur; ufuk slider'daki yıl sayısına göre kesilir
+    last_year = demography.last_observed + years_to_predict
+    fig4, ax4 = plt.subplots(figsize=(10, 4))
+    for col in series:
+        table = demography.query(selected_city, col)
+        table = table[table['ds'].dt.year <= last_year]
+        line, = ax4.plot(table['ds'], table['yhat'], linewidth=2, label=col)
+        ax4.plot(table['ds'], table['actual'], 'o', color=line.get_color(), markersize=3)
+        ax4.fill_between(table['ds'], table['yhat_lower'], table['yhat_upper'], color=line.get_color(), alpha=0.15)
+    ax4.legend(loc='upper left', fontsize='small')
+    ax4.grid(True, alpha=0.3)
+    st.pyplot(fig4)
+
+
+target_col = 'GSYIH_USD' if 'GSYIH_USD' in df_city.columns else 'GSYIH'
+has_gdp = target_col in df_city.columns and df_city[target_col].sum() > 0
 
+# Bütün modeller çizimden önce aynı anda başlatılır
+jobs = {'pop': (run_prophet, (df_city, 'y', years_to_predict, enable_crash, crash_year, crash_severity))}
+if has_gdp:
+    jobs['gdp'] = (run_prophet, (df_city, target_col, years_to_predict, enable_crash, crash_year, crash_severity,
+                                 True))
+    if main_sector_cols:
+        jobs['sectors'] = (sector_panel, (df_city, main_sector_cols, years_to_predict))
+selection = (selected_city, years_to_predict, backend, enable_crash, crash_type, crash_year, crash_severity)
+futures = submit_panels(selection, jobs)
 
 #Burası layout'ın tasarımı için kodları içerir
 col1, col2 = st.columns(2)
+slots = {}
 
 with col1:
     st.subheader(f"Nüfus Tahmini")
-    with st.spinner('Nüfus hesaplanıyor. Lütfen bekleyiniz.'):
-        m_pop, f_pop = run_prophet(df_city, 'y', years_to_predict, enable_crash, crash_year, crash_severity)
-
-    if f_pop is not None:
-        future_val = f_pop.iloc[-1]['yhat']
-        growth = ((future_val - f_pop.iloc[-years_to_predict - 1]['yhat']) / f_pop.iloc[-years_to_predict - 1][
-            'yhat']) * 100
-
-        st.metric("Est. Population", f"{int(future_val):,}", f"{growth:.2f}% Growth")
-
-        fig1, ax1 = plt.subplots(figsize=(10, 6))
-        ax1.plot(df_city['ds'], df_city['y'], 'ko', label='History')
-        ax1.plot(f_pop['ds'], f_pop['yhat'], 'b-', linewidth=2, label='Forecast')
-        ax1.fill_between(f_pop['ds'], f_pop['yhat_lower'], f_pop['yhat_upper'], color='blue', alpha=0.2)
-        if enable_crash and crash_type in ["Population Decline", "Both"]:
-            ax1.axvline(pd.to_datetime(f'{crash_year}-01-01'), color='red', linestyle='--', label='Crash')
-        ax1.legend()
-        ax1.grid(True, alpha=0.3)
-        st.pyplot(fig1)
+    slots['pop'] = st.empty()
 
 with col2:
     st.subheader(f"Ekonomik Tahmin (USD)")
 
-    target_col = 'GSYIH_USD' if 'GSYIH_USD' in df_city.columns else 'GSYIH'
-
     # Veri kontrol edilir
-    if target_col in df_city.columns and df_city[target_col].sum() > 0:
-
-        # Toplam GDP tahmini yapılır
-        with st.spinner('GSYIH Hesaplanıyor. Lütfen bekleyiniz.'):
-            m_gdp, f_gdp = run_prophet(df_city, target_col, years_to_predict, enable_crash, crash_year, crash_severity,
-                                       is_gdp=True)
-
-        if f_gdp is not None:
-            current_gdp = f_gdp.iloc[-years_to_predict - 1]['yhat']
-            future_gdp = f_gdp.iloc[-1]['yhat']
-            gdp_growth = ((future_gdp - current_gdp) / current_gdp) * 100
-
-            # Metrikler gösterilir
-            prefix = "$" if target_col == 'GSYIH_USD' else "₺"
-            st.metric("Est. GDP", f"{prefix}{int(future_gdp):,}", f"{gdp_growth:.2f}% Growth")
-
-            # Matplot ile plotting işlemi
-            fig2, ax2 = plt.subplots(figsize=(10, 4))
-
-            ax2.plot(df_city['ds'], df_city[target_col], 'go', label='History')
-            ax2.plot(f_gdp['ds'], f_gdp['yhat'], 'g-', linewidth=2, label='Forecast')
-            ax2.fill_between(f_gdp['ds'], f_gdp['yhat_lower'], f_gdp['yhat_upper'], color='green', alpha=0.2)
-
-            if enable_crash and crash_type in ["Economic Crash (GDP)", "Both"]:
-                ax2.axvline(pd.to_datetime(f'{crash_year}-01-01'), color='red', linestyle='--', label='Crash')
-
-            ax2.legend()
-            ax2.grid(True, alpha=0.3)
-            st.pyplot(fig2)
+    if has_gdp:
+        slots['gdp'] = st.empty()
 
         # Normalizasyona uğramış sektörlerin gösterimi için olan kısım
         st.write("----")
         st.subheader("Sektör trendleri")
 
         if main_sector_cols:
-            with st.spinner('Gelecek tahmini ve normalizasyon uygulanıyor'):
-                df_norm = forecast_sector_trends(df_city, main_sector_cols, years_to_predict)
-                future_means = df_norm[main_sector_cols].mean().sort_values(ascending=False)
-                top_5_cols = future_means.head(5).index.tolist()
-                df_norm['Others'] = 100 - df_norm[top_5_cols].sum(axis=1)
-                plot_cols = top_5_cols + ['Others']
-
-            #Matplot ile plotting
-            fig3, ax3 = plt.subplots(figsize=(10, 5))
-
-            x = df_norm['ds']
-            y_stack = [df_norm[c] for c in plot_cols]
-            labels = [c.replace('Pay_', '') for c in plot_cols]
-
-            # Tahmin çizgisi plota çekilir
-            last_hist_date = df_city['ds'].max()
-            ax3.axvline(last_hist_date, color='white', linestyle='--', linewidth=1.5, alpha=0.8)
-            ax3.text(last_hist_date, 5, ' Forecast Start', color='white', fontsize=9, ha='left')
-            ax3.stackplot(x, y_stack, labels=labels, alpha=0.85)
-
-            ax3.set_title(f"Tahmini ekonomik kompozisyon")
-            ax3.set_ylabel("Share (%)")
-            ax3.set_ylim(0, 100)
-            ax3.legend(loc='upper left', fontsize='small', framealpha=0.6, bbox_to_anchor=(1, 1))
-            st.pyplot(fig3)
-
+            slots['sectors'] = st.empty()
         else:
             st.warning("Veri bulunamadı.")
     else:
         st.warning("Bu şehir için GSYIH değeri bulunamadı.")
 
+messages = {'pop': 'Nüfus hesaplanıyor. Lütfen bekleyiniz.',
+            'gdp': 'GSYIH Hesaplanıyor. Lütfen bekleyiniz.',
+            'sectors': 'Gelecek tahmini ve normalizasyon uygulanıyor'}
+results = {}
+pending = {future: panel for panel, future in futures.items()}
+wait_start = time.perf_counter()
+while pending:
+    elapsed = time.perf_counter() - wait_start
+    for panel in pending.values():
+        slots[panel].info(f"{messages[panel]} ({elapsed:.0f} sn)")
+    done, _ = wait(list(pending), timeout=PANEL_POLL_SECONDS, return_when=FIRST_COMPLETED)
+
+    # Sonucu gelen panel diğerlerini beklemeden çizilir
+    for future in done:
+        panel = pending.pop(future)
+        try:
+            results[panel] = future.result()
+        except Exception as e:
+            slots[panel].error(f"Tahmin hesaplanamadı: {e}")
+            continue
+        with slots[panel].container():
+            if panel == 'pop' and results[panel] is not None:
+                draw_population(results[panel])
+            elif panel == 'gdp' and results[panel] is not None:
+                draw_gdp(results[panel])
+            elif panel == 'sectors':
+                draw_sectors(*results[panel])
+
+f_pop = results.get('pop')
+
+# Seçili şehir için bütün (yıl, şiddet) kombinasyonlarının duyarlılık tablosu.
+# Önbellekteki tek temel tahmin üzerinden dizi işlemleriyle hesaplanır, Prophet yeniden çalışmaz
+if enable_crash and f_pop is not None:
+    with st.expander("Senaryo duyarlılık tablosu"):
+        city_baselines = {'Nufus': run_prophet(df_city, 'y', MAX_HORIZON_YEARS, False, None, 0)}
+        if target_col in df_city.columns and df_city[target_col].sum() > 0:
+            city_baselines['GSYIH'] = run_prophet(df_city, target_col, MAX_HORIZON_YEARS, False, None, 0, is_gdp=True)
+        cube = run_scenario_grid({selected_city: city_baselines}, event_types=[crash_type])
+
+        horizon_year = int(f_pop['ds'].dt.year.iloc[-1])
+        sens_target = 'GSYIH' if crash_type == "Economic Crash (GDP)" else 'Nufus'
+        st.caption(f"{sens_target} için {horizon_year} yılı tahmini (satır: olay yılı, sütun: şiddet %)")
+        st.dataframe(cube.sensitivity_table(sens_target, crash_type, horizon_year).style.format("{:,.0f}"))
+
+# Cinsiyet, şehir/köy ve yaş grubu tahminleri önceden hesaplanmış küpten çizilir, model eğitilmez
+if demography is not None and selected_city in demography.provinces:
+    with st.expander("Demografik kırılım"):
+        picked = st.multiselect("Seriler", demography.series,
+                                default=[c for c in ('Erkek', 'Kadın') if c in demography.series])
+        if picked:
+            draw_demography(picked)
+
 # --- DATA TABLE ---
 with st.expander("Tahmin verisini göster"):
     if f_pop is not None: st.dataframe(f_pop.tail())
\ No newline at end of file